@@ -1,5 +1,8 @@
+import json
 import logging
+import os
 import re
+import time
 from collections import defaultdict
 
 import boto3.session
@@ -7,12 +10,13 @@ import requests
 from pkg_resources import iter_entry_points
 from werkzeug.local import LocalProxy
 
-from cloud_inquisitor.constants import PLUGIN_NAMESPACES
+from cloud_inquisitor.constants import PLUGIN_NAMESPACES, DEFAULT_REGION_CACHE_FILE
 from cloud_inquisitor.exceptions import InquisitorError
 from cloud_inquisitor.utils import get_user_data_configuration, read_config
 
 logger = logging.getLogger(__name__)
 __regions = None
+__credential_broker = None
 
 # Setup app wide variables
 config_path, app_config = LocalProxy(read_config)
@@ -47,48 +51,48 @@ def get_aws_session(account):
     """
     from cloud_inquisitor.config import dbconfig
     from cloud_inquisitor.plugins.types.accounts import AWSAccount
+    from cloud_inquisitor.throttling import register_rate_limiter
 
     if not isinstance(account, AWSAccount):
         raise InquisitorError('Non AWSAccount passed to get_aws_session, got {}'.format(account.__class__.__name__))
 
-    # If no keys are on supplied for the account, use sts.assume_role instead
-    session = get_local_aws_session()
-    if session.get_credentials().method in ['iam-role', 'env', 'explicit']:
-        sts = session.client('sts')
+    broker = get_credential_broker()
+    role_name = dbconfig.get('role_name', default='cinq_role')
+
+    if not dbconfig.get('credential_cache_enabled', default=True):
+        session = broker.create_session(account.account_number, role_name)
     else:
-        # If we are not running on an EC2 instance, assume the instance role
-        # first, then assume the remote role
-        temp_sts = session.client('sts')
-
-        audit_sts_role = temp_sts.assume_role(
-            RoleArn=app_config.aws_api.instance_role_arn,
-            RoleSessionName='inquisitor'
-        )
-        sts = boto3.session.Session(
-            audit_sts_role['Credentials']['AccessKeyId'],
-            audit_sts_role['Credentials']['SecretAccessKey'],
-            audit_sts_role['Credentials']['SessionToken']
-        ).client('sts')
-
-    role = sts.assume_role(
-        RoleArn='arn:aws:iam::{}:role/{}'.format(
-            account.account_number,
-            dbconfig.get('role_name', default='cinq_role')
-        ),
-        RoleSessionName='inquisitor'
-    )
-
-    sess = boto3.session.Session(
-        role['Credentials']['AccessKeyId'],
-        role['Credentials']['SecretAccessKey'],
-        role['Credentials']['SessionToken']
-    )
-
-    return sess
+        session = broker.get_session(account.account_number, role_name)
+
+    if dbconfig.get('api_rate_limit_enabled', default=True):
+        register_rate_limiter(session, account.account_number)
+
+    return session
+
+
+def get_credential_broker():
+    """Returns the process wide :obj:`CredentialBroker` caching the assumed role credentials used by
+    :func:`get_aws_session`. If the `credential_cache_file` option is set, credentials are shared between all processes
+    on the host through the file
+
+    Returns:
+        :obj:`CredentialBroker`
+    """
+    from cloud_inquisitor.config import dbconfig
+    from cloud_inquisitor.credentials import CredentialBroker, FileCredentialStore
+    global __credential_broker
+
+    if not __credential_broker:
+        cache_file = dbconfig.get('credential_cache_file', default='')
+        __credential_broker = CredentialBroker(store=FileCredentialStore(cache_file) if cache_file else None)
+
+    return __credential_broker
 
 
 def get_aws_regions(*, force=False):
-    """Load a list of AWS regions from the AWS static data.
+    """Load a list of AWS regions from the AWS static data. The list is cached in memory, as well as in a local file
+    which is refreshed once the cache TTL expires. If the AWS static data cannot be downloaded, the cached list is used
+    regardless of its age.
 
     Args:
         force (`bool`): Force fetch list of regions even if we already have a cached version
@@ -100,14 +104,60 @@ def get_aws_regions(*, force=False):
     global __regions
 
     if force or not __regions:
+        cache_file = dbconfig.get('region_cache_file', default=DEFAULT_REGION_CACHE_FILE)
+        cache_ttl = dbconfig.get('region_cache_ttl', default=24) * 3600
+        cache = __read_region_cache(cache_file) if cache_file else None
+
+        if not force and cache and cache['updated'] + cache_ttl > time.time():
+            logger.debug('Loaded list of AWS regions from {}'.format(cache_file))
+            __regions = cache['regions']
+            return __regions
+
         logger.debug('Loading list of AWS regions from static data')
-        data = requests.get('https://ip-ranges.amazonaws.com/ip-ranges.json').json()
+        try:
+            data = requests.get('https://ip-ranges.amazonaws.com/ip-ranges.json').json()
+
+        except (requests.RequestException, ValueError):
+            if not cache:
+                raise
+
+            logger.exception('Failed loading AWS static data, using cached list of regions from {}'.format(cache_file))
+            __regions = cache['regions']
+            return __regions
+
         rgx = re.compile(dbconfig.get('ignored_aws_regions_regexp', default='(^cn-|GLOBAL|-gov)'), re.I)
         __regions = sorted(list({x['region'] for x in data['prefixes'] if not rgx.search(x['region'])}))
 
+        if cache_file:
+            __write_region_cache(cache_file, __regions)
+
     return __regions
 
 
+def __read_region_cache(path):
+    try:
+        with open(path, 'r') as fh:
+            cache = json.load(fh)
+
+        if cache.get('regions'):
+            return cache
+
+    except (OSError, ValueError):
+        pass
+
+
+def __write_region_cache(path, regions):
+    try:
+        tmp_path = '{}.{}'.format(path, os.getpid())
+        with open(tmp_path, 'w') as fh:
+            json.dump({'updated': int(time.time()), 'regions': regions}, fh)
+
+        os.replace(tmp_path, path)
+
+    except OSError:
+        logger.exception('Failed writing AWS region cache to {}'.format(path))
+
+
 def get_plugin_by_name(ns, name):
     for plugin in CINQ_PLUGINS[ns]['plugins']:
         if plugin.name == name:
@@ -2,6 +2,7 @@
 """
 import os
 import re
+import tempfile
 from collections import namedtuple
 from enum import Enum
 
@@ -144,6 +145,8 @@ DEFAULT_MENU_ITEMS = {
     }
 }
 
+DEFAULT_REGION_CACHE_FILE = os.path.join(tempfile.gettempdir(), 'cinq-aws-regions.json')
+
 DEFAULT_CONFIG_OPTIONS = [
     {
         'prefix': 'default',
@@ -156,6 +159,22 @@ DEFAULT_CONFIG_OPTIONS = [
                          'Role name Cloud Inquisitor will use in each account'),
             ConfigOption('ignored_aws_regions_regexp', '(^cn-|GLOBAL|-gov)', 'string',
                          'A regular expression used to filter out regions from the AWS static data'),
+            ConfigOption('region_cache_file', DEFAULT_REGION_CACHE_FILE, 'string',
+                         'Path to a file caching the list of AWS regions between restarts. Leave empty to disable'),
+            ConfigOption('region_cache_ttl', 24, 'int',
+                         'Time in hours before the cached list of AWS regions is refreshed'),
+            ConfigOption('empty_region_interval_multiplier', 1, 'int',
+                         'Run region collectors for regions where an account has no resources this many times less '
+                         'frequently. 1 runs all regions at the normal interval'),
+            ConfigOption('credential_cache_enabled', True, 'bool',
+                         'Cache and reuse assumed role credentials until shortly before they expire'),
+            ConfigOption('credential_cache_file', '', 'string',
+                         'Path to a file used to share cached credentials between processes on the same host. Leave '
+                         'empty to only cache credentials in memory'),
+            ConfigOption('api_rate_limit_enabled', True, 'bool',
+                         'Rate limit AWS API calls per account, region and service, backing off when throttled'),
+            ConfigOption('api_rate_limit', 20, 'int',
+                         'Maximum number of AWS API calls per second, per account, region and service'),
             ConfigOption(
                 name='auth_system',
                 default_value={
@@ -168,6 +187,14 @@ DEFAULT_CONFIG_OPTIONS = [
                 description='Enabled authentication module'
             ),
             ConfigOption('scheduler', 'StandaloneScheduler', 'string', 'Default scheduler module'),
+            ConfigOption('dependency_scheduling', False, 'bool',
+                         'Hold auditor jobs until the collector jobs producing the resource types they audit have '
+                         'completed, instead of starting auditors at a fixed delay after the collectors'),
+            ConfigOption('dependency_timeout', 30, 'int',
+                         'Maximum time in minutes an auditor job is held waiting for collector jobs to complete'),
+            ConfigOption('resource_change_log', False, 'bool',
+                         'Record the resources created, updated or deleted by collectors, allowing auditors to only '
+                         'audit the resources changed since their previous run'),
             ConfigOption('jwt_key_file_path', 'ssl/private.key', 'string',
                          'Path to the private key used to encrypt JWT session tokens. Can be relative to the '
                          'folder containing the configuration file, or absolute path')
@@ -0,0 +1,237 @@
+import fcntl
+import json
+import logging
+import os
+import threading
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+from functools import partial
+
+import boto3.session
+import botocore.session
+from botocore.credentials import RefreshableCredentials
+from dateutil import parser, tz
+
+from cloud_inquisitor import app_config, get_local_aws_session
+
+logger = logging.getLogger(__name__)
+
+
+class FileCredentialStore(object):
+    """Credential store sharing assumed role credentials between processes on the same host, through a JSON file
+    guarded by an advisory lock. The file contains live credentials and is created readable only by the current user
+
+    Args:
+        path (`str`): Path to the cache file
+    """
+    def __init__(self, path):
+        self.path = path
+        self.lock_path = '{}.lock'.format(path)
+
+    def get(self, key):
+        """Return the cached credentials for `key`, or `None` if no credentials are cached
+
+        Args:
+            key (`str`): Cache key
+
+        Returns:
+            `dict`
+        """
+        with self.__lock(fcntl.LOCK_SH):
+            return self.__read().get(key)
+
+    def set(self, key, credentials):
+        """Store the credentials for `key`, dropping any expired credentials from the file
+
+        Args:
+            key (`str`): Cache key
+            credentials (`dict`): Credential metadata, in the format used by :obj:`RefreshableCredentials`
+
+        Returns:
+            `None`
+        """
+        with self.__lock(fcntl.LOCK_EX):
+            now = datetime.now(tz.tzutc())
+            data = {k: v for k, v in self.__read().items() if parser.parse(v['expiry_time']) > now}
+            data[key] = credentials
+
+            tmp_path = '{}.{}'.format(self.path, os.getpid())
+            fd = os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+            with os.fdopen(fd, 'w') as fh:
+                json.dump(data, fh)
+
+            os.replace(tmp_path, self.path)
+
+    def __read(self):
+        try:
+            with open(self.path, 'r') as fh:
+                return json.load(fh)
+
+        except (OSError, ValueError):
+            return {}
+
+    @contextmanager
+    def __lock(self, operation):
+        with open(self.lock_path, 'a') as fh:
+            fcntl.flock(fh, operation)
+            try:
+                yield
+            finally:
+                fcntl.flock(fh, fcntl.LOCK_UN)
+
+
+class CredentialBroker(object):
+    """Process wide cache of assumed role credentials, keyed by account and role name. Credentials are wrapped in
+    botocore :obj:`RefreshableCredentials`, so they are transparently refreshed by botocore shortly before expiry,
+    and the same credentials are shared by all sessions created for an account.
+
+    Attributes:
+        hits (`int`): Number of sessions created from cached credentials
+        misses (`int`): Number of sessions that required a new `sts:AssumeRole` call
+        refreshes (`int`): Number of times cached credentials were refreshed before expiring
+        store (:obj:`FileCredentialStore`): Optional store used to share credentials between processes
+    """
+    def __init__(self, store=None):
+        self.hits = 0
+        self.misses = 0
+        self.refreshes = 0
+        self.store = store
+        self.__credentials = {}
+        self.__lock = threading.RLock()
+
+    @property
+    def stats(self):
+        """Returns the cache counters
+
+        Returns:
+            `dict`
+        """
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'refreshes': self.refreshes,
+            'cached': len(self.__credentials)
+        }
+
+    def get_session(self, account_number, role_name):
+        """Returns a new boto3 Session for the role in the account, using cached credentials if available. A new
+        Session object is returned on every call, as sessions are not thread-safe, but the underlying credentials are
+        shared
+
+        Args:
+            account_number (`str`): Account number to assume the role in
+            role_name (`str`): Name of the role to assume
+
+        Returns:
+            :obj:`boto3:boto3.session.Session`
+        """
+        role_arn = 'arn:aws:iam::{}:role/{}'.format(account_number, role_name)
+        return self.__get_session(self.__get_credentials(role_arn, self.__get_sts_client))
+
+    def create_session(self, account_number, role_name):
+        """Returns a boto3 Session for the role in the account using newly assumed credentials, bypassing the cache
+
+        Args:
+            account_number (`str`): Account number to assume the role in
+            role_name (`str`): Name of the role to assume
+
+        Returns:
+            :obj:`boto3:boto3.session.Session`
+        """
+        role_arn = 'arn:aws:iam::{}:role/{}'.format(account_number, role_name)
+        metadata = self.__assume_role(role_arn, self.__get_sts_client, shared=False)
+
+        return boto3.session.Session(metadata['access_key'], metadata['secret_key'], metadata['token'])
+
+    def clear(self):
+        """Remove all cached credentials and reset the counters
+
+        Returns:
+            `None`
+        """
+        with self.__lock:
+            self.__credentials = {}
+            self.hits = self.misses = self.refreshes = 0
+
+    def __get_credentials(self, role_arn, get_sts_client, shared=True):
+        with self.__lock:
+            if role_arn in self.__credentials:
+                self.hits += 1
+                return self.__credentials[role_arn]
+
+            self.misses += 1
+            metadata = self.__load_shared(role_arn) if shared else None
+            if not metadata:
+                metadata = self.__assume_role(role_arn, get_sts_client, shared)
+
+            credentials = RefreshableCredentials.create_from_metadata(
+                metadata=metadata,
+                refresh_using=partial(self.__refresh, role_arn, get_sts_client, shared),
+                method='sts-assume-role'
+            )
+            self.__credentials[role_arn] = credentials
+
+            return credentials
+
+    def __load_shared(self, role_arn):
+        """Returns credentials for `role_arn` from the shared store, if they are valid for longer than the botocore
+        refresh window
+        """
+        if not self.store:
+            return None
+
+        metadata = self.store.get(role_arn)
+        min_expiry = datetime.now(tz.tzutc()) + timedelta(seconds=RefreshableCredentials._advisory_refresh_timeout)
+
+        if metadata and parser.parse(metadata['expiry_time']) > min_expiry:
+            logger.debug('Loaded shared credentials for {}'.format(role_arn))
+            return metadata
+
+    def __refresh(self, role_arn, get_sts_client, shared):
+        self.refreshes += 1
+        logger.debug('Refreshing credentials for {}'.format(role_arn))
+
+        return self.__assume_role(role_arn, get_sts_client, shared)
+
+    def __assume_role(self, role_arn, get_sts_client, shared):
+        role = get_sts_client().assume_role(
+            RoleArn=role_arn,
+            RoleSessionName='inquisitor'
+        )
+        metadata = {
+            'access_key': role['Credentials']['AccessKeyId'],
+            'secret_key': role['Credentials']['SecretAccessKey'],
+            'token': role['Credentials']['SessionToken'],
+            'expiry_time': role['Credentials']['Expiration'].isoformat()
+        }
+
+        if shared and self.store:
+            try:
+                self.store.set(role_arn, metadata)
+
+            except OSError:
+                logger.exception('Failed updating shared credential store {}'.format(self.store.path))
+
+        return metadata
+
+    def __get_sts_client(self):
+        session = get_local_aws_session()
+        if session.get_credentials().method in ['iam-role', 'env', 'explicit']:
+            return session.client('sts')
+
+        # If we are not running on an EC2 instance, assume the instance role first, then assume the remote role. The
+        # instance role credentials are cached like any other role, but never shared with other processes
+        credentials = self.__get_credentials(
+            app_config.aws_api.instance_role_arn,
+            lambda: get_local_aws_session().client('sts'),
+            shared=False
+        )
+
+        return self.__get_session(credentials).client('sts')
+
+    @staticmethod
+    def __get_session(credentials):
+        session = botocore.session.get_session()
+        session._credentials = credentials
+
+        return boto3.session.Session(botocore_session=session)
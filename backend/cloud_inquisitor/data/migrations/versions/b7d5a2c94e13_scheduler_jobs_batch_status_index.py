@@ -0,0 +1,21 @@
+"""Add batch_id and status index to scheduler_jobs
+
+Revision ID: b7d5a2c94e13
+Revises: 3fca8951cd76
+Create Date: 2026-10-17 10:42:18.503216
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = 'b7d5a2c94e13'
+down_revision = '3fca8951cd76'
+
+
+def upgrade():
+    op.create_index('ix_scheduler_jobs_batch_id_status', 'scheduler_jobs', ['batch_id', 'status'], unique=False)
+
+
+def downgrade():
+    op.drop_index('ix_scheduler_jobs_batch_id_status', table_name='scheduler_jobs')
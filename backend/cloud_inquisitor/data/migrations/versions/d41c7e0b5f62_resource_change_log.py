@@ -0,0 +1,38 @@
+"""Add resource change log tables
+
+Revision ID: d41c7e0b5f62
+Revises: b7d5a2c94e13
+Create Date: 2026-10-17 15:08:37.114529
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import mysql
+
+
+# revision identifiers, used by Alembic.
+revision = 'd41c7e0b5f62'
+down_revision = 'b7d5a2c94e13'
+
+
+def upgrade():
+    op.create_table(
+        'resource_changes',
+        sa.Column('change_id', mysql.BIGINT(unsigned=True), nullable=False, autoincrement=True),
+        sa.Column('resource_id', sa.String(length=256), nullable=False),
+        sa.Column('created', sa.DateTime(), nullable=False),
+        sa.PrimaryKeyConstraint('change_id')
+    )
+    op.create_table(
+        'resource_change_watermarks',
+        sa.Column('consumer', sa.String(length=64), nullable=False),
+        sa.Column('change_id', mysql.BIGINT(unsigned=True), nullable=False),
+        sa.Column('full_audit', sa.DateTime(), nullable=False),
+        sa.Column('state', sa.String(length=64), nullable=False),
+        sa.PrimaryKeyConstraint('consumer')
+    )
+
+
+def downgrade():
+    op.drop_table('resource_change_watermarks')
+    op.drop_table('resource_changes')
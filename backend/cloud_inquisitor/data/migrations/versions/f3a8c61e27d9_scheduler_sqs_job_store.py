@@ -0,0 +1,31 @@
+"""Add persistent job store table of the SQS scheduler
+
+Revision ID: f3a8c61e27d9
+Revises: d41c7e0b5f62
+Create Date: 2026-10-17 17:42:05.318826
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'f3a8c61e27d9'
+down_revision = 'd41c7e0b5f62'
+
+
+def upgrade():
+    # Table layout used by the APScheduler SQLAlchemyJobStore
+    op.create_table(
+        'scheduler_sqs_jobs',
+        sa.Column('id', sa.Unicode(length=191), nullable=False),
+        sa.Column('next_run_time', sa.Float(precision=25), nullable=True),
+        sa.Column('job_state', sa.LargeBinary(), nullable=False),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_scheduler_sqs_jobs_next_run_time', 'scheduler_sqs_jobs', ['next_run_time'], unique=False)
+
+
+def downgrade():
+    op.drop_index('ix_scheduler_sqs_jobs_next_run_time', table_name='scheduler_sqs_jobs')
+    op.drop_table('scheduler_sqs_jobs')
@@ -1,3 +1,6 @@
+import threading
+
+from sqlalchemy import event
 from sqlservice import SQLClient, declarative_base
 
 from cloud_inquisitor import app_config
@@ -13,4 +16,37 @@ def get_db_connection():
     }, model_class=Model)
 
 
+class QueryCounter(object):
+    """Context manager counting the number of SQL statements issued by the current thread while the context is active.
+    Used to instrument code paths and to catch N+1 query regressions in tests
+
+    Example::
+
+        with QueryCounter() as counter:
+            instances = EC2Instance.get_all()
+
+        log.debug('Loaded {} instances using {} queries'.format(len(instances), counter.count))
+
+    Attributes:
+        count (`int`): Number of statements executed
+    """
+    def __init__(self, engine=None):
+        self.engine = engine or db.engine
+        self.count = 0
+        self.__thread_id = None
+
+    def __enter__(self):
+        self.__thread_id = threading.get_ident()
+        event.listen(self.engine, 'before_cursor_execute', self.__count_query)
+
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        event.remove(self.engine, 'before_cursor_execute', self.__count_query)
+
+    def __count_query(self, *args):
+        if threading.get_ident() == self.__thread_id:
+            self.count += 1
+
+
 db = get_db_connection()
@@ -12,7 +12,10 @@ from pkg_resources import EntryPoint
 from cloud_inquisitor import CINQ_PLUGINS
 from cloud_inquisitor.config import dbconfig
 from cloud_inquisitor.constants import HTTP, UNAUTH_MESSAGE
+from cloud_inquisitor.database import db
+from cloud_inquisitor.exceptions import SchedulerError
 from cloud_inquisitor.json_utils import InquisitorJSONEncoder
+from cloud_inquisitor.schema import Account, Resource as ResourceModel
 
 Worker = namedtuple('Worker', ('name', 'interval', 'entry_point'))
 
@@ -38,11 +41,25 @@ class BasePlugin(object):
 
 class BaseAuditor(BasePlugin, ABC):
     start_delay = 30
+    # Resource types the auditor consumes, used by dependency aware scheduling
+    consumes = ()
+    # Queue priority of the auditor jobs, higher priority jobs are sent to the workers first
+    priority = 0
 
     @classmethod
     def enabled(cls):
         return dbconfig.get('enabled', cls.ns, False)
 
+    @classmethod
+    def get_consumed_types(cls):
+        """Returns the resource types the auditor consumes. Defaults to the resource types in `consumes`, auditors with
+        configurable resource types override this to read their configuration
+
+        Returns:
+            `set` of `str`
+        """
+        return set(cls.consumes)
+
     @property
     @abstractmethod
     def ns(self):
@@ -107,6 +124,11 @@ class BaseAuthPlugin(BasePlugin, ABC):
 
 
 class BaseCollector(BasePlugin, ABC):
+    # Resource types the collector produces, used by dependency aware scheduling
+    produces = ()
+    # Queue priority of the collector jobs, higher priority jobs are sent to the workers first
+    priority = 0
+
     @classmethod
     def enabled(cls):
         return dbconfig.get('enabled', cls.ns, False)
@@ -143,15 +165,59 @@ class BaseNotifier(BasePlugin, ABC):
 
 
 class BaseScheduler(BasePlugin, ABC):
+    supports_runtime = False
+
     def __init__(self):
         super().__init__()
 
         self.auditors = []
         self.collectors = {}
+        self.job_priorities = {}
+        self.produced_types = {}
+        self.consumed_types = {}
 
     def get_class_from_ep(self, entry_point):
         return EntryPoint(**entry_point).resolve()
 
+    def get_active_regions(self):
+        """Returns the regions each account has resources in, as discovered by previous collector runs
+
+        Returns:
+            `dict` of `str`: `set` of `str`
+        """
+        qry = db.session.query(
+            Account.account_name,
+            ResourceModel.location
+        ).join(
+            ResourceModel, ResourceModel.account_id == Account.account_id
+        ).group_by(
+            Account.account_name, ResourceModel.location
+        )
+
+        active_regions = {}
+        for account_name, location in qry:
+            active_regions.setdefault(account_name, set()).add(location)
+
+        return active_regions
+
+    def get_region_interval(self, worker, account_name, region, active_regions):
+        """Returns the interval, in minutes, to run a region collector at. Regions where the account did not have any
+        resources in previous runs are run less frequently, if the `empty_region_interval_multiplier` option is set
+
+        Args:
+            worker (:obj:`Worker`): Region collector worker
+            account_name (`str`): Name of the account
+            region (`str`): Name of the region
+            active_regions (`dict`): Active regions per account, as returned by :meth:`get_active_regions`
+
+        Returns:
+            `int`
+        """
+        if region in active_regions.get(account_name, ()):
+            return worker.interval
+
+        return worker.interval * max(dbconfig.get('empty_region_interval_multiplier', default=1), 1)
+
     def load_plugins(self):
         """Refresh the list of available collectors and auditors
 
@@ -162,6 +228,8 @@ class BaseScheduler(BasePlugin, ABC):
             cls = entry_point.load()
             if cls.enabled():
                 self.log.debug('Collector loaded: {} in module {}'.format(cls.__name__, cls.__module__))
+                self.job_priorities[entry_point.name] = cls.priority
+                self.produced_types[entry_point.name] = set(cls.produces)
                 self.collectors.setdefault(cls.type, []).append(Worker(
                     cls.name,
                     cls.interval,
@@ -178,6 +246,8 @@ class BaseScheduler(BasePlugin, ABC):
             cls = entry_point.load()
             if cls.enabled():
                 self.log.debug('Auditor loaded: {} in module {}'.format(cls.__name__, cls.__module__))
+                self.job_priorities[entry_point.name] = cls.priority
+                self.consumed_types[entry_point.name] = cls.get_consumed_types()
                 self.auditors.append(Worker(
                     cls.name,
                     cls.interval,
@@ -198,6 +268,33 @@ class BaseScheduler(BasePlugin, ABC):
 
         self.log.info('Scheduler loaded {} collectors and {} auditors'.format(collector_count, auditor_count))
 
+    def get_job_priority(self, entry_point):
+        """Returns the queue priority of the jobs for a collector or auditor
+
+        Args:
+            entry_point (`dict`): Entry point of the collector or auditor
+
+        Returns:
+            `int`
+        """
+        return self.job_priorities.get(entry_point['name'], 0)
+
+    def get_job_dependencies(self, entry_point):
+        """Returns the entry point names of the collectors producing any of the resource types consumed by an auditor.
+        Collectors and auditors without declared resource types have no dependencies
+
+        Args:
+            entry_point (`dict`): Entry point of the auditor
+
+        Returns:
+            `set` of `str`
+        """
+        consumed = self.consumed_types.get(entry_point['name'])
+        if not consumed:
+            return set()
+
+        return {name for name, produced in self.produced_types.items() if produced & consumed}
+
     @abstractmethod
     def execute_scheduler(self):
         """Entry point to execute the scheduler
@@ -211,7 +308,30 @@ class BaseScheduler(BasePlugin, ABC):
 
         Each execution of the worker thread should handle a single request from the scheduler and exit, to allow for
         manual/stepped execution of the jobs. The command line worker utility will handle running schedulers in daemon
-        mode, unless the user explicitly requests single a execution"""
+        mode, unless the user explicitly requests single a execution. In daemon mode, the worker is called again
+        immediately if it returns `True`, otherwise after the delay configured for the worker utility"""
+
+    def get_worker_job(self):
+        """Retrieve the next job for the worker, without executing it. Used by the asyncio worker runtime, which
+        executes the jobs itself to run multiple jobs concurrently. Must be implemented by schedulers setting
+        `supports_runtime`
+
+        Returns:
+            `tuple` of (`str`, `object`): Type and data of the job, or `None` if there are no pending jobs
+        """
+        raise SchedulerError('{} does not support the asyncio worker runtime'.format(self.name))
+
+    def run_worker_job(self, job):
+        """Execute a job retrieved with :meth:`get_worker_job`. Must be implemented by schedulers setting
+        `supports_runtime`
+
+        Args:
+            job (`object`): Job data, as returned by :meth:`get_worker_job`
+
+        Returns:
+            `bool`: `True` if the job completed successfully
+        """
+        raise SchedulerError('{} does not support the asyncio worker runtime'.format(self.name))
 
 
 class BaseView(BasePlugin, Resource):
@@ -7,6 +7,7 @@ from cloud_inquisitor import CINQ_PLUGINS
 from cloud_inquisitor.config import dbconfig
 from cloud_inquisitor.constants import NS_SCHEDULER
 from cloud_inquisitor.plugins.commands import BaseCommand
+from cloud_inquisitor.runtime import AsyncWorkerRuntime
 
 
 class BaseSchedulerCommand(BaseCommand):
@@ -86,9 +87,18 @@ class Worker(BaseSchedulerCommand):
         Option('--no-daemon', default=False, action='store_true',
                help='Do not execute in daemon mode (if supported). Execution stops as soon as the worker returns'),
         Option('--delay', default=10, type=int,
-               help='Delay between executions in daemon mode, in seconds. Default: 10'),
+               help='Delay between executions in daemon mode when the worker has to wait before polling for new jobs, '
+                    'in seconds. Default: 10'),
         Option('--threads', default=5, type=int,
                help='Number of worker threads to spawn. --no-daemon only uses a single thread. Default: 5'),
+        Option('--asyncio', dest='use_asyncio', default=False, action='store_true',
+               help='Run jobs concurrently from an asyncio event loop instead of worker threads, if supported by the '
+                    'scheduler'),
+        Option('--concurrency', default=50, type=int,
+               help='Maximum number of jobs running at the same time with --asyncio. Default: 50'),
+        Option('--job-concurrency', dest='job_concurrency', metavar='job_type=limit', default=[], action='append',
+               help='Maximum number of jobs of a single type running at the same time with --asyncio, eg. '
+                    'collector_aws_region=20. Can be used multiple times'),
     ]
 
     def run(self, **kwargs):
@@ -100,7 +110,34 @@ class Worker(BaseSchedulerCommand):
         super().run(**kwargs)
         scheduler = self.scheduler_plugins[self.active_scheduler]()
 
-        if not kwargs['no_daemon']:
+        if kwargs['use_asyncio'] and not kwargs['no_daemon']:
+            if not scheduler.supports_runtime:
+                self.log.error('The {} does not support the asyncio worker runtime'.format(scheduler.name))
+                return
+
+            job_concurrency = {}
+            for value in kwargs['job_concurrency']:
+                job_type, _, limit = value.partition('=')
+                if not limit.isdigit():
+                    self.log.error('Invalid job concurrency {}, expected job_type=limit'.format(value))
+                    return
+
+                job_concurrency[job_type] = int(limit)
+
+            self.log.info('Starting {} worker running up to {} concurrent jobs'.format(
+                scheduler.name,
+                kwargs['concurrency']
+            ))
+
+            runtime = AsyncWorkerRuntime(
+                scheduler,
+                kwargs['concurrency'],
+                job_concurrency,
+                delay=kwargs['delay']
+            )
+            runtime.run()
+
+        elif not kwargs['no_daemon']:
             self.log.info('Starting {} worker with {} threads checking for new messages every {} seconds'.format(
                 scheduler.name,
                 kwargs['threads'],
@@ -121,5 +158,7 @@ class Worker(BaseSchedulerCommand):
 
     def execute_worker_thread(self, func, delay):
         while True:
-            func()
-            time.sleep(delay)
+            # Workers returning a truthy value are waiting for new jobs themselves (eg. long polling), and are called
+            # again immediately
+            if not func():
+                time.sleep(delay)
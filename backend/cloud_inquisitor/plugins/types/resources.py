@@ -1,27 +1,79 @@
+import hashlib
+import json
 import logging
 import re
 from abc import abstractmethod, ABC
-from contextlib import suppress
+from collections import namedtuple
 from datetime import datetime, timedelta
 
-from botocore.exceptions import ClientError
 from flask import session
-from sqlalchemy import func, or_, and_, cast, DATETIME
+from sqlalchemy import event, func, or_, and_, cast, DATETIME
+from sqlalchemy.dialects.mysql import insert as mysql_insert
 from sqlalchemy.exc import SQLAlchemyError
-from sqlalchemy.orm import aliased
+from sqlalchemy.orm import aliased, selectinload, subqueryload, Session
 
+from cloud_inquisitor.config import dbconfig
 from cloud_inquisitor.constants import RGX_EMAIL_VALIDATION_PATTERN
-from cloud_inquisitor.database import db
+from cloud_inquisitor.database import db, QueryCounter
 from cloud_inquisitor.exceptions import ResourceException
-from cloud_inquisitor.schema import Tag, Account, Resource, ResourceType, ResourceProperty
+from cloud_inquisitor.schema import (
+    Tag, Account, Resource, ResourceType, ResourceProperty, ResourceMapping, ResourceChange
+)
 from cloud_inquisitor.utils import (
     to_utc_date,
     is_truthy,
     to_camelcase,
     NotificationContact,
-    parse_date
+    parse_date,
+    chunks
 )
 
+# Properties storing the fingerprints used for incremental synchronization, which are not part of the public
+# representation of a resource
+INTERNAL_PROPERTIES = ('sync_digest', 'record_digest')
+
+LOAD_STRATEGIES = {
+    'select': None,
+    'selectin': selectinload,
+    'subquery': subqueryload
+}
+
+
+def record_resource_changes(resource_ids, connection=None):
+    """Record resources as created, updated or deleted in the resource change log. Does nothing unless the
+    `resource_change_log` option is enabled. The transaction is not committed
+
+    Args:
+        resource_ids (`iterable` of `str`): IDs of the changed resources
+        connection: Connection to execute the inserts with. Default: `None`, use the current session
+
+    Returns:
+        `None`
+    """
+    if not dbconfig.get('resource_change_log', default=False):
+        return
+
+    now = datetime.now()
+    rows = [{'resource_id': resource_id, 'created': now} for resource_id in set(resource_ids)]
+    for batch in chunks(rows, 1000):
+        (connection or db.session).execute(ResourceChange.__table__.insert(), batch)
+
+
+@event.listens_for(Session, 'after_flush')
+def _record_flushed_changes(session, flush_context):
+    """Record the resources whose tags or properties were changed through the ORM, as done by the `create`, `update`
+    and `set_*` methods of the resource types, in the resource change log"""
+    resource_ids = set()
+    for obj in list(session.new) + list(session.dirty) + list(session.deleted):
+        if not isinstance(obj, (Resource, Tag, ResourceProperty)):
+            continue
+
+        if obj not in session.dirty or session.is_modified(obj):
+            resource_ids.add(obj.resource_id)
+
+    if resource_ids:
+        record_resource_changes(resource_ids, session.connection())
+
 
 class BaseResource(ABC):
     """Base type object for resource objects"""
@@ -29,6 +81,9 @@ class BaseResource(ABC):
     def __init__(self, resource):
         self.resource = resource
         self.log = logging.getLogger(self.__class__.__module__)
+        self._property_index = None
+        self._tag_index = None
+        self._tag_index_lower = None
 
     def __getattr__(self, item):
         return self.get_property(item)
@@ -184,35 +239,53 @@ class BaseResource(ABC):
             return cls(res)
 
     @classmethod
-    def get_all(cls, account=None, location=None, include_disabled=False):
+    def get_all(cls, account=None, location=None, include_disabled=False, *, load_strategy='selectin',
+                load_relations=False, resource_ids=None):
         """Returns a list of all resources for a given account, location and resource type.
 
+        By default the tags and properties of the resources are loaded using a fixed number of queries (`selectin`),
+        instead of lazy-loading them for each resource on first access.
+
         Attributes:
             account (:obj:`Account`): Account owning the resources
             location (`str`): Location of the resources to return (region)
             include_disabled (`bool`): Include resources from disabled accounts (default: False)
+            load_strategy (`str`): Loading strategy for tags and properties, one of `select` (lazy), `selectin` or
+            `subquery`. Default: `selectin`
+            load_relations (`bool`): Also load the children and parents of the resources using `load_strategy`.
+            Default: False
+            resource_ids (`list` of `str`): Only return the resources with these IDs. Default: `None`, all resources
 
         Returns:
             list of resource objects
         """
-        qry = db.Resource.filter(
-            Resource.resource_type_id == ResourceType.get(cls.resource_type).resource_type_id
-        )
+        with QueryCounter() as counter:
+            qry = db.Resource.filter(
+                Resource.resource_type_id == ResourceType.get(cls.resource_type).resource_type_id
+            )
 
-        if account:
-            qry = qry.filter(Resource.account_id == account.account_id)
+            if account:
+                qry = qry.filter(Resource.account_id == account.account_id)
 
-        if not include_disabled:
-            qry = qry.join(Account, Resource.account_id == Account.account_id).filter(Account.enabled == 1)
+            if not include_disabled:
+                qry = qry.join(Account, Resource.account_id == Account.account_id).filter(Account.enabled == 1)
+
+            if location:
+                qry = qry.filter(Resource.location == location)
+
+            if resource_ids is not None:
+                qry = qry.filter(Resource.resource_id.in_(resource_ids))
 
-        if location:
-            qry = qry.filter(Resource.location == location)
+            qry = qry.options(*cls._get_load_options(load_strategy, load_relations))
+            resources = {res.resource_id: cls(res) for res in qry.all()}
 
-        return {res.resource_id: cls(res) for res in qry.all()}
+        cls._log_query_count('get_all', len(resources), counter.count)
+        return resources
 
     @classmethod
     def search(cls, *, limit=100, page=1, accounts=None, locations=None, resources=None,
-               properties=None, include_disabled=False, return_query=False):
+               properties=None, include_disabled=False, return_query=False, load_strategy='select',
+               load_relations=False):
         """Search for resources based on the provided filters. If `return_query` a sub-class of `sqlalchemy.orm.Query`
         is returned instead of the resource list.
 
@@ -228,6 +301,10 @@ class BaseResource(ABC):
             return_query (`bool`): Returns the query object prior to adding the limit and offset functions. Allows for
             sub-classes to amend the search feature with extra conditions. The calling function must handle pagination
             on its own
+            load_strategy (`str`): Loading strategy for tags and properties, one of `select` (lazy), `selectin` or
+            `subquery`. Default: `select`
+            load_relations (`bool`): Also load the children and parents of the resources using `load_strategy`.
+            Default: False
 
         Returns:
             `list` of `Resource`, `sqlalchemy.orm.Query`
@@ -276,6 +353,8 @@ class BaseResource(ABC):
                         ).self_group()
                     )
 
+        qry = qry.options(*cls._get_load_options(load_strategy, load_relations))
+
         if return_query:
             return qry
 
@@ -285,6 +364,48 @@ class BaseResource(ABC):
 
         return total, [cls(x) for x in qry.all()]
 
+    @staticmethod
+    def _get_load_options(load_strategy, load_relations):
+        """Returns the query options required to load the tags and properties (and optionally the children and
+        parents) of resources with the requested loading strategy
+
+        Args:
+            load_strategy (`str`): One of `select`, `selectin` or `subquery`
+            load_relations (`bool`): Include the children and parents of the resources
+
+        Returns:
+            `list` of loader options
+        """
+        if load_strategy not in LOAD_STRATEGIES:
+            raise ValueError('Invalid load strategy {}, must be one of {}'.format(
+                load_strategy,
+                ', '.join(LOAD_STRATEGIES)
+            ))
+
+        if load_strategy == 'select':
+            return []
+
+        loader = LOAD_STRATEGIES[load_strategy]
+        options = [loader('tags'), loader('properties')]
+        if load_relations:
+            for relation in ('children', 'parents'):
+                options += [
+                    loader(relation),
+                    loader('{}.tags'.format(relation)),
+                    loader('{}.properties'.format(relation))
+                ]
+
+        return options
+
+    @classmethod
+    def _log_query_count(cls, method, resource_count, query_count):
+        logging.getLogger(cls.__module__).debug('{}.{} loaded {} resources using {} queries'.format(
+            cls.__name__,
+            method,
+            resource_count,
+            query_count
+        ))
+
     # endregion
 
     # region Instance methods
@@ -317,11 +438,11 @@ class BaseResource(ABC):
         Returns:
             `ResourceProperty`
         """
-        for prop in self.resource.properties:
-            if prop.name == name:
-                return prop
+        prop = self._get_property_index().get(name)
+        if prop is None:
+            raise AttributeError(name)
 
-        raise AttributeError(name)
+        return prop
 
     def set_property(self, name, value, update_session=True):
         """Create or set the value of a property. Returns `True` if the property was created or updated, or `False` if
@@ -352,6 +473,8 @@ class BaseResource(ABC):
             prop.resource_id = self.id
             prop.name = name
             prop.value = value
+            self.properties.append(prop)
+            self._property_index[name] = prop
 
         if update_session:
             db.session.add(prop)
@@ -371,8 +494,9 @@ class BaseResource(ABC):
         """
         try:
             self.log.debug('Removing property {} from {}'.format(name, self.id))
-            prop = getattr(self, name)
+            prop = self.get_property(name)
             self.properties.remove(prop)
+            del self._property_index[name]
 
             if update_session:
                 db.session.delete(prop)
@@ -391,15 +515,15 @@ class BaseResource(ABC):
         Returns:
             `Tag`,`None`
         """
-        key = key if case_sensitive else key.lower()
-        for tag in self.resource.tags:
-            if not case_sensitive:
-                if tag.key.lower() == key:
-                    return tag
-            elif key == tag.key:
-                return tag
+        if case_sensitive:
+            return self._get_tag_index().get(key)
 
-        return None
+        if self._tag_index_lower is None:
+            self._tag_index_lower = {}
+            for tag in self._get_tag_index().values():
+                self._tag_index_lower.setdefault(tag.key.lower(), tag)
+
+        return self._tag_index_lower.get(key.lower())
 
     def set_tag(self, key, value, update_session=True):
         """Create or set the value of the tag with `key` to `value`. Returns `True` if the tag was created or updated or
@@ -413,7 +537,7 @@ class BaseResource(ABC):
         Returns:
             `bool`
         """
-        existing_tags = {x.key: x for x in self.tags}
+        existing_tags = self._get_tag_index()
         if key in existing_tags:
             tag = existing_tags[key]
 
@@ -427,6 +551,8 @@ class BaseResource(ABC):
             tag.key = key
             tag.value = value
             self.tags.append(tag)
+            existing_tags[key] = tag
+            self._tag_index_lower = None
 
         if update_session:
             db.session.add(tag)
@@ -443,16 +569,41 @@ class BaseResource(ABC):
         Returns:
 
         """
-        existing_tags = {x.key: x for x in self.tags}
+        existing_tags = self._get_tag_index()
         if key in existing_tags:
             if update_session:
                 db.session.delete(existing_tags[key])
 
-            self.tags.remove(existing_tags[key])
+            self.tags.remove(existing_tags.pop(key))
+            self._tag_index_lower = None
             return True
 
         return False
 
+    def _get_property_index(self):
+        """Returns a `dict` mapping property names to :obj:`ResourceProperty` objects. The index is built on first
+        access and kept up to date by `set_property` and `delete_property`
+
+        Returns:
+            `dict` of `str`: :obj:`ResourceProperty`
+        """
+        if self._property_index is None:
+            self._property_index = {prop.name: prop for prop in self.resource.properties}
+
+        return self._property_index
+
+    def _get_tag_index(self):
+        """Returns a `dict` mapping tag keys to :obj:`Tag` objects. The index is built on first access and kept up to
+        date by `set_tag` and `delete_tag`
+
+        Returns:
+            `dict` of `str`: :obj:`Tag`
+        """
+        if self._tag_index is None:
+            self._tag_index = {tag.key: tag for tag in self.resource.tags}
+
+        return self._tag_index
+
     def save(self, *, auto_commit=False):
         """Save the resource to the database
 
@@ -488,7 +639,8 @@ class BaseResource(ABC):
             db.session.rollback()
 
     def to_json(self):
-        """Return a `dict` representation of the resource, including all properties and tags
+        """Return a `dict` representation of the resource, including all properties except the
+        `INTERNAL_PROPERTIES`, and tags
 
         Returns:
             `dict`
@@ -499,12 +651,445 @@ class BaseResource(ABC):
             'accountId': self.resource.account_id,
             'account': self.account,
             'location': self.resource.location,
-            'properties': {to_camelcase(prop.name): prop.value for prop in self.resource.properties},
+            'properties': {
+                to_camelcase(prop.name): prop.value
+                for prop in self.resource.properties if prop.name not in INTERNAL_PROPERTIES
+            },
             'tags': [{'key': t.key, 'value': t.value} for t in self.resource.tags]
         }
     # endregion
 
 
+ResourceSyncResult = namedtuple('ResourceSyncResult', ('inserted', 'updated', 'deleted', 'unchanged'))
+
+
+class ResourceSync(object):
+    """Bulk synchronization engine for resource types.
+
+    Instead of loading every resource as an ORM object and calling `update()`, `create()` and `db.session.delete()`
+    one object at a time, the engine loads a lightweight snapshot of the resources, tags and properties currently in
+    the database, computes the inserted, changed and deleted sets in memory and writes the changes with batched
+    multi-row ``INSERT ... ON DUPLICATE KEY UPDATE`` and ``DELETE ... WHERE ... IN (...)`` statements.
+
+    The data passed to :meth:`sync` is a `dict` keyed by resource id, where each value is a `dict` with the keys
+    ``properties`` and ``tags``, for example::
+
+        {
+            'snap-0123456789abcdef0': {
+                'properties': {'state': 'completed', 'volume_size': 8},
+                'tags': {'Name': 'my-snapshot'}
+            }
+        }
+
+    Properties follow the semantics of :meth:`BaseResource.set_property`, properties that are not present in the API
+    data are left untouched. Tags follow the semantics of the `update()` methods of the resource types, meaning tags
+    not present in the API data are removed from the resource.
+
+    If `digest_property` is set, a fingerprint of the properties and tags of each resource is stored in the property
+    with that name. On the next sync only the stored fingerprints are loaded from the database, and resources with a
+    matching fingerprint are skipped without loading their properties and tags. As a consequence, changes made to
+    those properties outside of the sync are not reverted until the API data for the resource changes.
+
+    Attributes:
+        resource_class (`BaseResource`): Resource type to synchronize
+        account (:obj:`Account`): Account owning the resources
+        location (`str`): Location of the resources. If `None`, the resources are synced for all locations
+        batch_size (`int`): Maximum number of rows per INSERT or DELETE statement
+        create_only_properties (`tuple` of `str`): Names of properties that are only written when a resource is created
+        digest_property (`str`): Name of the property storing the fingerprint of the resource. Default: `None`
+    """
+
+    def __init__(self, resource_class, account, location=None, *, batch_size=500, create_only_properties=(),
+                 digest_property=None):
+        self.resource_class = resource_class
+        self.account = account
+        self.location = location
+        self.batch_size = batch_size
+        self.create_only_properties = create_only_properties
+        self.digest_property = digest_property
+        self.log = logging.getLogger(self.__class__.__module__)
+
+    def load(self, resource_ids=None):
+        """Returns a snapshot of the resources currently stored in the database. Each resource is represented as a
+        `dict` containing the ``properties`` and ``tags`` of the resource, mapping the name of the property or tag to a
+        tuple of the row id and value
+
+        Args:
+            resource_ids (`list` of `str`): Only load the resources with these ids. Default: load all resources
+
+        Returns:
+            `dict` of `str`: `dict`
+        """
+        existing = {}
+        for batch in [None] if resource_ids is None else chunks(list(resource_ids), self.batch_size):
+            resource_filter = self._get_resource_filter()
+            if batch is not None:
+                resource_filter.append(Resource.resource_id.in_(batch))
+
+            existing.update({
+                resource_id: {'properties': {}, 'tags': {}}
+                for resource_id, in db.session.query(Resource.resource_id).filter(*resource_filter)
+            })
+            self._load_rows(existing, resource_filter)
+
+        return existing
+
+    def load_digests(self):
+        """Returns the stored fingerprint of all resources in the database, or `None` for resources without one
+
+        Returns:
+            `dict` of `str`: `str`
+        """
+        qry = db.session.query(
+            Resource.resource_id,
+            ResourceProperty.value
+        ).outerjoin(
+            ResourceProperty,
+            and_(
+                ResourceProperty.resource_id == Resource.resource_id,
+                ResourceProperty.name == self.digest_property
+            )
+        ).filter(*self._get_resource_filter())
+
+        return {resource_id: digest for resource_id, digest in qry}
+
+    def get_digest(self, data):
+        """Returns the fingerprint of the API data for a resource. Create-only properties are not included, as they
+        never cause an update
+
+        Args:
+            data (`dict`): API data for a single resource
+
+        Returns:
+            `str`
+        """
+        payload = {
+            'properties': {
+                name: value for name, value in data.get('properties', {}).items()
+                if name not in self.create_only_properties and name != self.digest_property
+            },
+            'tags': data.get('tags', {})
+        }
+
+        return hashlib.sha256(json.dumps(payload, sort_keys=True, default=str).encode('utf-8')).hexdigest()
+
+    def diff(self, api_resources, existing):
+        """Compute the changes required to bring the database in line with the API data
+
+        Args:
+            api_resources (`dict`): Resources as returned by the API, see class documentation for the format
+            existing (`dict`): Resources currently in the database, as returned by :meth:`load`
+
+        Returns:
+            `tuple` of (`set`, `set`, `set`): The ids of the inserted, changed and deleted resources
+        """
+        api_ids = set(api_resources)
+        existing_ids = set(existing)
+
+        changed = {
+            resource_id for resource_id in api_ids & existing_ids
+            if self._get_property_rows(resource_id, api_resources[resource_id], existing[resource_id])
+            or self._get_tag_rows(resource_id, api_resources[resource_id], existing[resource_id])
+            or self._get_deleted_tags(api_resources[resource_id], existing[resource_id])
+        }
+
+        return api_ids - existing_ids, changed, existing_ids - api_ids
+
+    def sync(self, api_resources, *, existing=None, delete=True, auto_commit=True):
+        """Synchronize the database with the API data in bulk.
+
+        Args:
+            api_resources (`dict`): Resources as returned by the API, see class documentation for the format
+            existing (`dict`): Optional pre-loaded database snapshot. If not provided, :meth:`load` will be called
+            delete (`bool`): Remove resources from the database that are not present in `api_resources`. Default: True
+            auto_commit (`bool`): Automatically commit the transaction. Default: True
+
+        Returns:
+            :obj:`ResourceSyncResult`
+        """
+        unchanged = set()
+        if self.digest_property:
+            api_resources = {
+                resource_id: {
+                    'properties': dict(data.get('properties', {}), **{self.digest_property: self.get_digest(data)}),
+                    'tags': data.get('tags', {})
+                } for resource_id, data in api_resources.items()
+            }
+
+            if existing is None:
+                existing, unchanged = self._load_changed(api_resources)
+                api_resources = {k: v for k, v in api_resources.items() if k not in unchanged}
+
+        if existing is None:
+            existing = self.load()
+
+        inserted, changed, deleted = self.diff(api_resources, existing)
+        unchanged |= (set(api_resources) & set(existing)) - changed
+        if not delete:
+            deleted = set()
+
+        resource_rows = []
+        property_rows = []
+        tag_rows = []
+        deleted_tags = []
+        resource_type_id = ResourceType.get(self.resource_class.resource_type).resource_type_id
+
+        for resource_id in inserted:
+            data = api_resources[resource_id]
+            resource_rows.append({
+                'resource_id': resource_id,
+                'account_id': self.account.account_id,
+                'location': self.location,
+                'resource_type_id': resource_type_id
+            })
+            property_rows += self._get_property_rows(resource_id, data, None)
+            tag_rows += self._get_tag_rows(resource_id, data, None)
+
+        for resource_id in changed:
+            data = api_resources[resource_id]
+            property_rows += self._get_property_rows(resource_id, data, existing[resource_id])
+            tag_rows += self._get_tag_rows(resource_id, data, existing[resource_id])
+            deleted_tags += self._get_deleted_tags(data, existing[resource_id])
+
+        try:
+            self._upsert(Resource, resource_rows, ('account_id', 'location', 'resource_type_id'))
+            self._upsert(ResourceProperty, property_rows, ('value',))
+            self._upsert(Tag, tag_rows, ('value',))
+            self._delete(Tag.tag_id, deleted_tags)
+            self._delete(Resource.resource_id, deleted)
+            record_resource_changes(inserted | changed | deleted)
+
+            if auto_commit:
+                db.session.commit()
+
+        except SQLAlchemyError:
+            self.log.exception('Failed synchronizing {} for {}/{}'.format(
+                self.resource_class.resource_name,
+                self.account.account_name,
+                self.location
+            ))
+            db.session.rollback()
+            raise
+
+        return ResourceSyncResult(inserted, changed, deleted, unchanged)
+
+    def sync_stream(self, pages, *, delete=True, auto_commit=True):
+        """Synchronize the database with API data delivered in pages, keeping memory usage bounded by the page size
+        instead of the total number of resources. Each page is synchronized against the database rows for the
+        resources in the page only, and committed separately if `auto_commit` is enabled. Once all pages have been
+        processed, the resources in the database are walked in batches ordered by resource id, deleting the resources
+        that were not seen in any page
+
+        Args:
+            pages (`iterable` of `dict`): Pages of resources as returned by the API, see class documentation for format
+            delete (`bool`): Remove resources from the database that are not present in any page. Default: True
+            auto_commit (`bool`): Automatically commit the transaction after each page. Default: True
+
+        Returns:
+            :obj:`ResourceSyncResult`
+        """
+        inserted, changed, deleted, unchanged = set(), set(), set(), set()
+        seen = set()
+
+        for page in pages:
+            result = self.sync(page, existing=self.load(list(page)), delete=False, auto_commit=auto_commit)
+            inserted |= result.inserted
+            changed |= result.updated
+            unchanged |= result.unchanged
+            seen.update(page)
+
+        if delete:
+            for batch in self.iter_resource_ids():
+                removed = [resource_id for resource_id in batch if resource_id not in seen]
+                self._delete(Resource.resource_id, removed)
+                record_resource_changes(removed)
+                deleted.update(removed)
+
+            if auto_commit:
+                db.session.commit()
+
+        return ResourceSyncResult(inserted, changed, deleted, unchanged)
+
+    def delete(self, resource_ids):
+        """Delete resources in bulk. Properties, tags and parent / child mappings of the resources are removed by the
+        database through the foreign key cascades. The transaction is not committed
+
+        Args:
+            resource_ids (`iterable` of `str`): Ids of the resources to delete
+
+        Returns:
+            `None`
+        """
+        resource_ids = list(resource_ids)
+        self._delete(Resource.resource_id, resource_ids)
+        record_resource_changes(resource_ids)
+
+    def load_children(self, parent_ids):
+        """Returns the ids of the resources of this type mapped as children of the parent resources, in one query per
+        `batch_size` parents
+
+        Args:
+            parent_ids (`iterable` of `str`): Ids of the parent resources
+
+        Returns:
+            `dict` of `str`: `set`
+        """
+        children = {parent_id: set() for parent_id in parent_ids}
+        for batch in chunks(list(children), self.batch_size):
+            qry = db.session.query(
+                ResourceMapping.parent,
+                ResourceMapping.child
+            ).join(
+                Resource, Resource.resource_id == ResourceMapping.child
+            ).filter(
+                ResourceMapping.parent.in_(batch),
+                *self._get_resource_filter()
+            )
+
+            for parent_id, child_id in qry:
+                children[parent_id].add(child_id)
+
+        return children
+
+    def add_children(self, parent_id, child_ids):
+        """Map resources as children of a parent resource in bulk. The transaction is not committed
+
+        Args:
+            parent_id (`str`): Id of the parent resource
+            child_ids (`iterable` of `str`): Ids of the child resources
+
+        Returns:
+            `None`
+        """
+        rows = [{'parent': parent_id, 'child': child_id} for child_id in child_ids]
+        for batch in chunks(rows, self.batch_size):
+            db.session.execute(ResourceMapping.__table__.insert().values(batch))
+
+    def iter_resource_ids(self):
+        """Iterate over the ids of the resources in the database in batches of `batch_size`, using keyset pagination
+        on the resource id
+
+        Yields:
+            `list` of `str`
+        """
+        last_id = None
+        while True:
+            qry = db.session.query(Resource.resource_id).filter(*self._get_resource_filter())
+            if last_id is not None:
+                qry = qry.filter(Resource.resource_id > last_id)
+
+            batch = [resource_id for resource_id, in qry.order_by(Resource.resource_id).limit(self.batch_size)]
+            if not batch:
+                break
+
+            yield batch
+            last_id = batch[-1]
+
+    # region Internal methods
+    def _get_resource_filter(self):
+        resource_filter = [
+            Resource.resource_type_id == ResourceType.get(self.resource_class.resource_type).resource_type_id,
+            Resource.account_id == self.account.account_id
+        ]
+        if self.location:
+            resource_filter.append(Resource.location == self.location)
+
+        return resource_filter
+
+    def _load_rows(self, existing, resource_filter):
+        qry = db.session.query(
+            ResourceProperty.resource_id,
+            ResourceProperty.property_id,
+            ResourceProperty.name,
+            ResourceProperty.value
+        ).join(Resource, Resource.resource_id == ResourceProperty.resource_id).filter(*resource_filter)
+        for resource_id, property_id, name, value in qry:
+            existing[resource_id]['properties'][name] = (property_id, value)
+
+        qry = db.session.query(
+            Tag.resource_id,
+            Tag.tag_id,
+            Tag.key,
+            Tag.value
+        ).join(Resource, Resource.resource_id == Tag.resource_id).filter(*resource_filter)
+        for resource_id, tag_id, key, value in qry:
+            existing[resource_id]['tags'][key] = (tag_id, value)
+
+    def _load_changed(self, api_resources):
+        """Load the database snapshot for the resources whose stored fingerprint does not match the API data. Resources
+        that are no longer present in the API data are included without properties or tags, so they get deleted
+
+        Returns:
+            `tuple` of (`dict`, `set`): The database snapshot and the ids of the unchanged resources
+        """
+        digests = self.load_digests()
+        unchanged = {
+            resource_id for resource_id, digest in digests.items()
+            if resource_id in api_resources
+            and digest == api_resources[resource_id]['properties'][self.digest_property]
+        }
+
+        existing = self.load([resource_id for resource_id in digests if resource_id in api_resources and
+                              resource_id not in unchanged])
+        existing.update({
+            resource_id: {'properties': {}, 'tags': {}}
+            for resource_id in digests if resource_id not in api_resources
+        })
+
+        return existing, unchanged
+
+    def _get_property_rows(self, resource_id, data, existing):
+        rows = []
+        for name, value in data.get('properties', {}).items():
+            value = value.isoformat() if type(value) == datetime else value
+
+            if not existing:
+                rows.append({'property_id': None, 'resource_id': resource_id, 'name': name, 'value': value})
+
+            elif name not in self.create_only_properties:
+                property_id, current = existing['properties'].get(name, (None, None))
+                if property_id is None or current != value:
+                    rows.append({'property_id': property_id, 'resource_id': resource_id, 'name': name, 'value': value})
+
+        return rows
+
+    def _get_tag_rows(self, resource_id, data, existing):
+        rows = []
+        for key, value in data.get('tags', {}).items():
+            if type(value) != str:
+                raise ValueError('Invalid object type for tag value: {}'.format(key))
+
+            tag_id, current = existing['tags'].get(key, (None, None)) if existing else (None, None)
+            if tag_id is None or current != value:
+                rows.append({
+                    'tag_id': tag_id,
+                    'resource_id': resource_id,
+                    'key': key,
+                    'value': value,
+                    'created': datetime.now()
+                })
+
+        return rows
+
+    @staticmethod
+    def _get_deleted_tags(data, existing):
+        tags = data.get('tags', {})
+        return [tag_id for key, (tag_id, _) in existing['tags'].items() if key not in tags]
+
+    def _upsert(self, model, rows, update_columns):
+        for batch in chunks(rows, self.batch_size):
+            stmt = mysql_insert(model.__table__).values(batch)
+            stmt = stmt.on_duplicate_key_update(
+                **{column: getattr(stmt.inserted, column) for column in update_columns}
+            )
+            db.session.execute(stmt)
+
+    def _delete(self, column, ids):
+        for batch in chunks(ids, self.batch_size):
+            db.session.execute(column.table.delete().where(column.in_(batch)))
+    # endregion
+
+
 class EC2Instance(BaseResource):
     """EC2 Instance"""
     resource_type = 'aws_ec2_instance'
@@ -866,25 +1451,38 @@ class S3Bucket(BaseResource):
     # endregion
 
     def update(self, data, properties):
+        """Updates the object information based on live data, if there were any changes made. Any changes will be
+        automatically applied to the object, but will not be automatically persisted. You must manually call
+        `db.session.add(instance)` on the object.
 
+        Args:
+            data (:obj:): AWS API Resource object fetched from AWS API
+            properties (`dict`): Properties of the bucket, including the current tags of the bucket in the `tags` key.
+            If the tags could not be collected, `tags` is `None` and the existing tags are left unchanged
+
+        Returns:
+            True if there were any changes to the object, else false
+        """
         updated = self.set_property('location', properties['location'])
-        updated |= self.set_property('creation_date', data.creation_date)
+        updated |= self.set_property('creation_date', properties.get('creation_date', data.creation_date))
         updated |= self.set_property('bucket_policy', properties['bucket_policy'])
         updated |= self.set_property('website_enabled', properties['website_enabled'])
         updated |= self.set_property('metrics', properties['metrics'])
 
-        with suppress(ClientError):
-            tags = {t['Key']: t['Value'] for t in data.Tagging().tag_set}
-            existing_tags = {x.key: x for x in self.tags}
+        tags = properties['tags']
+        if tags is None:
+            return updated
+
+        existing_tags = {x.key: x for x in self.tags}
 
-            # Check for new tags
-            for key, value in list(tags.items()):
-                updated |= self.set_tag(key, value)
+        # Check for new tags
+        for key, value in list(tags.items()):
+            updated |= self.set_tag(key, value)
 
-            # Check for updated or removed tags
-            for key in list(existing_tags.keys()):
-                if key not in tags:
-                    updated |= self.delete_tag(key)
+        # Check for updated or removed tags
+        for key in list(existing_tags.keys()):
+            if key not in tags:
+                updated |= self.delete_tag(key)
 
         return updated
 
@@ -0,0 +1,237 @@
+"""Asyncio based runtime for scheduler workers.
+
+Instead of a fixed number of threads each blocking on a single job, the runtime polls the scheduler for jobs from an
+event loop and runs the jobs concurrently in a thread pool, so a single process can run a large number of I/O bound
+collector and auditor jobs at the same time. The number of jobs running at the same time is limited in total and per
+job type
+"""
+import asyncio
+import logging
+import signal
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from cloud_inquisitor.exceptions import SchedulerError
+
+logger = logging.getLogger(__name__)
+
+
+class JobStats(object):
+    """Timing metrics of the jobs of a single type
+
+    Attributes:
+        completed (`int`): Number of jobs completed successfully
+        failed (`int`): Number of jobs that failed
+        running (`int`): Number of jobs currently running
+        waiting (`int`): Number of jobs waiting for a free slot for their job type
+        run_time (`float`): Total time spent running jobs, in seconds
+        max_run_time (`float`): Longest time spent running a single job, in seconds
+        wait_time (`float`): Total time jobs spent waiting for a free slot, in seconds
+    """
+    def __init__(self):
+        self.completed = 0
+        self.failed = 0
+        self.running = 0
+        self.waiting = 0
+        self.run_time = 0.0
+        self.max_run_time = 0.0
+        self.wait_time = 0.0
+
+    def to_json(self):
+        finished = self.completed + self.failed
+
+        return {
+            'completed': self.completed,
+            'failed': self.failed,
+            'running': self.running,
+            'waiting': self.waiting,
+            'avgRunTime': round(self.run_time / finished, 3) if finished else 0,
+            'maxRunTime': round(self.max_run_time, 3),
+            'avgWaitTime': round(self.wait_time / finished, 3) if finished else 0
+        }
+
+
+class AsyncWorkerRuntime(object):
+    """Runs the jobs of a scheduler concurrently from an asyncio event loop.
+
+    Jobs are retrieved with :meth:`BaseScheduler.get_worker_job` and executed with :meth:`BaseScheduler.run_worker_job`,
+    both of which are blocking and run in a thread pool. New jobs are only retrieved while fewer than `concurrency` jobs
+    are running or waiting to run. On SIGTERM or SIGINT, the runtime stops retrieving new jobs and exits once all
+    retrieved jobs have completed
+
+    Args:
+        scheduler (:obj:`BaseScheduler`): Scheduler to retrieve and run jobs with. The scheduler must set
+        `supports_runtime`, or :obj:`SchedulerError` is raised
+        concurrency (`int`): Maximum number of jobs running at the same time. Default: 50
+        job_type_concurrency (`dict` of `str`: `int`): Maximum number of jobs running at the same time per job type.
+        Default: `None`, only limited by `concurrency`
+        delay (`float`): Minimum time between polls for new jobs when there are no pending jobs, in seconds. Default: 10
+        stats_interval (`float`): Time between logging the job metrics, in seconds. Default: 300
+    """
+    def __init__(self, scheduler, concurrency=50, job_type_concurrency=None, *, delay=10, stats_interval=300):
+        if not scheduler.supports_runtime:
+            raise SchedulerError('{} does not support the asyncio worker runtime'.format(scheduler.name))
+
+        self.scheduler = scheduler
+        self.concurrency = max(concurrency, 1)
+        self.job_type_concurrency = job_type_concurrency or {}
+        self.delay = delay
+        self.stats_interval = stats_interval
+        self.stats = {}
+        self.__loop = None
+        self.__executor = None
+        self.__slots = None
+        self.__job_type_slots = {}
+        self.__jobs = set()
+        self.__stopping = False
+
+    def run(self):
+        """Run the worker until it is stopped, and wait for all running jobs to complete
+
+        Returns:
+            `None`
+        """
+        self.__loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(self.__loop)
+        # One extra thread for polling the scheduler for new jobs
+        self.__executor = ThreadPoolExecutor(self.concurrency + 1)
+        self.__slots = asyncio.Semaphore(self.concurrency)
+
+        for signum in (signal.SIGTERM, signal.SIGINT):
+            self.__loop.add_signal_handler(signum, self.stop)
+
+        try:
+            self.__loop.run_until_complete(self.__run())
+        finally:
+            for signum in (signal.SIGTERM, signal.SIGINT):
+                self.__loop.remove_signal_handler(signum)
+
+            self.__executor.shutdown()
+            self.__loop.close()
+            asyncio.set_event_loop(None)
+            self.log_stats()
+
+    def stop(self):
+        """Stop retrieving new jobs. The runtime exits as soon as the running jobs have completed
+
+        Returns:
+            `None`
+        """
+        if not self.__stopping:
+            logger.info('Stopping worker, waiting for {} jobs to complete'.format(len(self.__jobs)))
+            self.__stopping = True
+
+    def log_stats(self):
+        """Log the job metrics for each job type
+
+        Returns:
+            `None`
+        """
+        for job_type, stats in sorted(self.stats.items()):
+            logger.info('Worker job metrics for {}: {}'.format(job_type, stats.to_json()))
+
+    # region Internal methods
+    async def __run(self):
+        stats_logger = self.__loop.create_task(self.__log_stats())
+
+        try:
+            while not self.__stopping:
+                await self.__slots.acquire()
+                job = await self.__get_job()
+                if not job:
+                    self.__slots.release()
+                    continue
+
+                task = self.__loop.create_task(self.__run_job(*job))
+                task.add_done_callback(self.__jobs.discard)
+                self.__jobs.add(task)
+
+            if self.__jobs:
+                await asyncio.wait(self.__jobs)
+
+        finally:
+            stats_logger.cancel()
+
+    async def __get_job(self):
+        """Returns the next job from the scheduler, or `None` if there are no pending jobs or the runtime is stopping.
+        When there are no pending jobs, polls are spaced at least `delay` seconds apart
+        """
+        start = time.monotonic()
+        try:
+            job = await self.__loop.run_in_executor(self.__executor, self.scheduler.get_worker_job)
+
+        except Exception:
+            logger.exception('Failed retrieving job from the {}'.format(self.scheduler.name))
+            job = None
+
+        if not job and not self.__stopping:
+            await self.__sleep(self.delay - (time.monotonic() - start))
+
+        return job
+
+    async def __run_job(self, job_type, job):
+        stats = self.stats.setdefault(job_type, JobStats())
+        queued = time.monotonic()
+
+        try:
+            stats.waiting += 1
+            try:
+                slot = self.__get_job_type_slot(job_type)
+                if slot:
+                    await slot.acquire()
+            finally:
+                stats.waiting -= 1
+
+            start = time.monotonic()
+            stats.running += 1
+            try:
+                success = await self.__loop.run_in_executor(self.__executor, self.scheduler.run_worker_job, job)
+
+            except Exception:
+                logger.exception('Failed running {} job'.format(job_type))
+                success = False
+
+            finally:
+                stats.running -= 1
+                if slot:
+                    slot.release()
+
+            run_time = time.monotonic() - start
+            if success is False:
+                stats.failed += 1
+            else:
+                stats.completed += 1
+
+            stats.run_time += run_time
+            stats.max_run_time = max(stats.max_run_time, run_time)
+            stats.wait_time += start - queued
+            logger.debug('{} job {} in {:.2f}s, after waiting {:.2f}s'.format(
+                job_type,
+                'failed' if success is False else 'completed',
+                run_time,
+                start - queued
+            ))
+
+        finally:
+            self.__slots.release()
+
+    def __get_job_type_slot(self, job_type):
+        if job_type not in self.job_type_concurrency:
+            return None
+
+        if job_type not in self.__job_type_slots:
+            self.__job_type_slots[job_type] = asyncio.Semaphore(max(self.job_type_concurrency[job_type], 1))
+
+        return self.__job_type_slots[job_type]
+
+    async def __log_stats(self):
+        while True:
+            await asyncio.sleep(self.stats_interval)
+            self.log_stats()
+
+    async def __sleep(self, seconds):
+        """Sleep for up to `seconds`, returning early if the runtime is stopped"""
+        deadline = time.monotonic() + seconds
+        while not self.__stopping and time.monotonic() < deadline:
+            await asyncio.sleep(min(deadline - time.monotonic(), 1))
+    # endregion
@@ -0,0 +1,174 @@
+"""Dependency tracking between collector and auditor jobs.
+
+Collectors declare the resource types they produce and auditors the resource types they consume. When dependency
+scheduling is enabled, an auditor job is held when it is due, until the collector jobs producing its resource types that
+were queued at that time have completed, so auditors never work on data older than the latest collection, and never wait
+longer than necessary either
+"""
+import logging
+import threading
+import time
+from collections import namedtuple, OrderedDict
+
+logger = logging.getLogger(__name__)
+
+HeldJob = namedtuple('HeldJob', ('job', 'job_type', 'dependencies', 'collect_start', 'deadline'))
+
+# Number of batches to keep collect-to-audit latencies for
+LATENCY_HISTORY = 100
+
+
+class DependencyTracker(object):
+    """Tracks the queued collector jobs, releasing held auditor jobs as soon as the collector jobs they depend on have
+    finished, and measures the collect-to-audit latency of each auditor job. The latency is the time from queueing the
+    first collector job the auditor waited for, until the auditor job finished.
+
+    Jobs are identified by the job id assigned by the scheduler, and typed by the entry point name of their collector
+    or auditor. The held jobs themselves are opaque to the tracker. Collector jobs not reported as finished within
+    `timeout` seconds, for example because the worker running them died, are no longer waited for
+
+    Args:
+        timeout (`float`): Maximum time in seconds to hold a job for
+
+    Attributes:
+        latencies (`OrderedDict` of `str`: `dict`): Collect-to-audit latency in seconds of each auditor, per batch
+    """
+    def __init__(self, timeout):
+        self.timeout = timeout
+        self.latencies = OrderedDict()
+        self.__lock = threading.Lock()
+        self.__queued = {}
+        self.__held = []
+        self.__audits = {}
+
+    @property
+    def held(self):
+        """Returns the number of held jobs
+
+        Returns:
+            `int`
+        """
+        return len(self.__held)
+
+    def job_queued(self, job_id, job_type):
+        """Register a collector job sent to the workers
+
+        Args:
+            job_id (`str`): ID of the job
+            job_type (`str`): Entry point name of the collector
+
+        Returns:
+            `None`
+        """
+        with self.__lock:
+            self.__queued[job_id] = (job_type, time.time())
+
+    def audit_queued(self, job_id, job_type, batch_id, collect_start=None):
+        """Register an auditor job sent to the workers, to measure its collect-to-audit latency
+
+        Args:
+            job_id (`str`): ID of the job
+            job_type (`str`): Entry point name of the auditor
+            batch_id (`str`): ID of the batch the job belongs to
+            collect_start (`float`): Time the collection the auditor waited for started. Default: `None`, now
+
+        Returns:
+            `None`
+        """
+        with self.__lock:
+            self.__audits[job_id] = (job_type, batch_id, collect_start or time.time())
+
+    def hold(self, job, job_type, dependencies):
+        """Hold a job until the queued collector jobs of the types in `dependencies` have finished. Jobs without any
+        queued collector jobs to wait for are not held
+
+        Args:
+            job (`object`): Job to hold
+            job_type (`str`): Entry point name of the auditor
+            dependencies (`set` of `str`): Entry point names of the collectors producing the resource types of the
+            auditor
+
+        Returns:
+            `bool`: `True` if the job was held
+        """
+        with self.__lock:
+            waiting = {
+                job_id: queued for job_id, (queued_type, queued) in self.__queued.items()
+                if queued_type in dependencies
+            }
+            if not waiting:
+                return False
+
+            self.__held.append(HeldJob(
+                job,
+                job_type,
+                set(waiting),
+                min(waiting.values()),
+                time.time() + self.timeout
+            ))
+
+            return True
+
+    def job_finished(self, job_id):
+        """Register a finished job, completed or otherwise, and return the held jobs released by it
+
+        Args:
+            job_id (`str`): ID of the job
+
+        Returns:
+            `list` of :obj:`HeldJob`
+        """
+        with self.__lock:
+            self.__queued.pop(job_id, None)
+
+            if job_id in self.__audits:
+                job_type, batch_id, collect_start = self.__audits.pop(job_id)
+                self.__add_latency(batch_id, job_type, time.time() - collect_start)
+
+            released = []
+            for held in self.__held:
+                held.dependencies.discard(job_id)
+                if not held.dependencies:
+                    released.append(held)
+
+            if released:
+                self.__held = [held for held in self.__held if held.dependencies]
+
+            return released
+
+    def release_expired(self):
+        """Release the held jobs which have been held for longer than the timeout, and stop tracking collector and
+        auditor jobs queued for longer than the timeout
+
+        Returns:
+            `list` of :obj:`HeldJob`
+        """
+        now = time.time()
+        with self.__lock:
+            for job_id, (_, queued) in list(self.__queued.items()):
+                if queued + self.timeout <= now:
+                    del self.__queued[job_id]
+
+            for job_id, (_, _, collect_start) in list(self.__audits.items()):
+                if collect_start + self.timeout * 2 <= now:
+                    del self.__audits[job_id]
+
+            expired = [held for held in self.__held if held.deadline <= now]
+            if expired:
+                self.__held = [held for held in self.__held if held.deadline > now]
+
+        for held in expired:
+            logger.warning('Releasing {} job after waiting for {} collector jobs past the timeout'.format(
+                held.job_type,
+                len(held.dependencies)
+            ))
+
+        return expired
+
+    def __add_latency(self, batch_id, job_type, latency):
+        logger.info('Collect-to-audit latency of {} in batch {}: {:.1f}s'.format(job_type, batch_id, latency))
+
+        self.latencies.setdefault(batch_id, {})[job_type] = latency
+        self.latencies.move_to_end(batch_id)
+        while len(self.latencies) > LATENCY_HISTORY:
+            self.latencies.popitem(last=False)
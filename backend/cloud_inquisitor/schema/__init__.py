@@ -2,11 +2,13 @@ from .base import (BaseModelMixin, LogEvent, Email, ConfigNamespace, ConfigItem,
                    UserRole, AuditLog, SchedulerBatch, SchedulerJob, Template)
 from .accounts import AccountType, AccountProperty, Account
 from .issues import IssueType, IssueProperty, Issue
-from .resource import Tag, ResourceType, ResourceProperty, Resource, ResourceMapping
+from .resource import (Tag, ResourceType, ResourceProperty, Resource, ResourceMapping, ResourceChange,
+                       ResourceChangeWatermark)
 from .enforcements import Enforcements
 
 __all__ = (
     'ResourceType', 'ResourceProperty', 'Resource', 'ResourceMapping', 'BaseModelMixin', 'Account', 'Tag', 'LogEvent',
     'Email', 'ConfigNamespace', 'ConfigItem', 'Role', 'User', 'UserRole', 'AuditLog', 'SchedulerBatch', 'SchedulerJob',
-    'IssueType', 'IssueProperty', 'Issue', 'Template', 'AccountType', 'AccountProperty', 'Account', 'Enforcements'
+    'IssueType', 'IssueProperty', 'Issue', 'Template', 'AccountType', 'AccountProperty', 'Account', 'Enforcements',
+    'ResourceChange', 'ResourceChangeWatermark'
 )
@@ -4,7 +4,7 @@ from sqlalchemy.orm import foreign, relationship
 
 from cloud_inquisitor.constants import ROLE_ADMIN
 from cloud_inquisitor.database import db, Model
-from cloud_inquisitor.schema.base import BaseModelMixin
+from cloud_inquisitor.schema.base import BaseModelMixin, TypeCache
 
 __all__ = ('AccountType', 'AccountProperty', 'Account')
 
@@ -14,9 +14,15 @@ class AccountType(Model, BaseModelMixin):
 
     account_type_id = Column(Integer(unsigned=True), primary_key=True, autoincrement=True)
     account_type = Column(String(100), nullable=False, index=True, unique=True)
+    cache = TypeCache('account_type', 'account_type_id')
 
     @classmethod
     def get(cls, account_type):
+        if isinstance(account_type, (str, int)):
+            obj = cls.cache.get(account_type)
+            if obj:
+                return obj
+
         if isinstance(account_type, str):
             obj = getattr(db, cls.__name__).find_one(cls.account_type == account_type)
 
@@ -40,6 +46,7 @@ class AccountType(Model, BaseModelMixin):
             else:
                 raise ValueError('Unable to find or create a new account type: {}'.format(account_type))
 
+        cls.cache.add(obj)
         return obj
 
 
@@ -1,11 +1,12 @@
 import enum
+import threading
 from datetime import datetime
 from logging import getLogger
 
-from sqlalchemy import Column, String, ForeignKey, SmallInteger, UniqueConstraint, text, func
+from sqlalchemy import Column, String, ForeignKey, SmallInteger, UniqueConstraint, Index, text, func, event
 from sqlalchemy.dialects.mysql import INTEGER as Integer, JSON, TINYINT as TinyInt, DATETIME as DateTime, TEXT as Text
 from sqlalchemy.ext.declarative import as_declarative, declared_attr
-from sqlalchemy.orm import relationship
+from sqlalchemy.orm import relationship, make_transient_to_detached
 from sqlalchemy.orm.attributes import QueryableAttribute
 from sqlalchemy.orm.collections import InstrumentedList
 
@@ -19,7 +20,7 @@ from cloud_inquisitor.utils import (
 )
 
 __all__ = (
-    'BaseModelMixin', 'LogEvent', 'Email', 'ConfigNamespace', 'ConfigItem', 'Role', 'User',
+    'BaseModelMixin', 'TypeCache', 'LogEvent', 'Email', 'ConfigNamespace', 'ConfigItem', 'Role', 'User',
     'UserRole', 'AuditLog', 'SchedulerBatch', 'SchedulerJob', 'Template'
 )
 
@@ -73,6 +74,84 @@ class BaseModelMixin(object):
         return output
 
 
+class TypeCache(object):
+    """Process level cache for the type lookup tables (`AccountType`, `IssueType` and `ResourceType`), mapping both the
+    name and the id of a type to a detached copy of the type object, so the cached objects can safely be used from any
+    session or thread.
+
+    Types are only ever added by the application, so a cache miss always falls through to the database. The cache for
+    a model is cleared whenever an object of the model is updated or deleted through the ORM. Changes made outside of
+    the ORM, for example by bulk deletes or from another process, require calling :meth:`clear`
+
+    Attributes:
+        name_attr (`str`): Name of the column holding the type name
+        id_attr (`str`): Name of the column holding the type id
+        hits (`int`): Number of lookups served from the cache
+        misses (`int`): Number of lookups that had to query the database
+    """
+    def __init__(self, name_attr, id_attr):
+        self.name_attr = name_attr
+        self.id_attr = id_attr
+        self.hits = 0
+        self.misses = 0
+        self.__types = {}
+        self.__models = set()
+        self.__lock = threading.Lock()
+
+    def get(self, key):
+        """Return the cached type object for `key`, or `None` if the type is not cached
+
+        Args:
+            key (`str`, `int`): Name or id of the type
+
+        Returns:
+            `Model`
+        """
+        obj = self.__types.get(key)
+        if obj is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+
+        return obj
+
+    def add(self, obj):
+        """Add a type object to the cache
+
+        Args:
+            obj (`Model`): Type object to cache
+
+        Returns:
+            `None`
+        """
+        model = type(obj)
+        cached = model()
+        setattr(cached, self.id_attr, getattr(obj, self.id_attr))
+        setattr(cached, self.name_attr, getattr(obj, self.name_attr))
+        make_transient_to_detached(cached)
+
+        with self.__lock:
+            if model not in self.__models:
+                event.listen(model, 'after_update', self.__invalidate)
+                event.listen(model, 'after_delete', self.__invalidate)
+                self.__models.add(model)
+
+            self.__types[getattr(cached, self.id_attr)] = cached
+            self.__types[getattr(cached, self.name_attr)] = cached
+
+    def clear(self):
+        """Remove all objects from the cache
+
+        Returns:
+            `None`
+        """
+        with self.__lock:
+            self.__types = {}
+
+    def __invalidate(self, mapper, connection, target):
+        self.clear()
+
+
 class LogEvent(Model, BaseModelMixin):
     """Log Event object
 
@@ -470,6 +549,9 @@ class SchedulerBatch(Model, BaseModelMixin):
 
 class SchedulerJob(Model, BaseModelMixin):
     __tablename__ = 'scheduler_jobs'
+    __table_args__ = (
+        Index('ix_scheduler_jobs_batch_id_status', 'batch_id', 'status'),
+    )
 
     job_id = Column(String(36), primary_key=True)
     batch_id = Column(
@@ -3,7 +3,7 @@ from sqlalchemy.dialects.mysql import INTEGER as Integer, JSON
 from sqlalchemy.orm import foreign, relationship
 
 from cloud_inquisitor.database import db, Model
-from cloud_inquisitor.schema.base import BaseModelMixin
+from cloud_inquisitor.schema.base import BaseModelMixin, TypeCache
 
 __all__ = ('IssueType', 'IssueProperty', 'Issue')
 
@@ -19,6 +19,7 @@ class IssueType(Model, BaseModelMixin):
 
     issue_type_id = Column(Integer(unsigned=True), primary_key=True, autoincrement=True)
     issue_type = Column(String(100), nullable=False, index=True)
+    cache = TypeCache('issue_type', 'issue_type_id')
 
     @classmethod
     def get(cls, issue_type):
@@ -31,6 +32,11 @@ class IssueType(Model, BaseModelMixin):
         Returns:
             :obj:`IssueType`
         """
+        if isinstance(issue_type, (str, int)):
+            obj = cls.cache.get(issue_type)
+            if obj:
+                return obj
+
         if isinstance(issue_type, str):
             obj = getattr(db, cls.__name__).find_one(cls.issue_type == issue_type)
 
@@ -51,6 +57,7 @@ class IssueType(Model, BaseModelMixin):
             db.session.commit()
             db.session.refresh(obj)
 
+        cls.cache.add(obj)
         return obj
 
 
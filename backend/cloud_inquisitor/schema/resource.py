@@ -1,14 +1,17 @@
 from datetime import datetime
 
 from sqlalchemy import Column, String, ForeignKey, DateTime, UniqueConstraint
-from sqlalchemy.dialects.mysql import INTEGER as Integer, JSON
+from sqlalchemy.dialects.mysql import BIGINT as BigInteger, INTEGER as Integer, JSON
 from sqlalchemy.orm import foreign, relationship
 
 from cloud_inquisitor.database import db, Model
 from cloud_inquisitor.schema import Account
-from cloud_inquisitor.schema.base import BaseModelMixin
+from cloud_inquisitor.schema.base import BaseModelMixin, TypeCache
 
-__all__ = ('Tag', 'ResourceType', 'ResourceProperty', 'Resource', 'ResourceMapping')
+__all__ = (
+    'Tag', 'ResourceType', 'ResourceProperty', 'Resource', 'ResourceMapping', 'ResourceChange',
+    'ResourceChangeWatermark'
+)
 
 
 class Tag(Model, BaseModelMixin):
@@ -67,6 +70,7 @@ class ResourceType(Model, BaseModelMixin):
 
     resource_type_id = Column(Integer(unsigned=True), primary_key=True, autoincrement=True)
     resource_type = Column(String(100), nullable=False, index=True)
+    cache = TypeCache('resource_type', 'resource_type_id')
 
     @classmethod
     def get(cls, resource_type):
@@ -79,6 +83,11 @@ class ResourceType(Model, BaseModelMixin):
         Returns:
             :obj:`ResourceType`
         """
+        if isinstance(resource_type, (str, int)):
+            obj = cls.cache.get(resource_type)
+            if obj:
+                return obj
+
         if isinstance(resource_type, str):
             obj = getattr(db, cls.__name__).find_one(cls.resource_type == resource_type)
 
@@ -98,6 +107,7 @@ class ResourceType(Model, BaseModelMixin):
             db.session.commit()
             db.session.refresh(obj)
 
+        cls.cache.add(obj)
         return obj
 
 
@@ -231,3 +241,36 @@ class ResourceMapping(Model, BaseModelMixin):
         nullable=False,
         index=True
     )
+
+
+class ResourceChange(Model, BaseModelMixin):
+    """Change log of the resources created, updated or deleted, used to audit only the resources changed since a
+    previous audit
+
+    Attributes:
+        change_id (int): Monotonically increasing unique ID of the change
+        resource_id (str): ID of the changed resource. Not a foreign key, as deleted resources are recorded as well
+        created (datetime): Time the change was recorded
+    """
+    __tablename__ = 'resource_changes'
+
+    change_id = Column(BigInteger(unsigned=True), primary_key=True, autoincrement=True)
+    resource_id = Column(String(256), nullable=False)
+    created = Column(DateTime, nullable=False, default=datetime.now)
+
+
+class ResourceChangeWatermark(Model, BaseModelMixin):
+    """Last entry of the resource change log processed by a consumer of the change log
+
+    Attributes:
+        consumer (str): Name of the consumer, eg. the namespace of an auditor
+        change_id (int): ID of the last change processed
+        full_audit (datetime): Time the consumer last processed all resources, instead of only the changed resources
+        state (str): Hash of the consumer configuration at the last full audit
+    """
+    __tablename__ = 'resource_change_watermarks'
+
+    consumer = Column(String(64), primary_key=True)
+    change_id = Column(BigInteger(unsigned=True), nullable=False)
+    full_audit = Column(DateTime, nullable=False)
+    state = Column(String(64), nullable=False)
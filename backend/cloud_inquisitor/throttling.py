@@ -0,0 +1,198 @@
+"""Adaptive rate limiting of AWS API calls.
+
+Sessions returned by :func:`cloud_inquisitor.get_aws_session` have botocore event handlers registered, which wait for
+the :obj:`AdaptiveRateLimiter` of the account, region and service before each API call is made, and which reduce the
+rate of the limiter whenever an API call is throttled. Limiters are shared by all collectors and auditors running in
+the same process
+"""
+import logging
+import threading
+import time
+from collections import deque
+
+from cloud_inquisitor.utils import RateLimiter
+
+logger = logging.getLogger(__name__)
+
+THROTTLING_ERROR_CODES = (
+    'Throttling',
+    'ThrottlingException',
+    'ThrottledException',
+    'RequestThrottledException',
+    'TooManyRequestsException',
+    'ProvisionedThroughputExceededException',
+    'TransactionInProgressException',
+    'RequestLimitExceeded',
+    'BandwidthLimitExceeded',
+    'LimitExceededException',
+    'RequestThrottled',
+    'SlowDown',
+    'PriorRequestNotComplete',
+    'EC2ThrottledException',
+)
+
+__limiters = {}
+__lock = threading.Lock()
+
+
+class AdaptiveRateLimiter(RateLimiter):
+    """Token bucket rate limiter adjusting its rate to the throttling responses of the API. The rate is halved every
+    time a call is throttled, and slowly increased again for every successful call, up to `max_rate`
+
+    Args:
+        max_rate (`float`): Maximum number of calls per second
+        min_rate (`float`): Minimum number of calls per second the rate will be reduced to. Default: 0.5
+
+    Attributes:
+        max_rate (`float`): Maximum number of calls per second
+        min_rate (`float`): Minimum number of calls per second
+        throttles (`int`): Total number of throttled calls
+    """
+    def __init__(self, max_rate, min_rate=0.5):
+        super().__init__(max_rate)
+        self.max_rate = max_rate
+        self.min_rate = min(min_rate, max_rate)
+        self.throttles = 0
+        self.__throttle_times = deque()
+        self.__last_throttle = 0
+        self.__adjust_lock = threading.Lock()
+
+    @property
+    def throttles_per_minute(self):
+        """Returns the number of throttled calls in the last minute
+
+        Returns:
+            `int`
+        """
+        with self.__adjust_lock:
+            self.__expire_throttles()
+            return len(self.__throttle_times)
+
+    def throttled(self):
+        """Record a throttled call, halving the rate of the limiter. Throttles within one second of the previous
+        reduction are counted but do not reduce the rate again, as they are most likely caused by calls made before the
+        rate was reduced
+
+        Returns:
+            `None`
+        """
+        with self.__adjust_lock:
+            now = time.monotonic()
+            self.throttles += 1
+            self.__throttle_times.append(now)
+            self.__expire_throttles()
+
+            if now - self.__last_throttle > 1:
+                self.rate = max(self.rate / 2, self.min_rate)
+                self.__last_throttle = now
+
+    def succeeded(self):
+        """Record a successful call, increasing the rate of the limiter towards `max_rate`
+
+        Returns:
+            `None`
+        """
+        if self.rate < self.max_rate:
+            with self.__adjust_lock:
+                self.rate = min(self.rate + (self.max_rate / 100), self.max_rate)
+
+    def __expire_throttles(self):
+        cutoff = time.monotonic() - 60
+        while self.__throttle_times and self.__throttle_times[0] < cutoff:
+            self.__throttle_times.popleft()
+
+
+def get_rate_limiter(account_number, region, service):
+    """Returns the shared rate limiter for the service in the account and region, creating it if required
+
+    Args:
+        account_number (`str`): AWS Account number
+        region (`str`): AWS Region, or `None` for global services
+        service (`str`): Name of the AWS service, eg. `ec2`
+
+    Returns:
+        :obj:`AdaptiveRateLimiter`
+    """
+    key = (account_number, region, service)
+    limiter = __limiters.get(key)
+
+    if not limiter:
+        from cloud_inquisitor.config import dbconfig
+
+        with __lock:
+            limiter = __limiters.setdefault(key, AdaptiveRateLimiter(dbconfig.get('api_rate_limit', default=20)))
+
+    return limiter
+
+
+def get_rate_limiter_stats(account_number=None, region=None):
+    """Returns the current rate and throttling metrics of the rate limiters in the process, optionally filtered by
+    account and region
+
+    Args:
+        account_number (`str`): Only return limiters for this account. Default: `None`
+        region (`str`): Only return limiters for this region. Default: `None`
+
+    Returns:
+        `list` of `dict`
+    """
+    with __lock:
+        limiters = sorted(__limiters.items(), key=lambda x: str(x[0]))
+
+    return [
+        {
+            'accountNumber': limiter_account,
+            'region': limiter_region,
+            'service': service,
+            'rate': limiter.rate,
+            'maxRate': limiter.max_rate,
+            'throttles': limiter.throttles,
+            'throttlesPerMinute': limiter.throttles_per_minute
+        } for (limiter_account, limiter_region, service), limiter in limiters
+        if account_number in (None, limiter_account) and region in (None, limiter_region)
+    ]
+
+
+def is_throttling_error(error_code):
+    """Returns `True` if the error code returned by the AWS API indicates the call was throttled
+
+    Args:
+        error_code (`str`): Error code of the API response
+
+    Returns:
+        `bool`
+    """
+    return error_code in THROTTLING_ERROR_CODES
+
+
+def register_rate_limiter(session, account_number):
+    """Register the rate limiting event handlers on a boto3 session. Must be called before any clients or resources
+    are created from the session
+
+    Args:
+        session (:obj:`boto3:boto3.session.Session`): Session to register the handlers on
+        account_number (`str`): AWS Account number the session is for
+
+    Returns:
+        `None`
+    """
+    def get_limiter(model, context):
+        return get_rate_limiter(account_number, context.get('client_region'), model.service_model.endpoint_prefix)
+
+    def before_call(model, context=None, **kwargs):
+        get_limiter(model, context or {}).acquire()
+
+    def needs_retry(response=None, operation=None, request_dict=None, **kwargs):
+        # Each attempt, including the ones retried by botocore itself, is reported to the limiter
+        if response and operation and request_dict:
+            limiter = get_limiter(operation, request_dict.get('context', {}))
+            error_code = response[1].get('Error', {}).get('Code')
+
+            if is_throttling_error(error_code):
+                logger.debug('Throttled calling {} in {}'.format(operation.name, account_number))
+                limiter.throttled()
+            else:
+                limiter.succeeded()
+
+    session.events.register('before-call', before_call)
+    session.events.register('needs-retry', needs_retry)
@@ -6,6 +6,7 @@ import os
 import random
 import re
 import string
+import threading
 import time
 import zlib
 from base64 import b64decode
@@ -56,6 +57,49 @@ class MenuItem(object):
         }
 
 
+class RateLimiter(object):
+    """Thread-safe token bucket, limiting the rate of calls shared between multiple threads
+
+    Example::
+
+        limiter = RateLimiter(10)
+        for bucket in buckets:
+            limiter.acquire()
+            client.get_bucket_policy(Bucket=bucket)
+
+    Args:
+        rate (`float`): Maximum number of calls per second. A rate of 0 disables rate limiting
+        burst (`int`): Maximum number of calls that can be made at once after being idle. Default: `rate`
+    """
+    def __init__(self, rate, burst=None):
+        self.rate = rate
+        self.burst = burst or max(int(rate), 1)
+        self.__tokens = self.burst
+        self.__updated = time.monotonic()
+        self.__lock = threading.Lock()
+
+    def acquire(self):
+        """Block until a call is allowed
+
+        Returns:
+            `None`
+        """
+        if not self.rate:
+            return
+
+        with self.__lock:
+            now = time.monotonic()
+            self.__tokens = min(self.burst, self.__tokens + (now - self.__updated) * self.rate)
+            self.__updated = now
+
+            if self.__tokens < 1:
+                time.sleep((1 - self.__tokens) / self.rate)
+                self.__tokens = 1
+                self.__updated = time.monotonic()
+
+            self.__tokens -= 1
+
+
 def deprecated(msg):
     """Marks a function / method as deprecated.
 
@@ -546,6 +590,30 @@ def flatten(data):
     return list(data[:1]) + list(flatten(data[1:]))
 
 
+def chunks(data, size):
+    """Yields successive lists of at most `size` items from an iterable
+
+    >>> list(chunks([1, 2, 3, 4, 5], 2))
+    [[1, 2], [3, 4], [5]]
+
+    Args:
+        data (`iterable`): Input data
+        size (`int`): Maximum number of items per chunk
+
+    Returns:
+        `generator` of `list`
+    """
+    chunk = []
+    for item in data:
+        chunk.append(item)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+
+    if chunk:
+        yield chunk
+
+
 def send_notification(*, subsystem, recipients, subject, body_html, body_text):
     """Method to send a notification. A plugin may use only part of the information, but all fields are required.
 
@@ -1,4 +1,5 @@
 import logging
+import random
 import time
 from abc import abstractmethod, ABC
 from functools import partial
@@ -9,6 +10,7 @@ from flask import request, session, current_app
 
 from cloud_inquisitor.constants import HTTP, ROLE_ADMIN
 from cloud_inquisitor.plugins.views import BaseView
+from cloud_inquisitor.throttling import is_throttling_error
 from cloud_inquisitor.utils import has_access, get_jwt_key_data
 
 
@@ -42,30 +44,33 @@ class __wrapper(ABC):
 
 class retry(__wrapper):
     """Decorator class to handle retrying calls if an exception occurs, with an exponential backoff. If the function
-    fails to execute without raising an exception 3 times, the exception is re-raised
+    fails to execute without raising an exception 2 times, the exception is re-raised. Calls failing because the AWS
+    API throttled the request are retried up to 5 times, with a randomized (full jitter) backoff so that workers
+    throttled at the same time do not retry in lockstep
     """
 
     def __init__(self, *args):
         super().__init__(*args)
         self._tries = 2
+        self._throttle_tries = 5
         self._delay = 4
         self._backoff = 2
 
-    def __backoff(self):
-        self._tries -= 1
-
-        if self._tries <= 0:
+    def __backoff(self, attempt, throttled=False):
+        if attempt >= (self._throttle_tries if throttled else self._tries):
             return False
 
-        time.sleep(self._delay)
-        self._delay *= self._backoff
+        delay = self._delay * self._backoff ** (attempt - 1)
+        time.sleep(random.uniform(0, delay) if throttled else delay)
 
         return True
 
     def __call__(self, *args, **kwargs):
-        self._tries = 2
+        attempt = 0
+
+        while True:
+            attempt += 1
 
-        while self._tries > 0:
             try:
                 return self.func(*args, **kwargs)
             except ClientError as ex:
@@ -78,12 +83,12 @@ class retry(__wrapper):
                     ))
                     break
                 else:
-                    if not self.__backoff():
+                    if not self.__backoff(attempt, is_throttling_error(rex)):
                         raise
 
             except OSError:
                 self.log.exception('Retrying after OSError')
-                if not self.__backoff():
+                if not self.__backoff(attempt):
                     raise
 
             except EndpointConnectionError as ex:
@@ -96,7 +96,7 @@ setuptools.setup(
         'Jinja2~=2.9',
         'MarkupSafe~=1.0',
         'PyJWT~=1.5',
-        'SQLAlchemy~=1.1',
+        'SQLAlchemy~=1.2',
         'argon2-cffi~=16.3',
         'boto3~=1.9',
         'click~=6.7',
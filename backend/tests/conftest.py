@@ -1,3 +1,4 @@
+import os
 import re
 
 import cloud_inquisitor
@@ -34,5 +35,20 @@ def cinq_test_service():
     cts.shut_down()
 
 
+def pytest_configure(config):
+    config.addinivalue_line('markers', 'benchmark: timing benchmark, only executed if CINQ_BENCHMARKS is set')
+
+
+def pytest_collection_modifyitems(config, items):
+    # Timing depends on the load of the host, so benchmarks are opt-in and only log their results
+    if os.environ.get('CINQ_BENCHMARKS'):
+        return
+
+    skip_benchmark = pytest.mark.skip(reason='Set CINQ_BENCHMARKS=1 to run benchmarks')
+    for item in items:
+        if 'benchmark' in item.keywords:
+            item.add_marker(skip_benchmark)
+
+
 pre_test_checks()
 patch_cinq_func()
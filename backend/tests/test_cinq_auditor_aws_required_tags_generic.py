@@ -1,7 +1,7 @@
 from cloud_inquisitor.config import dbconfig
 from cloud_inquisitor.constants import NS_CINQ_TEST
 from tests.libs.cinq_test_cls import MockRequiredTagsAuditor
-from tests.libs.lib_cinq_auditor_aws_required_tags import prep_s3_testing, IGNORE_TAGSET
+from tests.libs.lib_cinq_auditor_aws_required_tags import prep_s3_testing, set_audit_scope, IGNORE_TAGSET
 from tests.libs.util_cinq import setup_test_aws, aws_get_client, collect_resources
 
 
@@ -102,3 +102,14 @@ def test_alert_schedule(cinq_test_service):
     assert auditor._cinq_test_notices
     auditor.run()
     assert not auditor._cinq_test_notices
+
+
+def test_consumed_types(cinq_test_service):
+    """
+    Test if the resource types used for dependency scheduling follow the "audit_scope" config item
+    """
+    set_audit_scope('aws_ec2_instance', 'aws_s3_bucket')
+    assert MockRequiredTagsAuditor.get_consumed_types() == {'aws_ec2_instance', 'aws_s3_bucket'}
+
+    set_audit_scope('aws_rds_instance')
+    assert MockRequiredTagsAuditor.get_consumed_types() == {'aws_rds_instance'}
@@ -0,0 +1,113 @@
+from datetime import datetime, timedelta
+
+from sqlalchemy import func
+
+from cloud_inquisitor.config import dbconfig, DBCInt, DBCJSON
+from cloud_inquisitor.constants import NS_AUDITOR_REQUIRED_TAGS
+from cloud_inquisitor.database import db
+from cloud_inquisitor.plugins.types.resources import EC2Instance
+from cloud_inquisitor.schema import ResourceChange, ResourceChangeWatermark
+from tests.libs.cinq_test_cls import MockRequiredTagsAuditor
+from tests.libs.lib_cinq_auditor_aws_required_tags import set_audit_scope, STANDARD_ALERT_SETTINGS, VALID_TAGS
+from tests.libs.util_cinq import setup_test_aws
+from tests.libs.util_db import create_resource, empty_tables
+
+
+def get_changed_resource_ids():
+    return {resource_id for resource_id, in db.session.query(ResourceChange.resource_id)}
+
+
+def run_audit():
+    auditor = MockRequiredTagsAuditor()
+    known_issues, new_issues, fixed_issues = auditor.get_resources()
+    known_issues += list(auditor.create_new_issues(new_issues))
+
+    return {issue.resource_id for issue in known_issues}, {issue.resource_id for issue in fixed_issues}
+
+
+def test_incremental_audit(cinq_test_service):
+    account = setup_test_aws(cinq_test_service)['account']
+    dbconfig.set('default', 'resource_change_log', True)
+    set_audit_scope('aws_ec2_instance')
+    dbconfig.set(NS_AUDITOR_REQUIRED_TAGS, 'alert_settings', DBCJSON(STANDARD_ALERT_SETTINGS))
+    dbconfig.set(NS_AUDITOR_REQUIRED_TAGS, 'change_log_lag', DBCInt(0))
+
+    try:
+        for resource_id, tags in (('i-compliant', VALID_TAGS), ('i-missing', {}), ('i-changed', VALID_TAGS)):
+            create_resource(
+                EC2Instance,
+                resource_id,
+                account.account_id,
+                properties={'launch_date': '2000-01-01T00:00:00'},
+                tags=tags
+            )
+        db.session.commit()
+
+        # Resources created through the ORM are recorded in the change log
+        assert get_changed_resource_ids() == {'i-compliant', 'i-missing', 'i-changed'}
+
+        # Without a watermark, the first audit covers all resources, and clears the processed changes
+        assert run_audit() == ({'i-missing'}, set())
+        assert not get_changed_resource_ids()
+
+        instance = EC2Instance.get('i-changed')
+        instance.delete_tag(list(VALID_TAGS)[0])
+        db.session.commit()
+        assert get_changed_resource_ids() == {'i-changed'}
+
+        # Only the changed instance is audited, the issue of the unchanged instance is kept
+        last_change_id = db.session.query(func.max(ResourceChange.change_id)).scalar()
+        assert MockRequiredTagsAuditor().get_changed_resources(last_change_id) == {'i-changed'}
+        assert run_audit() == ({'i-missing', 'i-changed'}, set())
+
+        # Fixing a resource only requires auditing that resource
+        instance = EC2Instance.get('i-missing')
+        for key, value in VALID_TAGS.items():
+            instance.set_tag(key, value)
+        db.session.commit()
+
+        assert run_audit() == ({'i-changed'}, {'i-missing'})
+
+    finally:
+        empty_tables(ResourceChange, ResourceChangeWatermark)
+
+
+def add_change(change_id, resource_id, created):
+    change = ResourceChange()
+    change.change_id = change_id
+    change.resource_id = resource_id
+    change.created = created
+    db.session.add(change)
+    db.session.commit()
+
+
+def test_change_log_lag(cinq_test_service):
+    setup_test_aws(cinq_test_service)
+    dbconfig.set('default', 'resource_change_log', True)
+    set_audit_scope('aws_ec2_instance')
+    dbconfig.set(NS_AUDITOR_REQUIRED_TAGS, 'alert_settings', DBCJSON(STANDARD_ALERT_SETTINGS))
+    dbconfig.set(NS_AUDITOR_REQUIRED_TAGS, 'change_log_lag', DBCInt(300))
+    empty_tables(ResourceChange, ResourceChangeWatermark)
+
+    try:
+        auditor = MockRequiredTagsAuditor()
+        add_change(1, 'i-settled', datetime.now() - timedelta(hours=1))
+        add_change(3, 'i-late', datetime.now())
+
+        # Change 2 has been assigned its ID, but has not committed yet when the change log is read, so the watermark
+        # does not advance past it
+        assert auditor.get_settled_change_id(3) == 1
+        auditor.update_watermark(1, True)
+        db.session.commit()
+
+        # Once change 2 commits, it is audited by the next audit
+        add_change(2, 'i-early', datetime.now())
+        assert auditor.get_changed_resources(3) == {'i-early', 'i-late'}
+        assert auditor.get_settled_change_id(3) == 3
+
+        # Missing IDs, eg. of rolled back transactions, are skipped once the change following them is old enough
+        add_change(5, 'i-settled', datetime.now() - timedelta(hours=1))
+        assert auditor.get_settled_change_id(5) == 5
+
+    finally:
+        empty_tables(ResourceChange, ResourceChangeWatermark)
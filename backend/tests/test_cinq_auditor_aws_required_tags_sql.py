@@ -0,0 +1,150 @@
+import logging
+import os
+import time
+from datetime import datetime
+
+import pytest
+
+from cloud_inquisitor.config import dbconfig, DBCArray, DBCJSON, DBCString
+from cloud_inquisitor.constants import NS_AUDITOR_REQUIRED_TAGS
+from cloud_inquisitor.database import db
+from cloud_inquisitor.plugins.types.resources import EC2Instance
+from cloud_inquisitor.schema import Resource, ResourceType, Tag
+from cloud_inquisitor.utils import chunks, get_resource_id
+from tests.libs.cinq_test_cls import MockRequiredTagsAuditor
+from tests.libs.lib_cinq_auditor_aws_required_tags import set_audit_scope, STANDARD_ALERT_SETTINGS
+from tests.libs.util_cinq import setup_test_aws
+from tests.libs.var_const import CINQ_TEST_REGION
+
+logger = logging.getLogger(__name__)
+
+# Set CINQ_BENCHMARK_RESOURCES=1000000 to run the benchmark against a full size estate
+RESOURCE_COUNT = int(os.environ.get('CINQ_BENCHMARK_RESOURCES', 20000))
+GDPR_TAG = 'GDPR_Compliance'
+
+
+def get_tags(index, required_tags, ignore_tag):
+    """Returns the tags of a synthetic instance. Most instances are compliant, every 50th instance is missing a tag,
+    has an invalid owner or is ignored"""
+    tags = {key: 'value-{}'.format(index) for key in required_tags}
+    tags['owner'] = 'owner{}@example.com'.format(index % 100)
+
+    kind = index % 200
+    if kind == 0:
+        del tags[required_tags[-1]]
+    elif kind == 50:
+        tags['owner'] = 'not an email address'
+    elif kind == 100:
+        tags[ignore_tag] = 'true'
+    elif kind == 150:
+        # Tag keys are compared case-insensitively
+        tags = {key.upper(): value for key, value in tags.items()}
+
+    return tags
+
+
+def get_gdpr_tags(index):
+    """Returns the GDPR tag of a synthetic instance, using a different case than the `gdpr_tag` option for some
+    instances. One in every four instances has an invalid value and one in every four instances has no GDPR tag"""
+    kind = index % 4
+    if kind == 0:
+        return {GDPR_TAG: 'v1'}
+    elif kind == 1:
+        return {GDPR_TAG.upper(): 'pending'}
+    elif kind == 2:
+        return {GDPR_TAG.lower(): 'invalid'}
+
+    return {}
+
+
+def create_instances(account, count, extra_tags=None):
+    required_tags = dbconfig.get('required_tags', NS_AUDITOR_REQUIRED_TAGS)
+    ignore_tag = dbconfig.get('audit_ignore_tag', NS_AUDITOR_REQUIRED_TAGS)
+    resource_type_id = ResourceType.get(EC2Instance.resource_type).resource_type_id
+
+    for indexes in chunks(range(count), 10000):
+        resources = []
+        tags = []
+        for index in indexes:
+            resource_id = 'i-{:017x}'.format(index)
+            resources.append({
+                'resource_id': resource_id,
+                'account_id': account.account_id,
+                'location': CINQ_TEST_REGION,
+                'resource_type_id': resource_type_id
+            })
+            instance_tags = get_tags(index, required_tags, ignore_tag)
+            if extra_tags:
+                instance_tags.update(extra_tags(index))
+
+            tags += [
+                {'resource_id': resource_id, 'key': key, 'value': value, 'created': datetime.now()}
+                for key, value in instance_tags.items()
+            ]
+
+        db.session.bulk_insert_mappings(Resource, resources)
+        db.session.bulk_insert_mappings(Tag, tags)
+        db.session.commit()
+
+
+def run_audit(sql_evaluation):
+    auditor = MockRequiredTagsAuditor()
+    auditor.sql_evaluation = sql_evaluation
+
+    start = time.monotonic()
+    issues = auditor.get_known_resources_missing_tags()
+    elapsed = time.monotonic() - start
+
+    return elapsed, {issue_id: (issue['missing_tags'], issue['notes']) for issue_id, issue in issues.items()}
+
+
+def test_sql_evaluation_gdpr(cinq_test_service):
+    account = setup_test_aws(cinq_test_service)['account']
+    set_audit_scope('aws_ec2_instance')
+    dbconfig.set(NS_AUDITOR_REQUIRED_TAGS, 'alert_settings', DBCJSON(STANDARD_ALERT_SETTINGS))
+    dbconfig.set(NS_AUDITOR_REQUIRED_TAGS, 'gdpr_enabled', True)
+    dbconfig.set(NS_AUDITOR_REQUIRED_TAGS, 'gdpr_accounts', DBCArray([account.account_name]))
+    dbconfig.set(NS_AUDITOR_REQUIRED_TAGS, 'gdpr_tag', DBCString(GDPR_TAG))
+
+    try:
+        create_instances(account, 8, extra_tags=get_gdpr_tags)
+
+        _, sql_issues = run_audit(sql_evaluation=True)
+        _, python_issues = run_audit(sql_evaluation=False)
+        assert sql_issues == python_issues
+
+        # Instance 0 is missing a required tag, the GDPR tag of instances 2 and 6 is invalid and missing for 3 and 7
+        issues = {
+            index: sql_issues.get(get_resource_id('reqtag', 'i-{:017x}'.format(index)))
+            for index in range(8)
+        }
+        assert issues[1] is None and issues[4] is None and issues[5] is None
+        assert issues[2] == ([GDPR_TAG.lower()], ['{} tag is not valid'.format(GDPR_TAG.lower())])
+        assert issues[3] == ([GDPR_TAG.lower()], [])
+        assert len([issue for issue in issues.values() if issue]) == 5
+
+    finally:
+        dbconfig.set(NS_AUDITOR_REQUIRED_TAGS, 'gdpr_enabled', False)
+        dbconfig.set(NS_AUDITOR_REQUIRED_TAGS, 'gdpr_accounts', DBCArray([]))
+        dbconfig.set(NS_AUDITOR_REQUIRED_TAGS, 'gdpr_tag', DBCString('gdpr_compliance'))
+
+
+@pytest.mark.benchmark
+def test_sql_evaluation_benchmark(cinq_test_service):
+    account = setup_test_aws(cinq_test_service)['account']
+    set_audit_scope('aws_ec2_instance')
+    dbconfig.set(NS_AUDITOR_REQUIRED_TAGS, 'alert_settings', DBCJSON(STANDARD_ALERT_SETTINGS))
+    create_instances(account, RESOURCE_COUNT)
+
+    sql_time, sql_issues = run_audit(sql_evaluation=True)
+    python_time, python_issues = run_audit(sql_evaluation=False)
+
+    logger.info('Evaluated required tags of {} instances: SQL {:.2f}s, Python {:.2f}s'.format(
+        RESOURCE_COUNT,
+        sql_time,
+        python_time
+    ))
+
+    # One in every 100 instances is missing a tag or has an invalid owner
+    assert len(sql_issues) == RESOURCE_COUNT // 100
+    assert sql_issues == python_issues
@@ -1,4 +1,12 @@
+from collections import Counter
+
+import pytest
+
+from cinq_collector_aws import AWSRegionCollector
+from cloud_inquisitor.plugins.types.resources import EC2Instance, VPC
+from cloud_inquisitor.schema import ResourceType
 from tests.libs.util_cinq import aws_get_client, collect_resources, setup_test_aws
+from tests.libs.var_const import CINQ_TEST_REGION
 
 
 def test_collect(cinq_test_service):
@@ -25,3 +33,94 @@ def test_collect(cinq_test_service):
     assert cinq_test_service.has_resource(resource['Instances'][0]['InstanceId']) is True
 
     cinq_test_service.stop_mocking_services('ec2')
+
+
+def test_collect_type_lookups(cinq_test_service):
+    """Type lookups must be served from the cache, regardless of the number of resources collected"""
+    account = setup_test_aws(cinq_test_service)['account']
+    cinq_test_service.start_mocking_services('ec2')
+    client = aws_get_client('ec2')
+
+    lookups = []
+    for count in (1, 25):
+        client.run_instances(ImageId='i-10000', MinCount=count, MaxCount=count)
+        ResourceType.cache.clear()
+        misses = ResourceType.cache.misses
+
+        collect_resources(account=account, resource_types=['ec2'])
+        lookups.append(ResourceType.cache.misses - misses)
+
+    assert lookups[0] == lookups[1]
+    assert len(EC2Instance.get_all(account)) == 26
+
+    cinq_test_service.stop_mocking_services('ec2')
+
+
+def test_collect_vpcs_api_calls(cinq_test_service):
+    """Flow logs must be fetched with a single call per region, regardless of the number of VPCs"""
+    account = setup_test_aws(cinq_test_service)['account']
+    cinq_test_service.start_mocking_services('ec2')
+    client = aws_get_client('ec2')
+
+    api_calls = []
+    for count in (1, 20):
+        for _ in range(count):
+            client.create_vpc(CidrBlock='10.0.0.0/16')
+
+        calls = Counter()
+        collector = AWSRegionCollector(account, CINQ_TEST_REGION)
+        collector.session.events.register(
+            'before-call.ec2',
+            lambda model, **kwargs: calls.update([model.name])
+        )
+        collector._sync_vpcs(collector._fetch_vpcs())
+        api_calls.append(calls)
+
+        assert len(VPC.get_all(account, CINQ_TEST_REGION)) == len(client.describe_vpcs()['Vpcs'])
+
+    assert api_calls[0] == api_calls[1]
+    assert api_calls[1]['DescribeFlowLogs'] == 1
+
+    cinq_test_service.stop_mocking_services('ec2')
+
+
+def test_collect_instances_paginated(cinq_test_service):
+    """Instances must be collected from every page, using the configured page size"""
+    account = setup_test_aws(cinq_test_service)['account']
+    cinq_test_service.start_mocking_services('ec2')
+    client = aws_get_client('ec2')
+    client.run_instances(ImageId='i-10000', MinCount=12, MaxCount=12)
+
+    collector = AWSRegionCollector(account, CINQ_TEST_REGION)
+    collector.max_instances = 5
+    pages = list(collector._fetch_instances())
+
+    assert [len(page) for page in pages] == [5, 5, 2]
+    assert len(collector.page_latency['describe_instances']) == 3
+    assert collector.page_sizes['describe_instances'] == 5
+
+    # Each page is synchronized as it is fetched
+    collector._sync_instances(collector._fetch_instances())
+    assert len(EC2Instance.get_all(account, CINQ_TEST_REGION)) == 12
+
+    cinq_test_service.stop_mocking_services('ec2')
+
+
+def test_concurrent_collection_errors(cinq_test_service):
+    """Concurrent collection must only fail on the collections which also fail a sequential collection"""
+    account = setup_test_aws(cinq_test_service)['account']
+    cinq_test_service.start_mocking_services('ec2')
+
+    def fail():
+        raise RuntimeError('Failed fetching')
+
+    collector = AWSRegionCollector(account, CINQ_TEST_REGION)
+    collector.concurrent_workers = 2
+    collector._fetch_vpcs = fail
+    collector._AWSRegionCollector__run_concurrent(['vpcs', 'volumes'])
+
+    collector._fetch_instances = fail
+    with pytest.raises(RuntimeError):
+        collector._AWSRegionCollector__run_concurrent(['vpcs', 'instances'])
+
+    cinq_test_service.stop_mocking_services('ec2')
@@ -0,0 +1,292 @@
+import logging
+import socket
+import struct
+import threading
+import time
+import tracemalloc
+from collections import namedtuple
+
+import dns.message
+import dns.query
+import dns.rrset
+import dns.zone
+import cinq_collector_dns
+import pytest
+from cinq_collector_dns import DNSCollector, CLOUDFLARE_RECORDS_PER_PAGE, CLOUDFLARE_ZONES_PER_PAGE
+from cinq_collector_dns.xfr import ZoneTransfer
+from cloud_inquisitor.exceptions import CloudFlareError
+from cloud_inquisitor.utils import get_resource_id
+
+logger = logging.getLogger(__name__)
+
+ZONE_NAME = 'example.com'
+RECORD_COUNT = 10000
+RRSETS_PER_MESSAGE = 500
+CLOUDFLARE_ENDPOINT = 'https://api.cloudflare.test/client/v4'
+
+StubAccount = namedtuple('StubAccount', ('account_id', 'account_name', 'endpoint', 'email', 'api_key'))
+
+
+def get_soa(serial):
+    return dns.rrset.from_text(
+        '{}.'.format(ZONE_NAME), 3600, 'IN', 'SOA',
+        'ns1.{0}. hostmaster.{0}. {1} 3600 600 86400 300'.format(ZONE_NAME, serial)
+    )
+
+
+def get_ns():
+    return dns.rrset.from_text('{}.'.format(ZONE_NAME), 3600, 'IN', 'NS', 'ns1.{}.'.format(ZONE_NAME))
+
+
+def get_record(i):
+    return dns.rrset.from_text(
+        'host{}.{}.'.format(i, ZONE_NAME), 300, 'IN', 'A', '10.{}.{}.{}'.format(i >> 16 & 255, i >> 8 & 255, i & 255)
+    )
+
+
+class ZoneServer(object):
+    """Minimal authoritative DNS server answering zone transfer requests over TCP. Serial 2 of the zone contains
+    `count` records, and serial 1 differs by replacing the first record. IXFR requests for serial 1 are answered with
+    the difference, IXFR requests for serial 2 with only the SOA record, and any other request with the full zone
+    """
+    def __init__(self, count):
+        self.count = count
+        self.sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        self.sock.bind(('127.0.0.1', 0))
+        self.sock.listen(5)
+        self.port = self.sock.getsockname()[1]
+        threading.Thread(target=self.serve, daemon=True).start()
+
+    def serve(self):
+        while True:
+            conn, _ = self.sock.accept()
+            with conn:
+                length, = struct.unpack('!H', self.recv(conn, 2))
+                request = dns.message.from_wire(self.recv(conn, length))
+
+                for rrsets in self.get_answers(request):
+                    response = dns.message.make_response(request)
+                    response.answer = rrsets
+                    wire = response.to_wire()
+                    conn.sendall(struct.pack('!H', len(wire)) + wire)
+
+    def get_answers(self, request):
+        if request.authority and request.authority[0][0].serial == 2:
+            yield [get_soa(2)]
+            return
+
+        if request.authority and request.authority[0][0].serial == 1:
+            yield [get_soa(2), get_soa(1), get_record(0), get_soa(2), get_record(self.count), get_soa(2)]
+            return
+
+        # Messages are built as they are sent, so the memory used by the server does not skew the benchmark
+        yield [get_soa(2), get_ns()]
+        for i in range(1, self.count + 1, RRSETS_PER_MESSAGE):
+            yield [get_record(n) for n in range(i, min(i + RRSETS_PER_MESSAGE, self.count + 1))]
+        yield [get_soa(2)]
+
+    @staticmethod
+    def recv(conn, length):
+        data = b''
+        while len(data) < length:
+            data += conn.recv(length - len(data))
+
+        return data
+
+
+def get_zone_record_ids(port):
+    """Returns the record ids the way the DNS collector built them from `dns.zone` objects"""
+    z = dns.zone.from_xfr(dns.query.xfr('127.0.0.1', ZONE_NAME, port=port))
+    rdata_fields = ('name', 'ttl', 'rdata')
+    records = []
+    for rr in [dict(zip(rdata_fields, x)) for x in z.iterate_rdatas()]:
+        record_name = rr['name'].derelativize(z.origin).to_text()
+        records.append({
+            'id': get_resource_id('axfrr', record_name, ['{}={}'.format(k, str(v)) for k, v in rr.items()]),
+            'name': record_name
+        })
+
+    return {record['id'] for record in records}
+
+
+def get_streamed_record_ids(port):
+    transfer = ZoneTransfer('127.0.0.1', ZONE_NAME, port=port)
+    transfer.start()
+
+    return {record['id'] for record in transfer.records()}
+
+
+def measure(func, *args):
+    tracemalloc.start()
+    start = time.monotonic()
+    try:
+        result = func(*args)
+        return result, time.monotonic() - start, tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def test_zone_transfer_stream():
+    server = ZoneServer(RECORD_COUNT)
+
+    zone_ids, zone_time, zone_peak = measure(get_zone_record_ids, server.port)
+    stream_ids, stream_time, stream_peak = measure(get_streamed_record_ids, server.port)
+    logger.info('Zone transfer of {} records: dns.zone {:.2f}s / {} KiB peak, streaming {:.2f}s / {} KiB peak'.format(
+        RECORD_COUNT,
+        zone_time,
+        zone_peak // 1024,
+        stream_time,
+        stream_peak // 1024
+    ))
+
+    # Streaming must produce the same record ids, so existing records are not replaced when switching modes
+    assert len(stream_ids) == RECORD_COUNT + 2
+    assert stream_ids == zone_ids
+    assert stream_peak < zone_peak
+
+
+def test_zone_transfer_incremental():
+    server = ZoneServer(10)
+
+    transfer = ZoneTransfer('127.0.0.1', ZONE_NAME, serial=1, port=server.port)
+    transfer.start()
+    assert transfer.incremental
+    assert transfer.current_serial == 2
+
+    changes = [(added, record['name'], record['type']) for added, record in transfer.changes()]
+    assert changes == [
+        (False, '{}.'.format(ZONE_NAME), 'SOA'),
+        (False, 'host0.{}.'.format(ZONE_NAME), 'A'),
+        (True, '{}.'.format(ZONE_NAME), 'SOA'),
+        (True, 'host10.{}.'.format(ZONE_NAME), 'A')
+    ]
+
+    transfer = ZoneTransfer('127.0.0.1', ZONE_NAME, serial=2, port=server.port)
+    transfer.start()
+    assert transfer.up_to_date
+
+
+class StubResponse(object):
+    def __init__(self, status_code=200, headers=None, result=None, page=1, total_pages=1):
+        self.status_code = status_code
+        self.headers = headers or {}
+        self.text = 'status {}'.format(status_code)
+        self.data = {'result': result or [], 'result_info': {'page': page, 'total_pages': total_pages}}
+
+    def json(self):
+        return self.data
+
+
+class StubSession(object):
+    """Stub `requests.Session` for the CloudFlare API, with three pages of zones and two pages of records per zone.
+    Responses for a path can be overridden by queueing them in `responses`
+    """
+    def __init__(self, headers=None):
+        self.headers = headers or {}
+        self.requests = []
+        self.responses = {}
+        self.lock = threading.Lock()
+
+    def get(self, url, params=None):
+        path = url[len(CLOUDFLARE_ENDPOINT):]
+        with self.lock:
+            self.requests.append((path, dict(params)))
+            if self.responses.get(path):
+                return self.responses[path].pop(0)
+
+        page = params['page']
+        if path == '/zones':
+            zones = [
+                {'id': 'zone{}'.format(page * 10 + i), 'name': 'zone{}.test'.format(page * 10 + i)} for i in (1, 2)
+            ]
+            return StubResponse(headers=self.headers, result=zones, page=page, total_pages=3)
+
+        records = [{'name': 'host{}.test'.format(page), 'content': '10.0.0.{}'.format(page), 'type': 'A'}]
+        return StubResponse(headers=self.headers, result=records, page=page, total_pages=2)
+
+
+class StubTime(object):
+    def __init__(self):
+        self.sleeps = []
+
+    def sleep(self, seconds):
+        self.sleeps.append(seconds)
+
+
+def get_cloudflare_collector(session):
+    account = StubAccount(1, 'cloudflare', CLOUDFLARE_ENDPOINT, 'dns@example.com', 'key')
+    collector = DNSCollector()
+    collector.cloudflare_session[account.account_id] = session
+    collector.cloudflare_initialized[account.account_id] = True
+
+    return collector, account
+
+
+def test_cloudflare_pagination(cinq_test_service):
+    session = StubSession()
+    collector, account = get_cloudflare_collector(session)
+
+    zones = collector.get_cloudflare_records(account=account)
+
+    assert sorted(zone['name'] for zone in zones) == sorted(
+        'zone{}.test'.format(page * 10 + i) for page in (1, 2, 3) for i in (1, 2)
+    )
+    assert all([record['name'] for record in zone['records']] == ['host1.test', 'host2.test'] for zone in zones)
+
+    zone_pages = sorted(params['page'] for path, params in session.requests if path == '/zones')
+    assert zone_pages == [1, 2, 3]
+    assert all(
+        params['per_page'] == (CLOUDFLARE_ZONES_PER_PAGE if path == '/zones' else CLOUDFLARE_RECORDS_PER_PAGE)
+        for path, params in session.requests
+    )
+    assert len(session.requests) == 3 + len(zones) * 2
+
+
+def test_cloudflare_rate_limit_headers(cinq_test_service):
+    session = StubSession()
+    collector, account = get_cloudflare_collector(session)
+    collector.cloudflare_workers = 10
+    get_workers = collector._DNSCollector__get_cloudflare_workers
+
+    # Without rate limit information, all workers are used
+    collector.get_cloudflare_records(account=account)
+    assert account.account_id not in collector.cloudflare_ratelimit
+    assert get_workers(account) == 10
+
+    session.headers = {'RateLimit': '"default";r=100;t=240'}
+    collector.get_cloudflare_records(account=account)
+    assert collector.cloudflare_ratelimit[account.account_id] == 100
+    assert get_workers(account) == 5
+
+    # The RateLimit header takes precedence over the X-RateLimit-Remaining header
+    session.headers = {'RateLimit': '"default";r=1150;t=240', 'X-RateLimit-Remaining': '30'}
+    collector.get_cloudflare_records(account=account)
+    assert collector.cloudflare_ratelimit[account.account_id] == 1150
+    assert get_workers(account) == 10
+
+    session.headers = {'X-RateLimit-Remaining': '30'}
+    collector.get_cloudflare_records(account=account)
+    assert collector.cloudflare_ratelimit[account.account_id] == 30
+    assert get_workers(account) == 1
+
+
+def test_cloudflare_retry_after(cinq_test_service, monkeypatch):
+    stub_time = StubTime()
+    monkeypatch.setattr(cinq_collector_dns, 'time', stub_time)
+    session = StubSession(headers={'X-RateLimit-Remaining': '200'})
+    collector, account = get_cloudflare_collector(session)
+
+    # Rejected requests are retried after the delay requested by the API, or an exponential backoff
+    session.responses['/zones'] = [StubResponse(429, {'Retry-After': '7'}), StubResponse(429)]
+    zones = collector.get_cloudflare_records(account=account)
+
+    assert stub_time.sleeps == [7, 2]
+    assert len(zones) == 6
+    assert collector.cloudflare_ratelimit[account.account_id] == 200
+
+    # Requests still rejected after five attempts fail
+    session.responses['/zones'] = [StubResponse(429, {'Retry-After': '1'}) for _ in range(5)]
+    with pytest.raises(CloudFlareError):
+        collector.get_cloudflare_records(account=account)
+
+    assert collector.cloudflare_ratelimit[account.account_id] == 0
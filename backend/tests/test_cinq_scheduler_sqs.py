@@ -0,0 +1,360 @@
+import json
+import logging
+import time
+from collections import Counter
+from datetime import datetime, timedelta
+from uuid import uuid4
+
+from apscheduler.jobstores.sqlalchemy import SQLAlchemyJobStore
+from apscheduler.schedulers.background import BackgroundScheduler
+from cinq_scheduler_sqs import SQSScheduler
+from cloud_inquisitor.config import dbconfig, DBCInt, DBCString
+from cloud_inquisitor.constants import NS_SCHEDULER_SQS, SchedulerStatus
+from cloud_inquisitor.database import db
+from cloud_inquisitor.schema import Account
+from cloud_inquisitor.schema.base import SchedulerBatch, SchedulerJob
+from cloud_inquisitor.scheduling import DependencyTracker
+from tests.libs.util_cinq import aws_get_client, setup_test_aws
+from tests.libs.util_db import empty_tables
+from tests.libs.var_const import CINQ_TEST_REGION
+
+logger = logging.getLogger(__name__)
+
+STUB_ENTRY_POINT = {
+    'name': 'stub_worker',
+    'module_name': 'tests.test_cinq_scheduler_sqs',
+    'attrs': ('StubWorker',)
+}
+
+
+class StubWorker(object):
+    interval = 15
+    runs = []
+
+    def __init__(self, **kwargs):
+        self.kwargs = kwargs
+
+    def run(self):
+        StubWorker.runs.append(self.kwargs)
+
+
+class RequestCounter(object):
+    """Counts the SQS API operations made by a boto3 client"""
+    def __init__(self, client):
+        self.operations = Counter()
+        client.meta.events.register('before-call.sqs', self)
+
+    def __call__(self, model, **kwargs):
+        self.operations[model.name] += 1
+
+
+def get_scheduler(cinq_test_service):
+    cinq_test_service.start_mocking_services('sqs')
+    sqs = aws_get_client('sqs')
+
+    for name in ('job_queue', 'status_queue'):
+        queue = sqs.create_queue(QueueName='cinq-{}.fifo'.format(name), Attributes={'FifoQueue': 'true'})
+        dbconfig.set(NS_SCHEDULER_SQS, '{}_url'.format(name), DBCString(queue['QueueUrl']))
+
+    dbconfig.set(NS_SCHEDULER_SQS, 'queue_region', DBCString(CINQ_TEST_REGION))
+    dbconfig.set(NS_SCHEDULER_SQS, 'worker_wait_time', DBCInt(1))
+
+    scheduler = SQSScheduler()
+    return scheduler, RequestCounter(scheduler.job_queue.meta.client)
+
+
+def create_batch():
+    batch = SchedulerBatch()
+    batch.batch_id = str(uuid4())
+    batch.status = SchedulerStatus.PENDING
+    db.session.add(batch)
+    db.session.commit()
+
+    return batch.batch_id
+
+
+def receive_all(queue):
+    messages = []
+    while True:
+        batch = queue.receive_messages(MaxNumberOfMessages=10)
+        if not batch:
+            return messages
+
+        messages += batch
+        queue.delete_messages(Entries=[
+            {'Id': str(idx), 'ReceiptHandle': message.receipt_handle} for idx, message in enumerate(batch)
+        ])
+
+
+def test_send_worker_queue_batches(cinq_test_service):
+    scheduler, counter = get_scheduler(cinq_test_service)
+    batch_id = create_batch()
+
+    try:
+        for i in range(25):
+            scheduler.queue_worker_message(
+                batch_id=batch_id,
+                job_name='job{}'.format(i),
+                entry_point=STUB_ENTRY_POINT,
+                worker_args={'index': i}
+            )
+
+        # Full batches are sent as soon as they are queued
+        assert counter.operations['SendMessageBatch'] == 2
+
+        scheduler.flush_worker_queue()
+        assert counter.operations['SendMessageBatch'] == 3
+        assert counter.operations['SendMessage'] == 0
+
+        assert len(db.SchedulerJob.find(SchedulerJob.batch_id == batch_id)) == 25
+        assert len(receive_all(scheduler.job_queue)) == 25
+
+    finally:
+        empty_tables(SchedulerJob, SchedulerBatch)
+
+
+def test_execute_worker(cinq_test_service):
+    scheduler, counter = get_scheduler(cinq_test_service)
+    batch_id = create_batch()
+    StubWorker.runs = []
+
+    try:
+        # Long polling an empty queue, the worker does not need a delay before the next poll
+        assert scheduler.execute_worker()
+        assert not StubWorker.runs
+
+        scheduler.send_worker_queue_message(
+            batch_id=batch_id,
+            job_name='job',
+            entry_point=STUB_ENTRY_POINT,
+            worker_args={'index': 1}
+        )
+        job = db.SchedulerJob.find_one(SchedulerJob.batch_id == batch_id)
+
+        assert scheduler.execute_worker()
+        assert StubWorker.runs == [{'index': 1}]
+
+        # The started and completed statuses of the job are coalesced into a single update
+        scheduler.flush_status_messages()
+        assert counter.operations['SendMessageBatch'] == 2
+
+        scheduler.process_status_queue()
+        db.session.refresh(job)
+        assert job.status == SchedulerStatus.COMPLETED
+        assert db.SchedulerBatch.find_one(SchedulerBatch.batch_id == batch_id).status == SchedulerStatus.COMPLETED
+
+    finally:
+        empty_tables(SchedulerJob, SchedulerBatch)
+
+
+def test_status_coalescing(cinq_test_service):
+    scheduler, counter = get_scheduler(cinq_test_service)
+    job_ids = [str(uuid4()) for _ in range(5)]
+
+    for job_id in job_ids:
+        scheduler.send_status_message(job_id, SchedulerStatus.STARTED)
+        scheduler.send_status_message(job_id, SchedulerStatus.COMPLETED)
+
+    # A status is never replaced by an earlier status
+    scheduler.send_status_message(job_ids[0], SchedulerStatus.STARTED)
+    scheduler.flush_status_messages()
+
+    assert counter.operations['SendMessageBatch'] == 1
+    assert counter.operations['SendMessage'] == 0
+
+    messages = receive_all(scheduler.status_queue)
+    assert len(messages) == len(job_ids)
+    assert all('"status": {}'.format(SchedulerStatus.COMPLETED) in message.body for message in messages)
+
+    # Full batches are sent as soon as they are queued
+    for _ in range(15):
+        scheduler.send_status_message(str(uuid4()), SchedulerStatus.STARTED)
+
+    assert counter.operations['SendMessageBatch'] == 2
+    scheduler.flush_status_messages()
+    assert counter.operations['SendMessageBatch'] == 3
+    assert len(receive_all(scheduler.status_queue)) == 15
+
+
+def create_synthetic_batch(job_statuses, status=SchedulerStatus.PENDING, started=None):
+    """Bulk insert a batch with a job for each status in `job_statuses`, returning the batch id"""
+    batch_id = str(uuid4())
+    db.session.bulk_insert_mappings(SchedulerBatch, [{
+        'batch_id': batch_id,
+        'status': status,
+        'started': started or datetime.now()
+    }])
+    db.session.bulk_insert_mappings(SchedulerJob, [
+        {'job_id': str(uuid4()), 'batch_id': batch_id, 'status': job_status, 'data': {}}
+        for job_status in job_statuses
+    ])
+
+    return batch_id
+
+
+def get_batch_status(batch_id):
+    return db.session.query(SchedulerBatch.status).filter(SchedulerBatch.batch_id == batch_id).scalar()
+
+
+def test_update_job_statuses(cinq_test_service):
+    scheduler, _ = get_scheduler(cinq_test_service)
+    statuses = (SchedulerStatus.PENDING, SchedulerStatus.STARTED, SchedulerStatus.COMPLETED)
+    batch_id = create_synthetic_batch(statuses)
+    db.session.commit()
+
+    try:
+        jobs = {job.status: job.job_id for job in db.SchedulerJob.find(SchedulerJob.batch_id == batch_id)}
+        updated = scheduler.update_job_statuses({
+            jobs[SchedulerStatus.PENDING]: SchedulerStatus.COMPLETED,
+            # Statuses are never lowered, and completed jobs are never updated
+            jobs[SchedulerStatus.STARTED]: SchedulerStatus.PENDING,
+            jobs[SchedulerStatus.COMPLETED]: SchedulerStatus.FAILED
+        })
+        db.session.commit()
+
+        assert updated == 1
+        assert sorted(job.status for job in db.SchedulerJob.find(SchedulerJob.batch_id == batch_id)) == [
+            SchedulerStatus.STARTED,
+            SchedulerStatus.COMPLETED,
+            SchedulerStatus.COMPLETED
+        ]
+
+    finally:
+        empty_tables(SchedulerJob, SchedulerBatch)
+
+
+def test_update_batch_statuses_benchmark(cinq_test_service):
+    scheduler, _ = get_scheduler(cinq_test_service)
+    jobs_per_batch = 1000
+    stale = datetime.now() - timedelta(hours=3)
+
+    try:
+        batches = {
+            'completed': [
+                create_synthetic_batch([SchedulerStatus.COMPLETED] * (jobs_per_batch - 1) + [SchedulerStatus.FAILED])
+                for _ in range(10)
+            ],
+            'started': [
+                create_synthetic_batch([SchedulerStatus.PENDING, SchedulerStatus.STARTED] * (jobs_per_batch // 2))
+                for _ in range(10)
+            ],
+            'pending': [create_synthetic_batch([SchedulerStatus.PENDING] * jobs_per_batch) for _ in range(10)],
+            'stale': [
+                create_synthetic_batch(
+                    [SchedulerStatus.COMPLETED, SchedulerStatus.STARTED] * (jobs_per_batch // 2),
+                    status=SchedulerStatus.STARTED,
+                    started=stale
+                ) for _ in range(10)
+            ],
+            'empty': [create_synthetic_batch([])]
+        }
+        db.session.commit()
+
+        start = time.monotonic()
+        scheduler.update_batch_statuses()
+        db.session.commit()
+        logger.info('Updated {} batches with {} jobs in {:.2f}s'.format(
+            sum(len(x) for x in batches.values()),
+            40 * jobs_per_batch,
+            time.monotonic() - start
+        ))
+
+        expected = {
+            'completed': SchedulerStatus.COMPLETED,
+            'started': SchedulerStatus.STARTED,
+            'pending': SchedulerStatus.PENDING,
+            'stale': SchedulerStatus.ABORTED,
+            'empty': SchedulerStatus.COMPLETED
+        }
+        for name, batch_ids in batches.items():
+            assert all(get_batch_status(batch_id) == expected[name] for batch_id in batch_ids), name
+
+        # Open jobs of stale batches are aborted, completed jobs are kept
+        stale_jobs = Counter(
+            status for status, in db.session.query(SchedulerJob.status).filter(
+                SchedulerJob.batch_id.in_(batches['stale'])
+            )
+        )
+        assert stale_jobs == {
+            SchedulerStatus.COMPLETED: 10 * jobs_per_batch // 2,
+            SchedulerStatus.ABORTED: 10 * jobs_per_batch // 2
+        }
+
+    finally:
+        empty_tables(SchedulerJob, SchedulerBatch)
+
+
+def test_schedule_jobs_persistent(cinq_test_service):
+    account = setup_test_aws(cinq_test_service)['account']
+    scheduler, _ = get_scheduler(cinq_test_service)
+    jobstores = {'persistent': SQLAlchemyJobStore(engine=db.engine, tablename='scheduler_sqs_jobs')}
+    scheduler.scheduler = BackgroundScheduler(jobstores=jobstores)
+    scheduler.scheduler.start(paused=True)
+
+    try:
+        scheduler.schedule_jobs()
+        jobs = scheduler.list_current_jobs()
+        assert any(job.kwargs['worker_args'].get('account') == account.account_name for job in jobs.values())
+
+        # Without account or configuration changes, the jobs are not rebuilt
+        def load_plugins():
+            raise AssertionError('Jobs rebuilt without changes')
+
+        scheduler.load_plugins = load_plugins
+        scheduler.schedule_jobs()
+        del scheduler.load_plugins
+
+        # A restarted scheduler finds the jobs in the job store
+        restarted, _ = get_scheduler(cinq_test_service)
+        restarted.scheduler = scheduler.scheduler
+        assert set(restarted.list_current_jobs()) == set(jobs)
+
+        # Disabling the account removes its jobs
+        db.session.query(Account).filter(Account.account_id == account.account_id).update({'enabled': 0})
+        db.session.commit()
+        scheduler.schedule_jobs()
+
+        jobs = scheduler.list_current_jobs()
+        assert not any('account' in job.kwargs['worker_args'] for job in jobs.values())
+
+    finally:
+        scheduler.scheduler.remove_all_jobs()
+        scheduler.scheduler.shutdown(wait=False)
+        empty_tables(SchedulerJob, SchedulerBatch)
+
+
+def test_dependency_scheduling(cinq_test_service):
+    scheduler, _ = get_scheduler(cinq_test_service)
+    scheduler.dependencies = DependencyTracker(60)
+    scheduler.produced_types = {'stub_collector': {'aws_ec2_instance'}}
+    scheduler.consumed_types = {'stub_auditor': {'aws_ec2_instance'}}
+    collector = dict(STUB_ENTRY_POINT, name='stub_collector')
+    auditor = dict(STUB_ENTRY_POINT, name='stub_auditor')
+    batch_id = create_batch()
+
+    try:
+        scheduler.queue_worker_message(batch_id=batch_id, job_name='collector', entry_point=collector, worker_args={})
+        scheduler.flush_worker_queue()
+
+        # The auditor is held until the collector job has completed
+        scheduler.queue_worker_message(batch_id=batch_id, job_name='auditor', entry_point=auditor, worker_args={})
+        scheduler.flush_worker_queue()
+        messages = receive_all(scheduler.job_queue)
+        assert [json.loads(message.body)['job_name'] for message in messages] == ['collector']
+        assert scheduler.dependencies.held == 1
+
+        scheduler.send_status_message(json.loads(messages[0].body)['job_id'], SchedulerStatus.COMPLETED)
+        scheduler.flush_status_messages()
+        scheduler.process_status_queue()
+
+        messages = receive_all(scheduler.job_queue)
+        assert [json.loads(message.body)['job_name'] for message in messages] == ['auditor']
+        assert scheduler.dependencies.held == 0
+
+        scheduler.send_status_message(json.loads(messages[0].body)['job_id'], SchedulerStatus.COMPLETED)
+        scheduler.flush_status_messages()
+        scheduler.process_status_queue()
+        assert 'stub_auditor' in scheduler.dependencies.latencies[batch_id]
+
+    finally:
+        empty_tables(SchedulerJob, SchedulerBatch)
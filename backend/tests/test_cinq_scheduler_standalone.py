@@ -0,0 +1,169 @@
+import logging
+import multiprocessing
+import os
+import signal
+import time
+from collections import defaultdict
+
+from cinq_scheduler_standalone import StandaloneScheduler
+from cinq_scheduler_standalone.dispatcher import Job, JobDispatcher
+from cloud_inquisitor.config import dbconfig
+from cloud_inquisitor.plugins import Worker
+
+logger = logging.getLogger(__name__)
+
+JOB_DURATION = 0.05
+
+
+class StubCollector(object):
+    """Stub region collector, recording when each run started and ended"""
+    def __init__(self, duration=JOB_DURATION):
+        self.duration = duration
+        self.runs = multiprocessing.get_context('fork').Queue()
+
+    def __call__(self, job):
+        start = time.monotonic()
+        time.sleep(self.duration)
+        self.runs.put((job.kwargs['account'], job.kwargs['region'], start, time.monotonic()))
+
+    def get_runs(self, count):
+        return [self.runs.get(timeout=10) for _ in range(count)]
+
+
+def get_jobs(accounts, regions):
+    worker = Worker('Stub Region Collector', 15, {})
+    return [
+        Job(
+            'account{}_region{}'.format(account, region),
+            'execute_aws_region_worker',
+            worker,
+            {'account': 'account{}'.format(account), 'region': 'region{}'.format(region)}
+        ) for account in range(accounts) for region in range(regions)
+    ]
+
+
+def get_max_concurrency(runs):
+    """Returns the maximum number of runs executing at the same time for any single account"""
+    events = defaultdict(list)
+    for account, _, start, end in runs:
+        events[account] += [(start, 1), (end, -1)]
+
+    result = 0
+    for account_events in events.values():
+        running = 0
+        for _, change in sorted(account_events, key=lambda x: (x[0], x[1])):
+            running += change
+            result = max(result, running)
+
+    return result
+
+
+def run_benchmark(accounts, regions, workers, account_concurrency):
+    """Run `accounts` x `regions` stub collector jobs on the dispatcher, returning the elapsed time, the runs and the
+    dispatcher stats
+    """
+    collector = StubCollector()
+    dispatcher = JobDispatcher(collector, workers, account_concurrency, poll_interval=0.05)
+    dispatcher.start()
+
+    try:
+        jobs = get_jobs(accounts, regions)
+        start = time.monotonic()
+        for job in jobs:
+            dispatcher.dispatch(job)
+
+        assert dispatcher.join(timeout=30)
+        elapsed = time.monotonic() - start
+
+        return elapsed, collector.get_runs(len(jobs)), dispatcher.stats
+
+    finally:
+        dispatcher.shutdown()
+
+
+def test_dispatcher_benchmark():
+    for accounts, regions, workers in ((10, 4, 4), (2, 16, 8)):
+        elapsed, runs, stats = run_benchmark(accounts, regions, workers, account_concurrency=2)
+        logger.info('Dispatched {} accounts x {} regions on {} workers in {:.2f}s: {}'.format(
+            accounts,
+            regions,
+            workers,
+            elapsed,
+            stats
+        ))
+
+        assert len(runs) == accounts * regions
+        assert stats['completed'] == accounts * regions
+        assert get_max_concurrency(runs) <= 2
+
+
+def test_dispatcher_work_stealing():
+    # Both accounts are owned by at most two of the eight workers, the remaining workers must steal their jobs
+    elapsed, runs, stats = run_benchmark(accounts=2, regions=16, workers=8, account_concurrency=4)
+
+    logger.info('Dispatched 2 accounts x 16 regions on 8 workers in {:.2f}s: {}'.format(elapsed, stats))
+
+    assert len(runs) == 32
+    assert stats['stolen'] > 0
+    assert get_max_concurrency(runs) <= 4
+
+
+def test_dispatcher_skips_pending_jobs():
+    collector = StubCollector(duration=0.5)
+    dispatcher = JobDispatcher(collector, 1, poll_interval=0.05)
+    dispatcher.start()
+
+    try:
+        job = get_jobs(1, 1)[0]
+        assert dispatcher.dispatch(job)
+        assert not dispatcher.dispatch(job)
+        assert dispatcher.join(timeout=10)
+        assert dispatcher.dispatch(job)
+        assert dispatcher.join(timeout=10)
+
+    finally:
+        dispatcher.shutdown()
+
+
+def sleep_job(job):
+    time.sleep(job.kwargs['duration'])
+
+
+def test_dispatcher_restarts_dead_workers():
+    dispatcher = JobDispatcher(sleep_job, 1, poll_interval=0.05)
+    dispatcher.start()
+
+    try:
+        assert dispatcher.dispatch(Job('hung_job', 'sleep', None, {'duration': 60}))
+
+        deadline = time.monotonic() + 10
+        while dispatcher.stats['running'] == 0:
+            assert time.monotonic() < deadline
+            time.sleep(0.05)
+
+        worker = next(p for p in multiprocessing.active_children() if p.name == 'cinq-dispatcher-0')
+        os.kill(worker.pid, signal.SIGKILL)
+        worker.join(timeout=10)
+
+        # The job of the killed worker is no longer pending, and runs on the replacement worker
+        assert dispatcher.dispatch(Job('hung_job', 'sleep', None, {'duration': 0}))
+        assert dispatcher.join(timeout=10)
+
+        stats = dispatcher.stats
+        assert stats['restarted'] == 1
+        assert stats['completed'] == 1
+
+    finally:
+        dispatcher.shutdown()
+
+
+def test_scheduler_with_dispatcher(cinq_test_service):
+    dbconfig.set(StandaloneScheduler.ns, 'dispatcher_enabled', True)
+    try:
+        scheduler = StandaloneScheduler()
+        assert scheduler.pool is None
+        assert isinstance(scheduler.dispatcher, JobDispatcher)
+        assert scheduler.scheduler is not None
+
+    finally:
+        dbconfig.set(StandaloneScheduler.ns, 'dispatcher_enabled', False)
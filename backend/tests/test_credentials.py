@@ -0,0 +1,43 @@
+import cloud_inquisitor.credentials
+from cloud_inquisitor.credentials import CredentialBroker, FileCredentialStore
+from tests.libs.util_mocks import MockSession
+from tests.libs.var_const import CINQ_TEST_ACCOUNT_NO
+
+
+def get_local_session():
+    return MockSession('cinq-test-key', 'cinq-test-secret')
+
+
+def test_credential_broker(cinq_test_service, monkeypatch):
+    cinq_test_service.start_mocking_services('sts')
+    monkeypatch.setattr(cloud_inquisitor.credentials, 'get_local_aws_session', get_local_session)
+
+    broker = CredentialBroker()
+    sessions = [broker.get_session(CINQ_TEST_ACCOUNT_NO, 'cinq_role') for _ in range(5)]
+
+    # All sessions share the same credentials, but never the same session object
+    assert len({id(session) for session in sessions}) == 5
+    assert len({session.get_credentials().access_key for session in sessions}) == 1
+    assert broker.stats == {'hits': 4, 'misses': 1, 'refreshes': 0, 'cached': 1}
+
+    broker.get_session(CINQ_TEST_ACCOUNT_NO, 'other_role')
+    assert broker.misses == 2
+
+    broker.clear()
+    broker.get_session(CINQ_TEST_ACCOUNT_NO, 'cinq_role')
+    assert broker.stats == {'hits': 0, 'misses': 1, 'refreshes': 0, 'cached': 1}
+
+
+def test_credential_broker_shared_store(cinq_test_service, monkeypatch, tmpdir):
+    cinq_test_service.start_mocking_services('sts')
+    monkeypatch.setattr(cloud_inquisitor.credentials, 'get_local_aws_session', get_local_session)
+
+    store = FileCredentialStore(str(tmpdir.join('credentials.json')))
+    first = CredentialBroker(store=store).get_session(CINQ_TEST_ACCOUNT_NO, 'cinq_role')
+
+    # A broker in another process must pick up the credentials from the store, instead of assuming the role again
+    monkeypatch.setattr(cloud_inquisitor.credentials, 'get_local_aws_session', None)
+    second = CredentialBroker(store=store).get_session(CINQ_TEST_ACCOUNT_NO, 'cinq_role')
+
+    assert first.get_credentials().access_key == second.get_credentials().access_key
+    assert oct(tmpdir.join('credentials.json').stat().mode & 0o777) == oct(0o600)
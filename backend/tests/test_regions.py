@@ -0,0 +1,61 @@
+import json
+import time
+
+import cloud_inquisitor
+import requests
+from cloud_inquisitor.config import dbconfig, DBCInt, DBCString
+from cloud_inquisitor.database import db
+from cloud_inquisitor.plugins import BaseScheduler, Worker
+from cloud_inquisitor.plugins.types.resources import EC2Instance
+from tests.libs.util_cinq import setup_test_aws
+from tests.libs.util_db import create_resource
+from tests.libs.var_const import CINQ_TEST_ACCOUNT_NAME, CINQ_TEST_REGION
+
+
+class MockScheduler(BaseScheduler):
+    name = 'Mock Scheduler'
+
+    def execute_scheduler(self):
+        pass
+
+    def execute_worker(self):
+        pass
+
+
+def offline(*args, **kwargs):
+    raise requests.ConnectionError('Offline')
+
+
+def write_region_cache(path, regions, updated):
+    with open(path, 'w') as fh:
+        json.dump({'updated': updated, 'regions': regions}, fh)
+
+
+def test_region_cache(cinq_test_service, monkeypatch, tmpdir):
+    cache_file = str(tmpdir.join('regions.json'))
+    dbconfig.set('default', 'region_cache_file', DBCString(cache_file))
+    monkeypatch.setattr(cloud_inquisitor, '__regions', None)
+
+    # Fresh cache is used without downloading the AWS static data
+    monkeypatch.setattr(requests, 'get', offline)
+    write_region_cache(cache_file, [CINQ_TEST_REGION], int(time.time()))
+    assert cloud_inquisitor.get_aws_regions() == [CINQ_TEST_REGION]
+
+    # Expired cache is still used if the AWS static data is unreachable
+    write_region_cache(cache_file, ['us-east-1', CINQ_TEST_REGION], 0)
+    assert cloud_inquisitor.get_aws_regions(force=True) == ['us-east-1', CINQ_TEST_REGION]
+
+
+def test_empty_region_interval(cinq_test_service):
+    account = setup_test_aws(cinq_test_service)['account']
+    create_resource(EC2Instance, 'i-00000000000000001', account.account_id, properties={'state': 'running'})
+    db.session.commit()
+
+    dbconfig.set('default', 'empty_region_interval_multiplier', DBCInt(4))
+    scheduler = MockScheduler()
+    worker = Worker('AWS Region Collector', 15, {})
+    active_regions = scheduler.get_active_regions()
+
+    assert active_regions == {CINQ_TEST_ACCOUNT_NAME: {CINQ_TEST_REGION}}
+    assert scheduler.get_region_interval(worker, CINQ_TEST_ACCOUNT_NAME, CINQ_TEST_REGION, active_regions) == 15
+    assert scheduler.get_region_interval(worker, CINQ_TEST_ACCOUNT_NAME, 'eu-west-1', active_regions) == 60
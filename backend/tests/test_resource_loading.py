@@ -0,0 +1,46 @@
+from cloud_inquisitor.database import db, QueryCounter
+from cloud_inquisitor.plugins.types.resources import EC2Instance
+from tests.libs.util_cinq import setup_test_aws
+from tests.libs.util_db import create_resource
+
+
+def create_instances(account, start, count):
+    for i in range(start, start + count):
+        create_resource(
+            EC2Instance,
+            'i-{:017x}'.format(i),
+            account.account_id,
+            properties={'state': 'running', 'instance_type': 't2.micro'},
+            tags={'Name': 'instance-{}'.format(i), 'owner': 'owner@example.com'}
+        )
+
+    db.session.commit()
+
+
+def count_queries(account, **kwargs):
+    # Start from a fresh session, so nothing is served from the identity map
+    db.session.expunge_all()
+
+    with QueryCounter() as counter:
+        for instance in EC2Instance.get_all(account, **kwargs).values():
+            assert instance.state == 'running'
+            assert instance.get_tag('Name')
+
+    return counter.count
+
+
+def test_get_all_query_count(cinq_test_service):
+    account = setup_test_aws(cinq_test_service)['account']
+
+    create_instances(account, 0, 10)
+    small = count_queries(account)
+
+    create_instances(account, 10, 100)
+    large = count_queries(account)
+    lazy = count_queries(account, load_strategy='select')
+    subquery = count_queries(account, load_strategy='subquery')
+
+    # Eager loading must issue the same number of queries regardless of the number of resources
+    assert small == large
+    assert subquery == large
+    assert lazy > 100
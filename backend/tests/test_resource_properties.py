@@ -0,0 +1,70 @@
+import logging
+import timeit
+
+import pytest
+
+from cloud_inquisitor.plugins.types.resources import EC2Instance
+from cloud_inquisitor.schema import Resource, ResourceProperty, Tag
+
+logger = logging.getLogger(__name__)
+
+PROPERTY_COUNT = 200
+LOOKUPS = 100
+
+
+def get_transient_instance():
+    res = Resource()
+    res.resource_id = 'i-00000000000000001'
+
+    for i in range(PROPERTY_COUNT):
+        prop = ResourceProperty()
+        prop.resource_id = res.resource_id
+        prop.name = 'property_{}'.format(i)
+        prop.value = i
+        res.properties.append(prop)
+
+        res.tags.append(Tag(res.resource_id, 'Tag{}'.format(i), 'value-{}'.format(i)))
+
+    return EC2Instance(res)
+
+
+def linear_get_property(instance, name):
+    for prop in instance.resource.properties:
+        if prop.name == name:
+            return prop
+
+
+def test_property_index():
+    instance = get_transient_instance()
+    last = 'property_{}'.format(PROPERTY_COUNT - 1)
+
+    assert instance.get_property(last).value == PROPERTY_COUNT - 1
+    assert instance.get_tag('tag{}'.format(PROPERTY_COUNT - 1), case_sensitive=False).value == 'value-199'
+    assert all(
+        instance.get_property(prop.name) is linear_get_property(instance, prop.name)
+        for prop in instance.resource.properties
+    )
+
+    # The index must be kept in sync by the setters
+    assert instance.set_property('state', 'running', update_session=False)
+    assert instance.state == 'running'
+    assert not instance.set_property('state', 'running', update_session=False)
+    assert instance.delete_property('state', update_session=False)
+    assert not instance.delete_property('state', update_session=False)
+
+    assert instance.set_tag('Name', 'test', update_session=False)
+    assert instance.get_tag('name', case_sensitive=False).value == 'test'
+    assert instance.delete_tag('Name', update_session=False)
+    assert instance.get_tag('Name') is None
+    assert instance.get_tag('name', case_sensitive=False) is None
+
+
+@pytest.mark.benchmark
+def test_property_index_benchmark():
+    instance = get_transient_instance()
+    names = ['property_{}'.format(i) for i in range(0, PROPERTY_COUNT, PROPERTY_COUNT // LOOKUPS)]
+
+    indexed = timeit.timeit(lambda: [instance.get_property(name) for name in names], number=100)
+    linear = timeit.timeit(lambda: [linear_get_property(instance, name) for name in names], number=100)
+
+    logger.info('get_property: indexed {:.4f}s, linear scan {:.4f}s'.format(indexed, linear))
@@ -0,0 +1,187 @@
+import logging
+import time
+
+from cloud_inquisitor.database import db
+from cloud_inquisitor.plugins.types.resources import DNSRecord, DNSZone, EBSSnapshot, ResourceSync
+from tests.libs.util_cinq import setup_test_aws
+from tests.libs.util_db import create_resource
+from tests.libs.var_const import CINQ_TEST_REGION
+
+logger = logging.getLogger(__name__)
+
+RESOURCE_COUNT = 2000
+
+
+def get_snapshot_data(count, state, offset=0):
+    return {
+        'snap-{:017x}'.format(i): {
+            'properties': {
+                'encrypted': False,
+                'kms_key_id': None,
+                'state': state,
+                'state_message': None,
+                'volume_id': 'vol-{:017x}'.format(i),
+                'volume_size': 8
+            },
+            'tags': {'Name': 'snapshot-{}'.format(i), 'state': state}
+        } for i in range(offset, offset + count)
+    }
+
+
+def sync_per_object(account, snapshots):
+    """Synchronize the snapshots using the per-object ORM path the collectors used before `ResourceSync`"""
+    existing = EBSSnapshot.get_all(account, CINQ_TEST_REGION)
+
+    for resource_id, data in snapshots.items():
+        if resource_id in existing:
+            snapshot = existing[resource_id]
+            for name, value in data['properties'].items():
+                snapshot.set_property(name, value)
+
+            for key, value in data['tags'].items():
+                snapshot.set_tag(key, value)
+
+            for key in [tag.key for tag in snapshot.tags if tag.key not in data['tags']]:
+                snapshot.delete_tag(key)
+        else:
+            EBSSnapshot.create(
+                resource_id,
+                account_id=account.account_id,
+                location=CINQ_TEST_REGION,
+                properties=data['properties'],
+                tags=data['tags']
+            )
+
+    for resource_id in set(existing) - set(snapshots):
+        db.session.delete(existing[resource_id].resource)
+
+    db.session.commit()
+
+
+def sync_bulk(account, snapshots):
+    return ResourceSync(EBSSnapshot, account, CINQ_TEST_REGION).sync(snapshots)
+
+
+def get_db_state(account):
+    return {
+        resource_id: (
+            {name: value for name, (_, value) in data['properties'].items()},
+            {key: value for key, (_, value) in data['tags'].items()}
+        ) for resource_id, data in ResourceSync(EBSSnapshot, account, CINQ_TEST_REGION).load().items()
+    }
+
+
+def run_benchmark(account, sync_func):
+    # Initial load, then a cycle where half the snapshots changed and a quarter were deleted or replaced
+    initial = get_snapshot_data(RESOURCE_COUNT, 'pending')
+    updated = get_snapshot_data(RESOURCE_COUNT // 2, 'completed', offset=RESOURCE_COUNT // 4)
+    updated.update(get_snapshot_data(RESOURCE_COUNT // 2, 'pending', offset=RESOURCE_COUNT * 3 // 4))
+
+    timings = []
+    for snapshots in (initial, updated):
+        start = time.time()
+        sync_func(account, snapshots)
+        timings.append(time.time() - start)
+
+    return timings, get_db_state(account)
+
+
+def test_resource_sync(cinq_test_service):
+    account = setup_test_aws(cinq_test_service)['account']
+
+    per_object_timings, per_object_state = run_benchmark(account, sync_per_object)
+    cinq_test_service.reset_db_data()
+    bulk_timings, bulk_state = run_benchmark(account, sync_bulk)
+
+    logger.info('Per-object sync: create {:.2f}s, update {:.2f}s'.format(*per_object_timings))
+    logger.info('Bulk sync: create {:.2f}s, update {:.2f}s'.format(*bulk_timings))
+
+    assert len(bulk_state) == RESOURCE_COUNT
+    assert bulk_state == per_object_state
+
+
+def test_resource_sync_result(cinq_test_service):
+    account = setup_test_aws(cinq_test_service)['account']
+
+    result = sync_bulk(account, get_snapshot_data(10, 'pending'))
+    assert len(result.inserted) == 10
+    assert not result.updated and not result.deleted
+
+    snapshots = get_snapshot_data(5, 'completed')
+    del snapshots['snap-{:017x}'.format(0)]['tags']['Name']
+    result = sync_bulk(account, snapshots)
+    assert not result.inserted
+    assert len(result.updated) == 5
+    assert len(result.deleted) == 5
+
+    result = sync_bulk(account, snapshots)
+    assert not result.inserted and not result.updated and not result.deleted
+
+    snapshot = EBSSnapshot.get('snap-{:017x}'.format(0))
+    assert snapshot.state == 'completed'
+    assert snapshot.get_tag('Name') is None
+
+
+def test_resource_sync_digest(cinq_test_service):
+    account = setup_test_aws(cinq_test_service)['account']
+    sync = ResourceSync(EBSSnapshot, account, CINQ_TEST_REGION, digest_property='sync_digest')
+
+    result = sync.sync(get_snapshot_data(10, 'pending'))
+    assert len(result.inserted) == 10
+
+    result = sync.sync(get_snapshot_data(10, 'pending'))
+    assert len(result.unchanged) == 10
+    assert not result.inserted and not result.updated and not result.deleted
+
+    snapshots = get_snapshot_data(9, 'pending')
+    snapshots['snap-{:017x}'.format(0)]['properties']['state'] = 'completed'
+    result = sync.sync(snapshots)
+    assert result.updated == {'snap-{:017x}'.format(0)}
+    assert result.deleted == {'snap-{:017x}'.format(9)}
+    assert len(result.unchanged) == 8
+
+    snapshot = EBSSnapshot.get('snap-{:017x}'.format(0))
+    assert snapshot.state == 'completed'
+    assert snapshot.get_property('sync_digest').value == sync.get_digest(snapshots['snap-{:017x}'.format(0)])
+    assert 'syncDigest' not in snapshot.to_json()['properties']
+
+
+def test_resource_sync_stream(cinq_test_service):
+    account = setup_test_aws(cinq_test_service)['account']
+    sync = ResourceSync(EBSSnapshot, account, CINQ_TEST_REGION, batch_size=7)
+
+    sync_bulk(account, get_snapshot_data(50, 'pending'))
+    snapshots = get_snapshot_data(40, 'completed', offset=20)
+    pages = [dict(list(snapshots.items())[i:i + 10]) for i in range(0, 40, 10)]
+
+    result = sync.sync_stream(iter(pages))
+    assert len(result.inserted) == 10
+    assert len(result.updated) == 30
+    assert len(result.deleted) == 20
+
+    assert get_db_state(account) == {
+        resource_id: (data['properties'], data['tags']) for resource_id, data in snapshots.items()
+    }
+
+
+def test_resource_sync_children(cinq_test_service):
+    account = setup_test_aws(cinq_test_service)['account']
+    create_resource(DNSZone, 'cfz-test', account.account_id, properties={'domain_name': 'example.com'}, location=None)
+    db.session.commit()
+
+    sync = ResourceSync(DNSRecord, account, batch_size=3)
+    records = {
+        'cfr-{}'.format(i): {'properties': {'name': 'host{}.example.com'.format(i), 'type': 'A'}, 'tags': {}}
+        for i in range(10)
+    }
+    sync.sync(records, delete=False, auto_commit=False)
+    sync.add_children('cfz-test', records)
+    db.session.commit()
+
+    assert sync.load_children(['cfz-test', 'cfz-other']) == {'cfz-test': set(records), 'cfz-other': set()}
+
+    sync.delete(['cfr-0', 'cfr-1'])
+    db.session.commit()
+
+    assert sync.load_children(['cfz-test'])['cfz-test'] == set(records) - {'cfr-0', 'cfr-1'}
+    assert len(DNSZone.get('cfz-test').records) == 8
@@ -0,0 +1,112 @@
+import os
+import signal
+import threading
+import time
+from collections import Counter
+
+import pytest
+
+from cloud_inquisitor.exceptions import SchedulerError
+from cloud_inquisitor.runtime import AsyncWorkerRuntime
+
+JOB_DURATION = 0.1
+
+
+class StubScheduler(object):
+    """Scheduler handing out a fixed list of jobs, recording how many jobs of each type run at the same time"""
+    name = 'Stub Scheduler'
+    supports_runtime = True
+
+    def __init__(self, jobs, on_empty=None, barriers=None):
+        self.jobs = list(jobs)
+        self.on_empty = on_empty
+        self.barriers = barriers or {}
+        self.completed = []
+        self.running = Counter()
+        self.max_running = Counter()
+        self.lock = threading.Lock()
+
+    def get_worker_job(self):
+        with self.lock:
+            if self.jobs:
+                return self.jobs.pop(0)
+
+        self.on_empty()
+        return None
+
+    def run_worker_job(self, job):
+        job_type = job['type']
+        with self.lock:
+            self.running[job_type] += 1
+            self.running['total'] += 1
+            self.max_running[job_type] = max(self.max_running[job_type], self.running[job_type])
+            self.max_running['total'] = max(self.max_running['total'], self.running['total'])
+
+        # Jobs with a barrier only complete if enough jobs of the same type are running at the same time
+        if job_type in self.barriers:
+            self.barriers[job_type].wait(timeout=10)
+        time.sleep(JOB_DURATION)
+
+        with self.lock:
+            self.running[job_type] -= 1
+            self.running['total'] -= 1
+            self.completed.append(job)
+
+        return not job.get('fail')
+
+
+def get_jobs(job_type, count):
+    return [(job_type, {'type': job_type, 'index': i}) for i in range(count)]
+
+
+def test_runtime_concurrency():
+    jobs = get_jobs('collector_aws_region', 40) + get_jobs('collector_aws_account', 10)
+    jobs.append(('auditor_ebs', {'type': 'auditor_ebs', 'fail': True}))
+
+    # Jobs run concurrently, instead of one after the other, or the region jobs fail waiting for each other
+    scheduler = StubScheduler(jobs, barriers={'collector_aws_region': threading.Barrier(4)})
+    runtime = AsyncWorkerRuntime(scheduler, 20, {'collector_aws_account': 2}, delay=0)
+    scheduler.on_empty = runtime.stop
+
+    runtime.run()
+
+    assert len(scheduler.completed) == len(jobs)
+    assert scheduler.max_running['total'] <= 20
+    assert scheduler.max_running['collector_aws_account'] <= 2
+
+    stats = {job_type: stats.to_json() for job_type, stats in runtime.stats.items()}
+    assert stats['collector_aws_region']['completed'] == 40
+    assert stats['collector_aws_account']['completed'] == 10
+    assert stats['collector_aws_account']['avgWaitTime'] > 0
+    assert stats['auditor_ebs']['failed'] == 1
+    assert all(x['running'] == 0 and x['waiting'] == 0 for x in stats.values())
+
+
+def test_runtime_drain_on_sigterm():
+    scheduler = StubScheduler(get_jobs('collector_aws_region', 5) + get_jobs('collector_dns', 100))
+    runtime = AsyncWorkerRuntime(scheduler, 5, delay=0)
+
+    # Send SIGTERM as soon as the first job is running
+    def on_first_job(job):
+        os.kill(os.getpid(), signal.SIGTERM)
+        scheduler.run_worker_job = run_worker_job
+        return run_worker_job(job)
+
+    run_worker_job = scheduler.run_worker_job
+    scheduler.run_worker_job = on_first_job
+    scheduler.on_empty = runtime.stop
+
+    runtime.run()
+
+    # Jobs already retrieved when the signal was received still complete
+    assert 0 < len(scheduler.completed) <= 10
+    assert scheduler.running['total'] == 0
+    assert sum(stats.completed for stats in runtime.stats.values()) == len(scheduler.completed)
+
+
+def test_runtime_unsupported_scheduler():
+    scheduler = StubScheduler([])
+    scheduler.supports_runtime = False
+
+    with pytest.raises(SchedulerError):
+        AsyncWorkerRuntime(scheduler)
@@ -0,0 +1,56 @@
+import time
+
+from cloud_inquisitor.scheduling import DependencyTracker
+
+COLLECTORS = {'collector_aws_region', 'collector_aws_account'}
+
+
+def test_hold_and_release():
+    tracker = DependencyTracker(60)
+
+    # Without any queued collector jobs, auditors are not held
+    assert not tracker.hold('audit0', 'auditor_domain_hijacking', COLLECTORS)
+
+    tracker.job_queued('region1', 'collector_aws_region')
+    tracker.job_queued('region2', 'collector_aws_region')
+    tracker.job_queued('dns1', 'collector_dns')
+
+    assert tracker.hold('audit1', 'auditor_domain_hijacking', COLLECTORS)
+    assert tracker.held == 1
+
+    # Collector jobs the auditor does not depend on do not release it
+    assert tracker.job_finished('dns1') == []
+    assert tracker.job_finished('region1') == []
+
+    # Collector jobs queued after the auditor was held are not waited for
+    tracker.job_queued('region3', 'collector_aws_region')
+
+    released = tracker.job_finished('region2')
+    assert [held.job for held in released] == ['audit1']
+    assert tracker.held == 0
+
+
+def test_latency():
+    tracker = DependencyTracker(60)
+    tracker.job_queued('region1', 'collector_aws_region')
+    assert tracker.hold('audit1', 'auditor_ebs', COLLECTORS)
+
+    held, = tracker.job_finished('region1')
+    tracker.audit_queued('job1', held.job_type, 'batch1', held.collect_start)
+    tracker.job_finished('job1')
+
+    assert list(tracker.latencies) == ['batch1']
+    assert 0 <= tracker.latencies['batch1']['auditor_ebs'] < 1
+
+
+def test_release_expired():
+    tracker = DependencyTracker(0.1)
+    tracker.job_queued('region1', 'collector_aws_region')
+    assert tracker.hold('audit1', 'auditor_ebs', COLLECTORS)
+    assert tracker.release_expired() == []
+
+    time.sleep(0.2)
+    assert [held.job for held in tracker.release_expired()] == ['audit1']
+
+    # Collector jobs which never finished are no longer waited for
+    assert not tracker.hold('audit2', 'auditor_ebs', COLLECTORS)
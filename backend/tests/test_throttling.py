@@ -0,0 +1,33 @@
+import cloud_inquisitor.throttling
+from cloud_inquisitor.throttling import AdaptiveRateLimiter, get_rate_limiter, get_rate_limiter_stats
+
+
+def test_adaptive_rate_limiter():
+    limiter = AdaptiveRateLimiter(20, min_rate=1)
+
+    # Throttles in quick succession only reduce the rate once
+    limiter.throttled()
+    limiter.throttled()
+    assert limiter.rate == 10
+    assert limiter.throttles_per_minute == 2
+
+    # Successful calls increase the rate again, but never above the maximum rate
+    for _ in range(60):
+        limiter.succeeded()
+    assert limiter.rate == 20
+
+
+def test_rate_limiter_stats(cinq_test_service, monkeypatch):
+    # Start from an empty registry, as the rate limiters are shared by everything running in the process
+    monkeypatch.setattr(cloud_inquisitor.throttling, '__limiters', {})
+
+    limiter = get_rate_limiter('123456789012', 'us-west-2', 'ec2')
+    assert get_rate_limiter('123456789012', 'us-west-2', 'ec2') is limiter
+
+    limiter.throttled()
+    stats = get_rate_limiter_stats('123456789012', 'us-west-2')
+
+    assert len(stats) == 1
+    assert stats[0]['service'] == 'ec2'
+    assert stats[0]['rate'] == stats[0]['maxRate'] / 2
+    assert stats[0]['throttlesPerMinute'] == 1
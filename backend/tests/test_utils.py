@@ -0,0 +1,46 @@
+import cloud_inquisitor.utils
+from cloud_inquisitor.utils import RateLimiter
+
+
+class FakeClock(object):
+    """Replacement for the `time` module used by the rate limiter, advancing the clock only when sleeping"""
+    def __init__(self):
+        self.now = 0.0
+        self.sleeps = []
+
+    def monotonic(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.sleeps.append(seconds)
+        self.now += seconds
+
+
+def test_rate_limiter(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(cloud_inquisitor.utils, 'time', clock)
+    limiter = RateLimiter(20, burst=5)
+
+    for _ in range(25):
+        limiter.acquire()
+
+    # The first 5 calls are allowed immediately, the remaining 20 at 20 calls per second
+    assert len(clock.sleeps) == 20
+    assert abs(clock.now - 1.0) < 1e-9
+
+    # After being idle, a burst of calls is allowed again
+    clock.now += 10
+    for _ in range(5):
+        limiter.acquire()
+    assert len(clock.sleeps) == 20
+
+
+def test_rate_limiter_disabled(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(cloud_inquisitor.utils, 'time', clock)
+    limiter = RateLimiter(0)
+
+    for _ in range(1000):
+        limiter.acquire()
+
+    assert not clock.sleeps
@@ -13,7 +13,9 @@ from cloud_inquisitor.constants import (
 from cloud_inquisitor.database import db
 from cloud_inquisitor.plugins import BaseAuditor
 from cloud_inquisitor.plugins.types.issues import DomainHijackIssue
-from cloud_inquisitor.plugins.types.resources import EC2Instance, S3Bucket, CloudFrontDist, DNSZone, BeanStalk
+from cloud_inquisitor.plugins.types.resources import (
+    EC2Instance, S3Bucket, CloudFrontDist, DNSZone, DNSRecord, BeanStalk
+)
 from cloud_inquisitor.utils import (
     get_template,
     parse_bucket_info,
@@ -33,6 +35,12 @@ class DomainHijackAuditor(BaseAuditor):
     name = 'Domain Hijacking'
     ns = NS_AUDITOR_DOMAIN_HIJACKING
     interval = dbconfig.get('interval', ns, 30)
+    consumes = (
+        EC2Instance.resource_type, S3Bucket.resource_type, CloudFrontDist.resource_type, DNSZone.resource_type,
+        DNSRecord.resource_type, BeanStalk.resource_type
+    )
+    # Hijackable domains are a critical finding, audit them ahead of other jobs
+    priority = 10
     options = (
         ConfigOption('enabled', False, 'bool', 'Enable the Domain Hijacking auditor'),
         ConfigOption('interval', 30, 'int', 'Run frequency in minutes'),
@@ -60,7 +68,7 @@ class DomainHijackAuditor(BaseAuditor):
             None
         """
         try:
-            zones = list(DNSZone.get_all().values())
+            zones = list(DNSZone.get_all(load_relations=True).values())
             buckets = {k.lower(): v for k, v in S3Bucket.get_all().items()}
             dists = list(CloudFrontDist.get_all().values())
             ec2_public_ips = [x.public_ip for x in EC2Instance.get_all().values() if x.public_ip]
@@ -1,6 +1,6 @@
 import datetime
 import time
-from datetime import datetime
+from datetime import datetime, timedelta
 
 import pytimeparse
 from cinq_auditor_required_tags.providers import process_action
@@ -11,7 +11,13 @@ from cloud_inquisitor.constants import NS_AUDITOR_REQUIRED_TAGS, NS_GOOGLE_ANALY
 from cloud_inquisitor.database import db
 from cloud_inquisitor.plugins import BaseAuditor
 from cloud_inquisitor.plugins.types.issues import RequiredTagsIssue
-from cloud_inquisitor.utils import validate_email, get_resource_id, send_notification, get_template, NotificationContact
+from cloud_inquisitor.plugins.types.resources import record_resource_changes
+from cloud_inquisitor.schema import Account, Resource, ResourceChange, ResourceChangeWatermark, ResourceType, Tag
+from cloud_inquisitor.utils import (
+    validate_email, get_resource_id, send_notification, get_template, NotificationContact, chunks, get_hash
+)
+from sqlalchemy import and_, distinct, exists, func
+from sqlalchemy.orm import aliased
 
 
 class RequiredTagsAuditor(BaseAuditor):
@@ -57,6 +63,8 @@ class RequiredTagsAuditor(BaseAuditor):
         ),
         ConfigOption('audit_ignore_tag', 'cinq_ignore', 'string', 'Do not audit resources have this tag set'),
         ConfigOption('always_send_email', True, 'bool', 'Send emails even in collect mode'),
+        ConfigOption('change_log_lag', 300, 'int', 'Time in seconds to wait for missing entries of the resource change '
+                     'log, recorded by transactions which had not committed yet, before skipping them'),
         ConfigOption('collect_only', True, 'bool', 'Do not shutdown instances, only update caches'),
         ConfigOption('confirm_shutdown', True, 'bool', 'Require manual confirmation before shutting down instances'),
         ConfigOption('email_subject', 'Required tags audit notification', 'string',
@@ -64,11 +72,17 @@ class RequiredTagsAuditor(BaseAuditor):
         ConfigOption('enabled', False, 'bool', 'Enable the Required Tags auditor'),
         ConfigOption('enable_delete_s3_buckets', True, 'bool',
                      'Enable actual S3 bucket deletion. This might make you vulnerable to domain hijacking'),
+        ConfigOption('full_audit_interval', 24, 'int', 'Time in hours between audits of all resources when only '
+                     'auditing changed resources'),
         ConfigOption('grace_period', 4, 'int', 'Only audit resources X minutes after being created'),
+        ConfigOption('incremental_audit', True, 'bool', 'Only audit the resources changed since the previous audit, '
+                     'if the resource change log is enabled'),
         ConfigOption('interval', 30, 'int', 'How often the auditor executes, in minutes.'),
         ConfigOption('partial_owner_match', True, 'bool', 'Allow partial matches of the Owner tag'),
         ConfigOption('permanent_recipient', [], 'array', 'List of email addresses to receive all alerts'),
         ConfigOption('required_tags', ['owner', 'accounting', 'name'], 'array', 'List of required tags'),
+        ConfigOption('sql_evaluation', True, 'bool', 'Find resources missing required tags in the database, only '
+                     'loading the non-compliant resources instead of every resource'),
         ConfigOption('lifecycle_expiration_days', 3, 'int',
                      'How many days we should set in the bucket policy for non-empty S3 buckets removal'),
         ConfigOption('gdpr_enabled', False, 'bool', 'Enable auditing for GDPR compliance'),
@@ -77,6 +91,15 @@ class RequiredTagsAuditor(BaseAuditor):
         ConfigOption('gdpr_tag_values', ['pending', 'v1'], 'array', 'List of valid values for GDPR compliance tag')
     )
 
+    @classmethod
+    def get_consumed_types(cls):
+        """Returns the resource types enabled in the `audit_scope` option
+
+        Returns:
+            `set` of `str`
+        """
+        return set(dbconfig.get('audit_scope', cls.ns, {'enabled': []})['enabled'])
+
     def __init__(self):
         super().__init__()
         self.log.debug('Starting RequiredTags auditor')
@@ -102,6 +125,10 @@ class RequiredTagsAuditor(BaseAuditor):
         self.gdpr_accounts = dbconfig.get('gdpr_accounts', self.ns, [])
         self.gdpr_tag = dbconfig.get('gdpr_tag', self.ns, 'gdpr_compliance')
         self.gdpr_tag_values = dbconfig.get('gdpr_tag_values', self.ns, ['pending', 'v1'])
+        self.sql_evaluation = dbconfig.get('sql_evaluation', self.ns, True)
+        self.incremental_audit = dbconfig.get('incremental_audit', self.ns, True)
+        self.full_audit_interval = dbconfig.get('full_audit_interval', self.ns, 24)
+        self.change_log_lag = dbconfig.get('change_log_lag', self.ns, 300)
         self.resource_classes = {resource.resource_type: resource for resource in map(
             lambda plugin: plugin.load(),
             CINQ_PLUGINS['cloud_inquisitor.plugins.types']['plugins']
@@ -128,7 +155,7 @@ class RequiredTagsAuditor(BaseAuditor):
         notifications = self.process_actions(actions)
         self.notify(notifications)
 
-    def get_known_resources_missing_tags(self):
+    def get_known_resources_missing_tags(self, resource_ids=None):
         non_compliant_resources = {}
         audited_types = dbconfig.get('audit_scope', NS_AUDITOR_REQUIRED_TAGS, {'enabled': []})['enabled']
 
@@ -136,7 +163,16 @@ class RequiredTagsAuditor(BaseAuditor):
             # resource_info is a tuple with the resource typename as [0] and the resource class as [1]
             resources = filter(lambda resource_info: resource_info[0] in audited_types, self.resource_classes.items())
             for resource_name, resource_class in resources:
-                for resource_id, resource in resource_class.get_all().items():
+                if resource_ids is not None:
+                    candidates = {}
+                    for batch in chunks(sorted(resource_ids), 1000):
+                        candidates.update(resource_class.get_all(resource_ids=batch))
+                elif self.sql_evaluation:
+                    candidates = self.get_candidate_resources(resource_class)
+                else:
+                    candidates = resource_class.get_all()
+
+                for resource_id, resource in candidates.items():
                     missing_tags, notes = self.check_required_tags_compliance(resource)
                     if missing_tags:
                         # Not really a get, it generates a new resource ID
@@ -152,13 +188,227 @@ class RequiredTagsAuditor(BaseAuditor):
             db.session.rollback()
         return non_compliant_resources
 
+    def get_candidate_resources(self, resource_class):
+        """Returns the resources of a type which may not be compliant, evaluating the required tags in the database.
+
+        Resources missing any required tag are found with a GROUP BY over their tags, and the values of the tags
+        requiring validation are loaded as plain rows and validated once per distinct value. Only these candidates are
+        loaded as resource objects, to be checked with :meth:`check_required_tags_compliance`
+
+        Args:
+            resource_class: Resource class to audit
+
+        Returns:
+            `dict` of `str`: `object`
+        """
+        if resource_class.resource_type in self.alert_schedule:
+            target_accounts = self.alert_schedule[resource_class.resource_type]['scope']
+        else:
+            target_accounts = self.alert_schedule['*']['scope']
+
+        tag_key = func.lower(Tag.key)
+        ignore_tag = aliased(Tag)
+        base_qry = db.session.query(Resource.resource_id).join(
+            Account, Resource.account_id == Account.account_id
+        ).filter(
+            Resource.resource_type_id == ResourceType.get(resource_class.resource_type).resource_type_id,
+            Account.enabled == 1,
+            ~exists().where(and_(
+                ignore_tag.resource_id == Resource.resource_id,
+                func.lower(ignore_tag.key) == self.audit_ignore_tag.lower()
+            ))
+        )
+
+        if '*' not in target_accounts:
+            base_qry = base_qry.filter(Account.account_name.in_(target_accounts))
+
+        # Accounts requiring GDPR compliance have an additional required tag
+        required_tags = [tag.lower() for tag in self.required_tags]
+        if self.gdpr_enabled and self.gdpr_accounts:
+            account_groups = [
+                (required_tags + [self.gdpr_tag.lower()], Account.account_name.in_(self.gdpr_accounts)),
+                (required_tags, ~Account.account_name.in_(self.gdpr_accounts))
+            ]
+        else:
+            account_groups = [(required_tags, None)]
+
+        candidates = set()
+        valid_values = {}
+        for keys, account_filter in account_groups:
+            keys = sorted(set(keys))
+            qry = base_qry if account_filter is None else base_qry.filter(account_filter)
+
+            missing = qry.outerjoin(
+                Tag, and_(Tag.resource_id == Resource.resource_id, tag_key.in_(keys))
+            ).group_by(
+                Resource.resource_id
+            ).having(
+                func.count(distinct(tag_key)) < len(keys)
+            )
+            candidates.update(resource_id for resource_id, in missing)
+
+            validated_keys = [key for key in keys if key == 'owner' or key == self.gdpr_tag.lower()]
+            if validated_keys:
+                values = qry.join(
+                    Tag, Tag.resource_id == Resource.resource_id
+                ).filter(
+                    tag_key.in_(validated_keys)
+                ).with_entities(Resource.resource_id, tag_key, Tag.value)
+
+                for resource_id, key, value in values:
+                    if (key, value) not in valid_values:
+                        valid_values[(key, value)] = self.validate_tag(key, value)
+
+                    if not valid_values[(key, value)]:
+                        candidates.add(resource_id)
+
+        resources = {}
+        for resource_ids in chunks(sorted(candidates), 1000):
+            resources.update(resource_class.get_all(resource_ids=resource_ids))
+
+        self.log.debug('Found {} {} resources which may be missing required tags'.format(
+            len(resources),
+            resource_class.resource_type
+        ))
+        return resources
+
+    def get_changed_resources(self, last_change_id):
+        """Returns the IDs of the resources changed since the previous audit, up to and including `last_change_id`, or
+        `None` if all resources must be audited. All resources are audited when incremental auditing or the resource
+        change log is disabled, the auditor configuration or the enabled accounts have changed, or when
+        `full_audit_interval` hours have passed since the last full audit
+
+        Args:
+            last_change_id (`int`): ID of the last entry of the resource change log to include
+
+        Returns:
+            `set` of `str`
+        """
+        if not self.incremental_audit or not dbconfig.get('resource_change_log', default=False):
+            return None
+
+        watermark = db.ResourceChangeWatermark.find_one(ResourceChangeWatermark.consumer == self.ns)
+        if not watermark:
+            return None
+
+        if watermark.state != self.get_audit_state():
+            self.log.info('Configuration or accounts changed since the last audit, auditing all resources')
+            return None
+
+        if watermark.full_audit < datetime.now() - timedelta(hours=self.full_audit_interval):
+            return None
+
+        qry = db.session.query(ResourceChange.resource_id).filter(
+            ResourceChange.change_id > watermark.change_id,
+            ResourceChange.change_id <= last_change_id
+        ).distinct()
+
+        return {resource_id for resource_id, in qry}
+
+    def get_settled_change_id(self, last_change_id):
+        """Returns the ID of the last entry of the resource change log, up to `last_change_id`, which every earlier
+        entry is known to have been committed for. Change IDs are assigned when the change is recorded, but only become
+        visible once the transaction commits, so a change can become visible after changes with a higher ID were
+        already read. The watermark is only advanced across consecutive change IDs, or across a missing ID once the
+        change following it was recorded at least `change_log_lag` seconds ago, as IDs of rolled back transactions are
+        never used
+
+        Args:
+            last_change_id (`int`): ID of the last entry of the resource change log read
+
+        Returns:
+            `int`
+        """
+        if not self.change_log_lag:
+            return last_change_id
+
+        watermark = db.ResourceChangeWatermark.find_one(ResourceChangeWatermark.consumer == self.ns)
+        settled_change_id = watermark.change_id if watermark else 0
+        settled_time = datetime.now() - timedelta(seconds=self.change_log_lag)
+
+        qry = db.session.query(ResourceChange.change_id, ResourceChange.created).filter(
+            ResourceChange.change_id > settled_change_id,
+            ResourceChange.change_id <= last_change_id
+        ).order_by(ResourceChange.change_id)
+
+        for change_id, created in qry:
+            if change_id != settled_change_id + 1 and created >= settled_time:
+                break
+
+            settled_change_id = change_id
+
+        return settled_change_id
+
+    def get_audit_state(self):
+        """Returns a hash of the settings and enabled accounts the audit results depend on. Any change requires a full
+        audit, as resources which have not changed might have become compliant or non-compliant
+
+        Returns:
+            `str`
+        """
+        accounts = db.session.query(Account.account_name).filter(Account.enabled == 1).order_by(Account.account_name)
+
+        return get_hash((
+            self.required_tags,
+            self.audit_ignore_tag,
+            self.alert_schedule,
+            dbconfig.get('audit_scope', NS_AUDITOR_REQUIRED_TAGS, {'enabled': []})['enabled'],
+            self.partial_owner_match,
+            self.gdpr_enabled,
+            self.gdpr_accounts,
+            self.gdpr_tag,
+            self.gdpr_tag_values,
+            [account_name for account_name, in accounts]
+        ))
+
+    def update_watermark(self, last_change_id, full_audit):
+        """Store the last entry of the resource change log processed, and remove the entries processed by every
+        consumer of the change log. The watermark is never moved back. The transaction is not committed
+
+        Args:
+            last_change_id (`int`): ID of the last entry of the resource change log processed, see
+            :meth:`get_settled_change_id`
+            full_audit (`bool`): `True` if all resources were audited
+
+        Returns:
+            `None`
+        """
+        watermark = db.ResourceChangeWatermark.find_one(ResourceChangeWatermark.consumer == self.ns)
+        if not watermark:
+            watermark = ResourceChangeWatermark()
+            watermark.consumer = self.ns
+            watermark.change_id = 0
+
+        watermark.change_id = max(watermark.change_id, last_change_id)
+        if full_audit:
+            watermark.full_audit = datetime.now()
+            watermark.state = self.get_audit_state()
+        db.session.add(watermark)
+
+        processed = db.session.query(func.min(ResourceChangeWatermark.change_id)).scalar()
+        db.session.query(ResourceChange).filter(
+            ResourceChange.change_id <= processed
+        ).delete(synchronize_session=False)
+
     def get_resources(self):
-        found_issues = self.get_known_resources_missing_tags()
+        last_change_id = db.session.query(func.max(ResourceChange.change_id)).scalar() or 0
+        settled_change_id = self.get_settled_change_id(last_change_id)
+        changed_resources = self.get_changed_resources(last_change_id)
+        if changed_resources is not None:
+            self.log.info('Auditing {} resources changed since the previous audit'.format(len(changed_resources)))
+            changed_issues = {get_resource_id('reqtag', resource_id) for resource_id in changed_resources}
+
+        found_issues = self.get_known_resources_missing_tags(changed_resources)
         existing_issues = RequiredTagsIssue.get_all().items()
         known_issues = []
         fixed_issues = []
 
         for existing_issue_id, existing_issue in existing_issues:
+            # The issues of resources which have not changed since the previous audit are still current
+            if changed_resources is not None and existing_issue_id not in changed_issues:
+                known_issues.append(existing_issue)
+                continue
+
             # Check if the existing issue is still persists
             resource = found_issues.pop(existing_issue_id, None)
             if resource:
@@ -172,17 +422,24 @@ class RequiredTagsAuditor(BaseAuditor):
                 fixed_issues.append(existing_issue)
 
         new_issues = {}
+        grace_period_resources = []
         for resource_id, resource in found_issues.items():
             try:
                 if (
                         (datetime.utcnow() - resource['resource'].resource_creation_date).total_seconds() // 3600
                 ) >= self.grace_period:
                     new_issues[resource_id] = resource
+                else:
+                    grace_period_resources.append(resource['resource_id'])
             except Exception as ex:
                 self.log.error(
                     'Failed to construct new issue {}, Error: {}'.format(resource_id, ex)
                 )
 
+        # Resources still in their grace period are recorded as changed again, to be audited by the next run
+        record_resource_changes(grace_period_resources)
+        self.update_watermark(settled_change_id, changed_resources is None)
+
         db.session.commit()
         return known_issues, new_issues, fixed_issues
 
@@ -426,7 +683,7 @@ class RequiredTagsAuditor(BaseAuditor):
         """Check whether a tag value is valid
 
         Args:
-            key: A tag key
+            key: A lowercase tag key
             value: A tag value
 
         Returns:
@@ -435,7 +692,7 @@ class RequiredTagsAuditor(BaseAuditor):
         """
         if key == 'owner':
             return validate_email(value, self.partial_owner_match)
-        elif key == self.gdpr_tag:
+        elif key == self.gdpr_tag.lower():
             return value in self.gdpr_tag_values
         else:
             return True
@@ -15,6 +15,7 @@ class VPCFlowLogsAuditor(BaseAuditor):
     name = 'VPC Flow Log Compliance'
     ns = NS_AUDITOR_VPC_FLOW_LOGS
     interval = dbconfig.get('interval', ns, 60)
+    consumes = (VPC.resource_type,)
     role_name = dbconfig.get('role_name', ns, 'VpcFlowLogsRole')
     start_delay = 0
     options = (
@@ -1,4 +1,5 @@
 from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
 
 from botocore.exceptions import ClientError
 from datetime import datetime, timedelta
@@ -9,7 +10,7 @@ from cloud_inquisitor.exceptions import InquisitorError
 from cloud_inquisitor.plugins import BaseCollector, CollectorType
 from cloud_inquisitor.plugins.types.accounts import AWSAccount
 from cloud_inquisitor.plugins.types.resources import S3Bucket, CloudFrontDist, DNSZone, DNSRecord
-from cloud_inquisitor.utils import get_resource_id
+from cloud_inquisitor.utils import get_resource_id, chunks, RateLimiter
 from cloud_inquisitor.wrappers import retry
 
 
@@ -18,14 +19,27 @@ class AWSAccountCollector(BaseCollector):
     ns = 'collector_ec2'
     type = CollectorType.AWS_ACCOUNT
     interval = dbconfig.get('interval', ns, 15)
+    produces = (S3Bucket.resource_type, CloudFrontDist.resource_type, DNSZone.resource_type, DNSRecord.resource_type)
     s3_collection_enabled = dbconfig.get('s3_bucket_collection', ns, True)
     cloudfront_collection_enabled = dbconfig.get('cloudfront_collection', ns, True)
     route53_collection_enabled = dbconfig.get('route53_collection', ns, True)
+    s3_workers = dbconfig.get('s3_workers', ns, 10)
+    s3_rate_limit = dbconfig.get('s3_rate_limit', ns, 20)
+    cloudwatch_rate_limit = dbconfig.get('cloudwatch_rate_limit', ns, 5)
+    route53_workers = dbconfig.get('route53_workers', ns, 5)
+    route53_rate_limit = dbconfig.get('route53_rate_limit', ns, 5)
 
     options = (
         ConfigOption('s3_bucket_collection', True, 'bool', 'Enable S3 Bucket Collection'),
         ConfigOption('cloudfront_collection', True, 'bool', 'Enable Cloudfront DNS Collection'),
         ConfigOption('route53_collection', True, 'bool', 'Enable Route53 DNS Collection'),
+        ConfigOption('s3_workers', 10, 'int', 'Number of threads fetching S3 bucket details in parallel'),
+        ConfigOption('s3_rate_limit', 20, 'int', 'Maximum number of S3 API calls per second. 0 disables the limit'),
+        ConfigOption('cloudwatch_rate_limit', 5, 'int',
+                     'Maximum number of CloudWatch API calls per second. 0 disables the limit'),
+        ConfigOption('route53_workers', 5, 'int', 'Number of threads fetching Route53 zone records in parallel'),
+        ConfigOption('route53_rate_limit', 5, 'int',
+                     'Maximum number of Route53 API calls per second. 0 disables the limit'),
     )
 
     def __init__(self, account):
@@ -40,6 +54,7 @@ class AWSAccountCollector(BaseCollector):
             ))
 
         self.account = account
+        self.account_name = account.account_name
         self.session = get_aws_session(self.account)
 
     def run(self):
@@ -74,66 +89,20 @@ class AWSAccountCollector(BaseCollector):
         try:
             existing_buckets = S3Bucket.get_all(self.account)
             buckets = {bucket.name: bucket for bucket in s3.buckets.all()}
-            for data in buckets.values():
-                # This section ensures that we handle non-existent or non-accessible sub-resources
-                try:
-                    bucket_region = s3c.get_bucket_location(Bucket=data.name)['LocationConstraint']
-                    if not bucket_region:
-                        bucket_region = 'us-east-1'
-
-                except ClientError as e:
-                    self.log.info('Could not get bucket location..bucket possibly removed / {}'.format(e))
-                    bucket_region = 'unavailable'
 
-                try:
-                    bucket_policy = data.Policy().policy
-
-                except ClientError as e:
-                    if e.response['Error']['Code'] == 'NoSuchBucketPolicy':
-                        bucket_policy = None
-                    else:
-                        self.log.info('There was a problem collecting bucket policy for bucket {} on account {}, {}'
-                                      .format(data.name, self.account, e.response))
-                        bucket_policy = 'cinq cannot poll'
-
-                try:
-                    website_enabled = 'Enabled' if data.Website().index_document else 'Disabled'
-
-                except ClientError as e:
-                    if e.response['Error']['Code'] == 'NoSuchWebsiteConfiguration':
-                        website_enabled = 'Disabled'
-                    else:
-                        self.log.info('There was a problem collecting website config for bucket {} on account {}'
-                                      .format(data.name, self.account))
-                        website_enabled = 'cinq cannot poll'
-
-                try:
-                    tags = {t['Key']: t['Value'] for t in data.Tagging().tag_set}
-
-                except ClientError:
-                    tags = {}
-
-                try:
-                    bucket_size = self._get_bucket_statistics(data.name, bucket_region, 'StandardStorage',
-                                                              'BucketSizeBytes', 3)
-
-                    bucket_obj_count = self._get_bucket_statistics(data.name, bucket_region, 'AllStorageTypes',
-                                                                   'NumberOfObjects', 3)
-
-                    metrics = {'size': bucket_size, 'object_count': bucket_obj_count}
+            # Fetch the details of each bucket in parallel, sharing the (thread-safe) client between the workers
+            limiter = RateLimiter(self.s3_rate_limit)
+            with ThreadPoolExecutor(max_workers=max(self.s3_workers, 1)) as executor:
+                futures = {
+                    name: executor.submit(self.__fetch_bucket_properties, s3c, limiter, data)
+                    for name, data in buckets.items()
+                }
+                bucket_properties = {name: future.result() for name, future in futures.items()}
 
-                except Exception as e:
-                    self.log.info('Could not retrieve bucket statistics / {}'.format(e))
-                    metrics = {'found': False}
+            self.__fetch_bucket_metrics(bucket_properties)
 
-                properties = {
-                    'bucket_policy': bucket_policy,
-                    'creation_date': data.creation_date,
-                    'location': bucket_region,
-                    'website_enabled': website_enabled,
-                    'metrics': metrics,
-                    'tags': tags
-                }
+            for name, properties in bucket_properties.items():
+                data = buckets[name]
 
                 if data.name in existing_buckets:
                     bucket = existing_buckets[data.name]
@@ -144,14 +113,12 @@ class AWSAccountCollector(BaseCollector):
                         ))
                         bucket.save()
                 else:
-                    # If a bucket has no tags, a boto3 error is thrown. We treat this as an empty tag set
-
                     S3Bucket.create(
                         data.name,
                         account_id=self.account.account_id,
                         properties=properties,
-                        location=bucket_region,
-                        tags=tags
+                        location=properties['location'],
+                        tags=properties['tags']
                     )
                     self.log.debug('Added new S3Bucket {}/{}'.format(
                         self.account.account_name,
@@ -323,95 +290,120 @@ class AWSAccountCollector(BaseCollector):
             `None`
         """
         self.log.debug('Updating Route53 information for {}'.format(self.account))
+        route53 = self.session.client('route53')
+        limiter = RateLimiter(self.route53_rate_limit)
 
-        # region Update zones
-        existing_zones = DNSZone.get_all(self.account)
-        zones = self.__fetch_route53_zones()
-        for resource_id, data in zones.items():
-            if resource_id in existing_zones:
-                zone = DNSZone.get(resource_id)
-                if zone.update(data):
-                    self.log.debug('Change detected for Route53 zone {}/{}'.format(
+        try:
+            # region Update zones
+            existing_zones = DNSZone.get_all(self.account, load_relations=True)
+            zones = self.__fetch_route53_zones(route53, limiter)
+            for resource_id, data in zones.items():
+                if resource_id in existing_zones:
+                    zone = existing_zones[resource_id]
+                    if zone.update(data):
+                        self.log.debug('Change detected for Route53 zone {}/{}'.format(
+                            self.account,
+                            zone.name
+                        ))
+                        zone.save()
+                else:
+                    tags = data.pop('tags')
+                    existing_zones[resource_id] = DNSZone.create(
+                        resource_id,
+                        account_id=self.account.account_id,
+                        properties=data,
+                        tags=tags
+                    )
+
+                    self.log.debug('Added Route53 zone {}/{}'.format(
                         self.account,
-                        zone.name
+                        data['name']
                     ))
-                    zone.save()
-            else:
-                tags = data.pop('tags')
-                DNSZone.create(
-                    resource_id,
-                    account_id=self.account.account_id,
-                    properties=data,
-                    tags=tags
-                )
 
-                self.log.debug('Added Route53 zone {}/{}'.format(
-                    self.account,
-                    data['name']
-                ))
+            # Changes are only flushed until all records have been updated, as committing expires the records of the
+            # zones preloaded above
+            db.session.flush()
 
-        db.session.commit()
+            zk = set(zones.keys())
+            ezk = set(existing_zones.keys())
 
-        zk = set(zones.keys())
-        ezk = set(existing_zones.keys())
+            for resource_id in ezk - zk:
+                zone = existing_zones.pop(resource_id)
 
-        for resource_id in ezk - zk:
-            zone = existing_zones[resource_id]
+                db.session.delete(zone.resource)
+                self.log.debug('Deleted Route53 zone {}/{}'.format(
+                    self.account.account_name,
+                    zone.name
+                ))
+            db.session.flush()
+            # endregion
 
-            db.session.delete(zone.resource)
-            self.log.debug('Deleted Route53 zone {}/{}'.format(
-                self.account.account_name,
-                zone.name.value
-            ))
-        db.session.commit()
-        # endregion
+            # region Update resource records
+            # Records are fetched in parallel while the records of the zones already fetched are being updated. The
+            # zone map loaded above is reused, instead of loading the zones again
+            def fetch_records(resource_id):
+                try:
+                    return self.__fetch_route53_zone_records(route53, limiter, zones[resource_id]['zone_id'])
 
-        # region Update resource records
-        try:
-            for zone_id, zone in DNSZone.get_all(self.account).items():
-                existing_records = {rec.id: rec for rec in zone.records}
-                records = self.__fetch_route53_zone_records(zone.get_property('zone_id').value)
-
-                for data in records:
-                    if data['id'] in existing_records:
-                        record = existing_records[data['id']]
-                        if record.update(data):
-                            self.log.debug('Changed detected for DNSRecord {}/{}/{}'.format(
+                except Exception:
+                    self.log.exception('Failed fetching records for Route53 zone {}/{}'.format(
+                        self.account_name,
+                        zones[resource_id]['name']
+                    ))
+
+            zone_items = list(existing_zones.items())
+            with ThreadPoolExecutor(max_workers=max(self.route53_workers, 1)) as executor:
+                zone_records = executor.map(fetch_records, [resource_id for resource_id, _ in zone_items])
+
+                for (zone_id, zone), records in zip(zone_items, zone_records):
+                    # Records of zones which failed to fetch are left unchanged
+                    if records is None:
+                        continue
+
+                    existing_records = {rec.id: rec for rec in zone.records}
+
+                    for data in records:
+                        if data['id'] in existing_records:
+                            record = existing_records[data['id']]
+                            if record.update(data):
+                                self.log.debug('Changed detected for DNSRecord {}/{}/{}'.format(
+                                    self.account,
+                                    zone.name,
+                                    data['name']
+                                ))
+                                record.save()
+                        else:
+                            record = DNSRecord.create(
+                                data['id'],
+                                account_id=self.account.account_id,
+                                properties={k: v for k, v in data.items() if k != 'id'},
+                                tags={}
+                            )
+                            self.log.debug('Added new DNSRecord {}/{}/{}'.format(
                                 self.account,
                                 zone.name,
                                 data['name']
                             ))
-                            record.save()
-                    else:
-                        record = DNSRecord.create(
-                            data['id'],
-                            account_id=self.account.account_id,
-                            properties={k: v for k, v in data.items() if k != 'id'},
-                            tags={}
-                        )
-                        self.log.debug('Added new DNSRecord {}/{}/{}'.format(
-                            self.account,
-                            zone.name,
-                            data['name']
+                            zone.add_record(record)
+
+                    rk = set(x['id'] for x in records)
+                    erk = set(existing_records.keys())
+
+                    for resource_id in erk - rk:
+                        record = existing_records[resource_id]
+                        zone.delete_record(record)
+                        self.log.debug('Deleted Route53 record {}/{}/{}'.format(
+                            self.account.account_name,
+                            zone_id,
+                            record.name
                         ))
-                        zone.add_record(record)
-                db.session.commit()
+                    db.session.flush()
 
-                rk = set(x['id'] for x in records)
-                erk = set(existing_records.keys())
+            db.session.commit()
+            # endregion
 
-                for resource_id in erk - rk:
-                    record = existing_records[resource_id]
-                    zone.delete_record(record)
-                    self.log.debug('Deleted Route53 record {}/{}/{}'.format(
-                        self.account.account_name,
-                        zone_id,
-                        record.name
-                    ))
-                db.session.commit()
-        except:
-            raise
-        # endregion
+        finally:
+            del route53
 
     # region Helper functions
     @retry
@@ -432,127 +424,130 @@ class AWSAccountCollector(BaseCollector):
         }
 
     @retry
-    def __fetch_route53_zones(self):
+    def __fetch_route53_zones(self, route53, limiter):
         """Return a list of all DNS zones hosted in Route53
 
+        Args:
+            route53 (:obj:`botocore.client.Route53`): Route53 client
+            limiter (:obj:`RateLimiter`): Rate limiter for the Route53 API calls
+
         Returns:
             :obj:`list` of `dict`
         """
         done = False
         marker = None
         zones = {}
-        route53 = self.session.client('route53')
 
-        try:
-            while not done:
-                if marker:
-                    response = route53.list_hosted_zones(Marker=marker)
-                else:
-                    response = route53.list_hosted_zones()
+        while not done:
+            limiter.acquire()
+            if marker:
+                response = route53.list_hosted_zones(Marker=marker)
+            else:
+                response = route53.list_hosted_zones()
 
-                if response['IsTruncated']:
-                    marker = response['NextMarker']
-                else:
-                    done = True
+            if response['IsTruncated']:
+                marker = response['NextMarker']
+            else:
+                done = True
+
+            for zone_data in response['HostedZones']:
+                zones[get_resource_id('r53z', zone_data['Id'])] = {
+                    'name': zone_data['Name'].rstrip('.'),
+                    'source': 'AWS/{}'.format(self.account),
+                    'comment': zone_data['Config']['Comment'] if 'Comment' in zone_data['Config'] else None,
+                    'zone_id': zone_data['Id'],
+                    'private_zone': zone_data['Config']['PrivateZone'],
+                    'tags': {}
+                }
 
-                for zone_data in response['HostedZones']:
-                    zones[get_resource_id('r53z', zone_data['Id'])] = {
-                        'name': zone_data['Name'].rstrip('.'),
-                        'source': 'AWS/{}'.format(self.account),
-                        'comment': zone_data['Config']['Comment'] if 'Comment' in zone_data['Config'] else None,
-                        'zone_id': zone_data['Id'],
-                        'private_zone': zone_data['Config']['PrivateZone'],
-                        'tags': self.__fetch_route53_zone_tags(zone_data['Id'])
-                    }
+        tags = self.__fetch_route53_zone_tags(route53, limiter, [zone['zone_id'] for zone in zones.values()])
+        for zone in zones.values():
+            zone['tags'] = tags.get(zone['zone_id'].split('/')[-1], {})
 
-            return zones
-        finally:
-            del route53
+        return zones
 
     @retry
-    def __fetch_route53_zone_records(self, zone_id):
-        """Return all resource records for a specific Route53 zone
+    def __fetch_route53_zone_records(self, route53, limiter, zone_id):
+        """Return all resource records for a specific Route53 zone. Executed in worker threads, so this must not access
+        the database
 
         Args:
+            route53 (:obj:`botocore.client.Route53`): Route53 client
+            limiter (:obj:`RateLimiter`): Rate limiter for the Route53 API calls
             zone_id (`str`): Name / ID of the hosted zone
 
         Returns:
             `dict`
         """
-        route53 = self.session.client('route53')
-
         done = False
         nextName = nextType = None
         records = {}
 
-        try:
-            while not done:
-                if nextName and nextType:
-                    response = route53.list_resource_record_sets(
-                        HostedZoneId=zone_id,
-                        StartRecordName=nextName,
-                        StartRecordType=nextType
-                    )
-                else:
-                    response = route53.list_resource_record_sets(HostedZoneId=zone_id)
+        while not done:
+            limiter.acquire()
+            if nextName and nextType:
+                response = route53.list_resource_record_sets(
+                    HostedZoneId=zone_id,
+                    StartRecordName=nextName,
+                    StartRecordType=nextType
+                )
+            else:
+                response = route53.list_resource_record_sets(HostedZoneId=zone_id)
 
-                if response['IsTruncated']:
-                    nextName = response['NextRecordName']
-                    nextType = response['NextRecordType']
-                else:
-                    done = True
+            if response['IsTruncated']:
+                nextName = response['NextRecordName']
+                nextType = response['NextRecordType']
+            else:
+                done = True
+
+            if 'ResourceRecordSets' in response:
+                for record in response['ResourceRecordSets']:
+                    # Cannot make this a list, due to a race-condition in the AWS api that might return the same
+                    # record more than once, so we use a dict instead to ensure that if we get duplicate records
+                    # we simply just overwrite the one already there with the same info.
+                    record_id = self._get_resource_hash(zone_id, record)
+                    if 'AliasTarget' in record:
+                        value = record['AliasTarget']['DNSName']
+                        records[record_id] = {
+                            'id': record_id,
+                            'name': record['Name'].rstrip('.'),
+                            'type': 'ALIAS',
+                            'ttl': 0,
+                            'value': [value]
+                        }
+                    else:
+                        value = [y['Value'] for y in record['ResourceRecords']]
+                        records[record_id] = {
+                            'id': record_id,
+                            'name': record['Name'].rstrip('.'),
+                            'type': record['Type'],
+                            'ttl': record['TTL'],
+                            'value': value
+                        }
 
-                if 'ResourceRecordSets' in response:
-                    for record in response['ResourceRecordSets']:
-                        # Cannot make this a list, due to a race-condition in the AWS api that might return the same
-                        # record more than once, so we use a dict instead to ensure that if we get duplicate records
-                        # we simply just overwrite the one already there with the same info.
-                        record_id = self._get_resource_hash(zone_id, record)
-                        if 'AliasTarget' in record:
-                            value = record['AliasTarget']['DNSName']
-                            records[record_id] = {
-                                'id': record_id,
-                                'name': record['Name'].rstrip('.'),
-                                'type': 'ALIAS',
-                                'ttl': 0,
-                                'value': [value]
-                            }
-                        else:
-                            value = [y['Value'] for y in record['ResourceRecords']]
-                            records[record_id] = {
-                                'id': record_id,
-                                'name': record['Name'].rstrip('.'),
-                                'type': record['Type'],
-                                'ttl': record['TTL'],
-                                'value': value
-                            }
-
-            return list(records.values())
-        finally:
-            del route53
+        return list(records.values())
 
     @retry
-    def __fetch_route53_zone_tags(self, zone_id):
-        """Return a dict with the tags for the zone
+    def __fetch_route53_zone_tags(self, route53, limiter, zone_ids):
+        """Return the tags of the zones, looked up in batches of 10 zones, the maximum supported by the API
 
         Args:
-            zone_id (`str`): ID of the hosted zone
+            route53 (:obj:`botocore.client.Route53`): Route53 client
+            limiter (:obj:`RateLimiter`): Rate limiter for the Route53 API calls
+            zone_ids (`list` of `str`): IDs of the hosted zones
 
         Returns:
-            :obj:`dict` of `str`: `str`
+            :obj:`dict` of `str`: `dict`
         """
-        route53 = self.session.client('route53')
+        tags = {}
+        for batch in chunks([zone_id.split('/')[-1] for zone_id in zone_ids], 10):
+            limiter.acquire()
+            response = route53.list_tags_for_resources(ResourceType='hostedzone', ResourceIds=batch)
 
-        try:
-            return {
-                tag['Key']: tag['Value'] for tag in
-                route53.list_tags_for_resource(
-                    ResourceType='hostedzone',
-                    ResourceId=zone_id.split('/')[-1]
-                )['ResourceTagSet']['Tags']
-            }
-        finally:
-            del route53
+            for tag_set in response['ResourceTagSets']:
+                tags[tag_set['ResourceId']] = {tag['Key']: tag['Value'] for tag in tag_set['Tags']}
+
+        return tags
 
     @staticmethod
     def _get_resource_hash(zone_name, record):
@@ -584,51 +579,156 @@ class AWSAccountCollector(BaseCollector):
 
         return get_resource_id('r53r', args)
 
-    def _get_bucket_statistics(self, bucket_name, bucket_region, storage_type, statistic, days):
-        """ Returns datapoints from cloudwatch for bucket statistics.
+    def __fetch_bucket_properties(self, s3c, limiter, data):
+        """Return the properties of an S3 bucket, excluding the bucket metrics. Executed in worker threads, so this
+        must not access the database
 
         Args:
-            bucket_name `(str)`: The name of the bucket
-            statistic `(str)`: The statistic you want to fetch from
-            days `(int)`: Sample period for the statistic
+            s3c (:obj:`botocore.client.S3`): S3 client
+            limiter (:obj:`RateLimiter`): Rate limiter for the S3 API calls
+            data (:obj:`boto3:S3.Bucket`): Bucket to fetch the properties for
 
+        Returns:
+            `dict`
         """
+        # This section ensures that we handle non-existent or non-accessible sub-resources
+        try:
+            limiter.acquire()
+            bucket_region = s3c.get_bucket_location(Bucket=data.name)['LocationConstraint']
+            if not bucket_region:
+                bucket_region = 'us-east-1'
+
+        except ClientError as e:
+            self.log.info('Could not get bucket location..bucket possibly removed / {}'.format(e))
+            bucket_region = 'unavailable'
 
-        cw = self.session.client('cloudwatch', region_name=bucket_region)
+        try:
+            limiter.acquire()
+            bucket_policy = s3c.get_bucket_policy(Bucket=data.name)['Policy']
 
-        # gather cw stats
+        except ClientError as e:
+            if e.response['Error']['Code'] == 'NoSuchBucketPolicy':
+                bucket_policy = None
+            else:
+                self.log.info('There was a problem collecting bucket policy for bucket {} on account {}, {}'
+                              .format(data.name, self.account_name, e.response))
+                bucket_policy = 'cinq cannot poll'
 
         try:
-            obj_stats = cw.get_metric_statistics(
-                Namespace='AWS/S3',
-                MetricName=statistic,
-                Dimensions=[
-                    {
-                        'Name': 'StorageType',
-                        'Value': storage_type
-                    },
-                    {
-                        'Name': 'BucketName',
-                        'Value': bucket_name
-                    }
-                ],
-                Period=86400,
-                StartTime=datetime.utcnow() - timedelta(days=days),
-                EndTime=datetime.utcnow(),
-                Statistics=[
-                    'Average'
-                ]
-            )
-            stat_value = obj_stats['Datapoints'][0]['Average'] if obj_stats['Datapoints'] else 'NO_DATA'
-
-            return stat_value
-
-        except Exception as e:
-            self.log.error(
-                'Could not get bucket statistic for account {} / bucket {} / {}'.format(self.account.account_name,
-                                                                                        bucket_name, e))
+            limiter.acquire()
+            website = s3c.get_bucket_website(Bucket=data.name)
+            website_enabled = 'Enabled' if website.get('IndexDocument') else 'Disabled'
 
-        finally:
-            del cw
+        except ClientError as e:
+            if e.response['Error']['Code'] == 'NoSuchWebsiteConfiguration':
+                website_enabled = 'Disabled'
+            else:
+                self.log.info('There was a problem collecting website config for bucket {} on account {}'
+                              .format(data.name, self.account_name))
+                website_enabled = 'cinq cannot poll'
+
+        # If a bucket has no tags, a boto3 error is thrown. We treat this as an empty tag set. If the tags could not be
+        # read for any other reason, the tags are left as `None` so the existing tags are not removed
+        try:
+            limiter.acquire()
+            tags = {t['Key']: t['Value'] for t in s3c.get_bucket_tagging(Bucket=data.name)['TagSet']}
+
+        except ClientError as e:
+            if e.response['Error']['Code'] == 'NoSuchTagSet':
+                tags = {}
+            else:
+                self.log.info('There was a problem collecting tags for bucket {} on account {}, {}'
+                              .format(data.name, self.account_name, e.response))
+                tags = None
+
+        return {
+            'bucket_policy': bucket_policy,
+            'creation_date': data.creation_date,
+            'location': bucket_region,
+            'website_enabled': website_enabled,
+            'metrics': {'found': False},
+            'tags': tags
+        }
+
+    def __fetch_bucket_metrics(self, bucket_properties):
+        """Fetch the size and object count of the buckets from CloudWatch and update the `metrics` property of each
+        bucket. The metrics are fetched in bulk with `GetMetricData`, one call per region and up to 250 buckets
+
+        Args:
+            bucket_properties (`dict`): Bucket properties, keyed by bucket name
+
+        Returns:
+            `None`
+        """
+        regions = defaultdict(list)
+        for name, properties in bucket_properties.items():
+            if properties['location'] != 'unavailable':
+                regions[properties['location']].append(name)
+
+        limiter = RateLimiter(self.cloudwatch_rate_limit)
+        end_time = datetime.utcnow()
+        start_time = end_time - timedelta(days=3)
+
+        for region, names in regions.items():
+            cw = self.session.client('cloudwatch', region_name=region)
 
+            try:
+                # Each bucket requires two metric queries, with a maximum of 500 queries per call
+                for batch in chunks(names, 250):
+                    queries = []
+                    for idx, name in enumerate(batch):
+                        queries.append(self.__get_metric_query(
+                            'size_{}'.format(idx), name, 'StandardStorage', 'BucketSizeBytes'
+                        ))
+                        queries.append(self.__get_metric_query(
+                            'count_{}'.format(idx), name, 'AllStorageTypes', 'NumberOfObjects'
+                        ))
+
+                    values = {}
+                    paginator = cw.get_paginator('get_metric_data')
+                    limiter.acquire()
+                    for page in paginator.paginate(MetricDataQueries=queries, StartTime=start_time, EndTime=end_time):
+                        for result in page['MetricDataResults']:
+                            values.setdefault(result['Id'], []).extend(result['Values'])
+
+                    for idx, name in enumerate(batch):
+                        bucket_properties[name]['metrics'] = {
+                            'size': next(iter(values.get('size_{}'.format(idx), [])), 'NO_DATA'),
+                            'object_count': next(iter(values.get('count_{}'.format(idx), [])), 'NO_DATA')
+                        }
+
+            except Exception as e:
+                self.log.info('Could not retrieve bucket statistics for account {} / region {} / {}'.format(
+                    self.account.account_name,
+                    region,
+                    e
+                ))
+
+            finally:
+                del cw
+
+    @staticmethod
+    def __get_metric_query(query_id, bucket_name, storage_type, metric_name):
+        return {
+            'Id': query_id,
+            'MetricStat': {
+                'Metric': {
+                    'Namespace': 'AWS/S3',
+                    'MetricName': metric_name,
+                    'Dimensions': [
+                        {
+                            'Name': 'StorageType',
+                            'Value': storage_type
+                        },
+                        {
+                            'Name': 'BucketName',
+                            'Value': bucket_name
+                        }
+                    ]
+                },
+                'Period': 86400,
+                'Stat': 'Average'
+            },
+            'ReturnData': True
+        }
     # endregion
@@ -1,22 +1,49 @@
-from datetime import datetime
 import json
+import time
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from threading import Lock
+from types import GeneratorType
+
 from cloud_inquisitor import get_aws_session
 from cloud_inquisitor.config import dbconfig, ConfigOption
 from cloud_inquisitor.database import db
 from cloud_inquisitor.exceptions import InquisitorError
 from cloud_inquisitor.plugins import BaseCollector, CollectorType
 from cloud_inquisitor.plugins.types.accounts import AWSAccount
-from cloud_inquisitor.plugins.types.resources import EC2Instance, EBSVolume, EBSSnapshot, AMI, BeanStalk, VPC, RDSInstance
+from cloud_inquisitor.plugins.types.resources import (
+    EC2Instance, EBSVolume, EBSSnapshot, AMI, BeanStalk, VPC, RDSInstance, ResourceSync
+)
+from cloud_inquisitor.throttling import get_rate_limiter_stats
 from cloud_inquisitor.utils import to_utc_date, isoformat, parse_date
 from cloud_inquisitor.wrappers import retry
 from cinq_collector_aws.resources import ELB
 
+# Minimum and maximum page size supported by the paginated API operations
+PAGE_SIZE_LIMITS = {
+    'describe_environments': (1, 1000),
+    'describe_flow_logs': (1, 1000),
+    'describe_instances': (5, 1000),
+    'describe_load_balancers': (1, 400),
+    'describe_snapshots': (5, 1000),
+    'describe_volumes': (5, 500),
+}
+
+# Collections which failing to update is logged without failing the collector, see `update_vpcs`, `update_elbs` and
+# `update_rds_databases`
+NON_FATAL_COLLECTIONS = ('vpcs', 'elbs', 'rds_databases')
+
 
 class AWSRegionCollector(BaseCollector):
     name = 'AWS Region Collector'
     ns = 'collector_ec2'
     type = CollectorType.AWS_REGION
     interval = dbconfig.get('interval', ns, 15)
+    produces = (
+        EC2Instance.resource_type, EBSVolume.resource_type, EBSSnapshot.resource_type, AMI.resource_type,
+        BeanStalk.resource_type, VPC.resource_type, RDSInstance.resource_type, ELB.resource_type
+    )
     ec2_collection_enabled = dbconfig.get('ec2_instance_collection', ns, True)
     beanstalk_collection_enabled = dbconfig.get('beanstalk_collection', ns, True)
     vpc_collection_enabled = dbconfig.get('vpc_collection', ns, True)
@@ -28,11 +55,15 @@ class AWSRegionCollector(BaseCollector):
     rds_collector_region = dbconfig.get('rds_collector_region', ns, '')
     rds_config_rule_name = dbconfig.get('rds_config_rule_name', ns, '')
     rds_ignore_db_types = dbconfig.get('rds_ignore_db_types', ns, [])
+    max_instances = dbconfig.get('max_instances', ns, 1000)
+    concurrent_workers = dbconfig.get('concurrent_workers', ns, 1)
+    incremental_collection = dbconfig.get('incremental_collection', ns, False)
+    snapshot_page_size = dbconfig.get('snapshot_page_size', ns, 0)
 
     options = (
         ConfigOption('enabled', True, 'bool', 'Enable the AWS Region-based Collector'),
         ConfigOption('interval', 15, 'int', 'Run frequency, in minutes'),
-        ConfigOption('max_instances', 1000, 'int', 'Maximum number of instances per API call'),
+        ConfigOption('max_instances', 1000, 'int', 'Maximum number of results per API call (page size)'),
         ConfigOption('ec2_instance_collection', True, 'bool', 'Enable collection of Instance-Related Resources'),
         ConfigOption('beanstalk_collection', True, 'bool', 'Enable collection of Elastic Beanstalks'),
         ConfigOption('vpc_collection', True, 'bool', 'Enable collection of VPC Information'),
@@ -43,7 +74,14 @@ class AWSRegionCollector(BaseCollector):
         ConfigOption('rds_collector_account', '', 'string', 'Account Name where RDS Lambda Collector runs'),
         ConfigOption('rds_collector_region', '', 'string', 'AWS Region where RDS Lambda Collector runs'),
         ConfigOption('rds_config_rule_name', '', 'string', 'Name of AWS Config rule to evaluate'),
-        ConfigOption('rds_ignore_db_types', [], 'array', 'RDS types we would like to ignore')
+        ConfigOption('rds_ignore_db_types', [], 'array', 'RDS types we would like to ignore'),
+        ConfigOption('concurrent_workers', 1, 'int',
+                     'Number of threads fetching data from the AWS APIs in parallel. 1 disables concurrent collection'),
+        ConfigOption('incremental_collection', False, 'bool',
+                     'Only load and update EC2 Instances whose data changed since the last collection'),
+        ConfigOption('snapshot_page_size', 0, 'int',
+                     'Collect EBS Snapshots in pages of this size (5 - 1000) to bound memory usage. 0 loads all '
+                     'snapshots at once')
     )
 
     def __init__(self, account, region):
@@ -60,35 +98,45 @@ class AWSRegionCollector(BaseCollector):
         self.account = account
         self.region = region
         self.session = get_aws_session(self.account)
+        self.__session_lock = Lock()
+        self.__account_name = self.account.account_name
+        self.__account_number = self.account.account_number
+        self.page_latency = defaultdict(list)
+        self.page_sizes = {}
 
     def run(self, *args, **kwargs):
         try:
+            collections = []
             if self.ec2_collection_enabled:
-                self.update_instances()
-                self.update_volumes()
-                self.update_snapshots()
-                self.update_amis()
+                collections += ['instances', 'volumes', 'snapshots', 'amis']
 
             if self.beanstalk_collection_enabled:
-                self.update_beanstalks()
+                collections.append('beanstalks')
 
             if self.vpc_collection_enabled:
-                self.update_vpcs()
+                collections.append('vpcs')
 
             if self.elb_collection_enabled:
-                self.update_elbs()
+                collections.append('elbs')
 
             if self.rds_collection_enabled:
-                self.update_rds_databases()
+                collections.append('rds_databases')
+
+            if self.concurrent_workers > 1:
+                self.__run_concurrent(collections)
+            else:
+                for collection in collections:
+                    getattr(self, 'update_{}'.format(collection))()
 
         except Exception as ex:
             self.log.exception(ex)
             raise
 
         finally:
+            self.__log_page_latency()
+            self.__log_throttling()
             del self.session
 
-    @retry
     def update_instances(self):
         """Update list of EC2 Instances for the account / region
 
@@ -96,79 +144,8 @@ class AWSRegionCollector(BaseCollector):
             `None`
         """
         self.log.debug('Updating EC2Instances for {}/{}'.format(self.account.account_name, self.region))
-        ec2 = self.session.resource('ec2', region_name=self.region)
-
-        try:
-            existing_instances = EC2Instance.get_all(self.account, self.region)
-            instances = {}
-            api_instances = {x.id: x for x in ec2.instances.all()}
-
-            try:
-                for instance_id, data in api_instances.items():
-                    if data.instance_id in existing_instances:
-                        instance = existing_instances[instance_id]
-
-                        if data.state['Name'] not in ('terminated', 'shutting-down'):
-                            instances[instance_id] = instance
-
-                            # Add object to transaction if it changed
-                            if instance.update(data):
-                                self.log.debug('Updating info for instance {} in {}/{}'.format(
-                                    instance.resource.resource_id,
-                                    self.account.account_name,
-                                    self.region
-                                ))
-                                db.session.add(instance.resource)
-                    else:
-                        # New instance, if its not in state=terminated
-                        if data.state['Name'] in ('terminated', 'shutting-down'):
-                            continue
-
-                        tags = {tag['Key']: tag['Value'] for tag in data.tags or {}}
-                        properties = {
-                            'launch_date': to_utc_date(data.launch_time).isoformat(),
-                            'state': data.state['Name'],
-                            'instance_type': data.instance_type,
-                            'public_ip': getattr(data, 'public_ip_address', None),
-                            'public_dns': getattr(data, 'public_dns_address', None),
-                            'created': isoformat(datetime.now())
-                        }
-
-                        instance = EC2Instance.create(
-                            data.instance_id,
-                            account_id=self.account.account_id,
-                            location=self.region,
-                            properties=properties,
-                            tags=tags
-                        )
-
-                        instances[instance.resource.resource_id] = instance
-                        self.log.debug('Added new EC2Instance {}/{}/{}'.format(
-                            self.account.account_name,
-                            self.region,
-                            instance.resource.resource_id
-                        ))
-
-                # Check for deleted instances
-                ik = set(list(instances.keys()))
-                eik = set(list(existing_instances.keys()))
-
-                for instanceID in eik - ik:
-                    db.session.delete(existing_instances[instanceID].resource)
-                    self.log.debug('Deleted EC2Instance {}/{}/{}'.format(
-                        self.account.account_name,
-                        self.region,
-                        instanceID
-                    ))
-
-                db.session.commit()
-            except:
-                db.session.rollback()
-                raise
-        finally:
-            del ec2
+        self.__update('instances')
 
-    @retry
     def update_amis(self):
         """Update list of AMIs for the account / region
 
@@ -176,574 +153,891 @@ class AWSRegionCollector(BaseCollector):
             `None`
         """
         self.log.debug('Updating AMIs for {}/{}'.format(self.account.account_name, self.region))
-        ec2 = self.session.resource('ec2', region_name=self.region)
+        self.__update('amis')
 
-        try:
-            existing_images = AMI.get_all(self.account, self.region)
-            images = {x.id: x for x in ec2.images.filter(Owners=['self'])}
-
-            for data in list(images.values()):
-                if data.id in existing_images:
-                    ami = existing_images[data.id]
-                    if ami.update(data):
-                        self.log.debug('Changed detected for AMI {}/{}/{}'.format(
-                            self.account.account_name,
-                            self.region,
-                            ami.resource.resource_id
-                        ))
-                else:
-                    properties = {
-                        'architecture': data.architecture,
-                        'creation_date': parse_date(data.creation_date or '1970-01-01 00:00:00'),
-                        'description': data.description,
-                        'name': data.name,
-                        'platform': data.platform or 'Linux',
-                        'state': data.state,
-                    }
-                    tags = {tag['Key']: tag['Value'] for tag in data.tags or {}}
+    def update_volumes(self):
+        """Update list of EBS Volumes for the account / region
 
-                    AMI.create(
-                        data.id,
-                        account_id=self.account.account_id,
-                        location=self.region,
-                        properties=properties,
-                        tags=tags
-                    )
+        Returns:
+            `None`
+        """
+        self.log.debug('Updating EBSVolumes for {}/{}'.format(self.account.account_name, self.region))
+        self.__update('volumes')
 
-                    self.log.debug('Added new AMI {}/{}/{}'.format(
-                        self.account.account_name,
-                        self.region,
-                        data.id
-                    ))
-            db.session.commit()
+    def update_snapshots(self):
+        """Update list of EBS Snapshots for the account / region
 
-            # Check for deleted instances
-            ik = set(list(images.keys()))
-            eik = set(list(existing_images.keys()))
+        Returns:
+            `None`
+        """
+        self.log.debug('Updating EBSSnapshots for {}/{}'.format(self.account.account_name, self.region))
+        self.__update('snapshots')
 
-            try:
-                for image_id in eik - ik:
-                    db.session.delete(existing_images[image_id].resource)
-                    self.log.debug('Deleted AMI {}/{}/{}'.format(
-                        self.account.account_name,
-                        self.region,
-                        image_id,
-                    ))
+    def update_beanstalks(self):
+        """Update list of Elastic BeanStalks for the account / region
 
-                db.session.commit()
-            except:
-                db.session.rollback()
-        finally:
-            del ec2
+        Returns:
+            `None`
+        """
+        self.log.debug('Updating ElasticBeanStalk environments for {}/{}'.format(
+            self.account.account_name,
+            self.region
+        ))
+        self.__update('beanstalks')
 
-    @retry
-    def update_volumes(self):
-        """Update list of EBS Volumes for the account / region
+    def update_vpcs(self):
+        """Update list of VPCs for the account / region
 
         Returns:
             `None`
         """
-        self.log.debug('Updating EBSVolumes for {}/{}'.format(self.account.account_name, self.region))
-        ec2 = self.session.resource('ec2', region_name=self.region)
+        self.log.debug('Updating VPCs for {}/{}'.format(
+            self.account.account_name,
+            self.region
+        ))
 
         try:
-            existing_volumes = EBSVolume.get_all(self.account, self.region)
-            volumes = {x.id: x for x in ec2.volumes.all()}
-
-            for data in list(volumes.values()):
-                if data.id in existing_volumes:
-                    vol = existing_volumes[data.id]
-                    if vol.update(data):
-                        self.log.debug('Changed detected for EBSVolume {}/{}/{}'.format(
-                            self.account.account_name,
-                            self.region,
-                            vol.resource.resource_id
-                        ))
+            self.__update('vpcs')
 
-                else:
-                    properties = {
-                        'create_time': data.create_time,
-                        'encrypted': data.encrypted,
-                        'iops': data.iops or 0,
-                        'kms_key_id': data.kms_key_id,
-                        'size': data.size,
-                        'state': data.state,
-                        'snapshot_id': data.snapshot_id,
-                        'volume_type': data.volume_type,
-                        'attachments': sorted([x['InstanceId'] for x in data.attachments])
-                    }
-                    tags = {t['Key']: t['Value'] for t in data.tags or {}}
-                    vol = EBSVolume.create(
-                        data.id,
-                        account_id=self.account.account_id,
-                        location=self.region,
-                        properties=properties,
-                        tags=tags
-                    )
+        except Exception:
+            self.log.exception('There was a problem during VPC collection for {}/{}'.format(
+                self.account.account_name,
+                self.region
+            ))
+            db.session.rollback()
 
-                    self.log.debug('Added new EBSVolume {}/{}/{}'.format(
-                        self.account.account_name,
-                        self.region,
-                        vol.resource.resource_id
-                    ))
-            db.session.commit()
+    def update_elbs(self):
+        """Update list of ELBs for the account / region
 
-            vk = set(list(volumes.keys()))
-            evk = set(list(existing_volumes.keys()))
-            try:
-                for volumeID in evk - vk:
-                    db.session.delete(existing_volumes[volumeID].resource)
-                    self.log.debug('Deleted EBSVolume {}/{}/{}'.format(
-                        volumeID,
-                        self.account.account_name,
-                        self.region
-                    ))
+        Returns:
+            `None`
+        """
+        self.log.debug('Updating ELBs for {}/{}'.format(
+            self.account.account_name,
+            self.region
+        ))
 
-                db.session.commit()
-            except:
-                self.log.exception('Failed removing deleted volumes')
-                db.session.rollback()
-        finally:
-            del ec2
+        try:
+            self.__update('elbs')
 
-    @retry
-    def update_snapshots(self):
-        """Update list of EBS Snapshots for the account / region
+        except Exception:
+            self.log.exception('There was a problem during ELB collection for {}/{}'.format(
+                self.account.account_name,
+                self.region
+            ))
+            db.session.rollback()
+
+    def update_rds_databases(self):
+        """Update list of RDS Databases for the account / region
 
         Returns:
             `None`
         """
-        self.log.debug('Updating EBSSnapshots for {}/{}'.format(self.account.account_name, self.region))
-        ec2 = self.session.resource('ec2', region_name=self.region)
+        self.log.info('Updating RDS Databases for {} / {}'.format(
+            self.account, self.region
+        ))
 
         try:
-            existing_snapshots = EBSSnapshot.get_all(self.account, self.region)
-            snapshots = {x.id: x for x in ec2.snapshots.filter(OwnerIds=[self.account.account_number])}
-
-            for data in list(snapshots.values()):
-                if data.id in existing_snapshots:
-                    snapshot = existing_snapshots[data.id]
-                    if snapshot.update(data):
-                        self.log.debug('Change detected for EBSSnapshot {}/{}/{}'.format(
-                            self.account.account_name,
-                            self.region,
-                            snapshot.resource.resource_id
-                        ))
+            self.__update('rds_databases')
 
-                else:
-                    properties = {
-                        'create_time': data.start_time,
-                        'encrypted': data.encrypted,
-                        'kms_key_id': data.kms_key_id,
-                        'state': data.state,
-                        'state_message': data.state_message,
-                        'volume_id': data.volume_id,
-                        'volume_size': data.volume_size,
+        except Exception as e:
+            self.log.exception('There was a problem during RDS collection for {}/{}/{}'.format(
+                self.account.account_name, self.region, e
+            ))
+            db.session.rollback()
+
+    # region Fetch functions
+    # The fetch functions only talk to the AWS APIs and must not touch the database (including lazy loading attributes
+    # of the account), as they are executed in worker threads when concurrent collection is enabled
+    def _fetch_instances(self):
+        """Returns the EC2 Instances for the account / region, in the :obj:`ResourceSync` format, as a generator
+        returning one page of instances at a time. Failed API calls are retried for each page, see :meth:`__fetch_page`
+
+        Returns:
+            `generator` of `dict`
+        """
+        def parse(page):
+            instances = {}
+            for reservation in page['Reservations']:
+                for data in reservation['Instances']:
+                    instances[data['InstanceId']] = {
+                        'properties': {
+                            'launch_date': to_utc_date(data['LaunchTime']).isoformat(),
+                            'state': data['State']['Name'],
+                            'instance_type': data['InstanceType'],
+                            'public_ip': data.get('PublicIpAddress') or None,
+                            'public_dns': data.get('PublicDnsName') or None,
+                            'created': isoformat(datetime.now())
+                        },
+                        'tags': {tag['Key']: tag['Value'] for tag in data.get('Tags', [])}
                     }
-                    tags = {t['Key']: t['Value'] for t in data.tags or {}}
 
-                    snapshot = EBSSnapshot.create(
-                        data.id,
-                        account_id=self.account.account_id,
-                        location=self.region,
-                        properties=properties,
-                        tags=tags
-                    )
+            return instances
 
-                    self.log.debug('Added new EBSSnapshot {}/{}/{}'.format(
-                        self.account.account_name,
-                        self.region,
-                        snapshot.resource.resource_id
-                    ))
+        # Terminated instances are treated as deleted, so we filter them out server side
+        return self.__iter_pages('ec2', 'describe_instances', parse, Filters=[{
+            'Name': 'instance-state-name',
+            'Values': ['pending', 'running', 'stopping', 'stopped']
+        }])
 
-            db.session.commit()
+    @retry
+    def _fetch_amis(self):
+        """Returns the AMIs owned by the account in the region, in the :obj:`ResourceSync` format
 
-            vk = set(list(snapshots.keys()))
-            evk = set(list(existing_snapshots.keys()))
-            try:
-                for snapshotID in evk - vk:
-                    db.session.delete(existing_snapshots[snapshotID].resource)
-                    self.log.debug('Deleted EBSSnapshot {}/{}/{}'.format(
-                        self.account.account_name,
-                        self.region,
-                        snapshotID
-                    ))
+        Returns:
+            `dict`
+        """
+        ec2 = self.__get_resource('ec2')
 
-                db.session.commit()
-            except:
-                self.log.exception('Failed removing deleted snapshots')
-                db.session.rollback()
+        try:
+            return {
+                data.id: {
+                    'properties': {
+                        'architecture': data.architecture,
+                        'creation_date': parse_date(data.creation_date or '1970-01-01 00:00:00'),
+                        'description': data.description,
+                        'name': data.name,
+                        'platform': data.platform or 'Linux',
+                        'state': data.state,
+                    },
+                    'tags': {tag['Key']: tag['Value'] for tag in data.tags or {}}
+                } for data in ec2.images.filter(Owners=['self'])
+            }
         finally:
             del ec2
 
+    def _fetch_volumes(self):
+        """Returns the EBS Volumes for the account / region, in the :obj:`ResourceSync` format, as a generator returning
+        one page of volumes at a time. Failed API calls are retried for each page, see :meth:`__fetch_page`
+
+        Returns:
+            `generator` of `dict`
+        """
+        def parse(page):
+            return {
+                data['VolumeId']: {
+                    'properties': {
+                        'create_time': data['CreateTime'],
+                        'encrypted': data['Encrypted'],
+                        'iops': data.get('Iops') or 0,
+                        'kms_key_id': data.get('KmsKeyId'),
+                        'size': data['Size'],
+                        'state': data['State'],
+                        'snapshot_id': data['SnapshotId'],
+                        'volume_type': data['VolumeType'],
+                        'attachments': sorted([x['InstanceId'] for x in data['Attachments']])
+                    },
+                    'tags': {t['Key']: t['Value'] for t in data.get('Tags', [])}
+                } for data in page['Volumes']
+            }
+
+        return self.__iter_pages('ec2', 'describe_volumes', parse)
+
+    def _fetch_snapshots(self):
+        """Returns the EBS Snapshots owned by the account in the region, in the :obj:`ResourceSync` format. If the
+        `snapshot_page_size` option is set, a generator returning one page of snapshots at a time is returned instead.
+        Failed API calls are retried for each page, see :meth:`__fetch_page`
+
+        Returns:
+            `dict` or `generator` of `dict`
+        """
+        def parse(page):
+            return {
+                data['SnapshotId']: {
+                    'properties': {
+                        'create_time': data['StartTime'],
+                        'encrypted': data['Encrypted'],
+                        'kms_key_id': data.get('KmsKeyId'),
+                        'state': data['State'],
+                        'state_message': data.get('StateMessage'),
+                        'volume_id': data['VolumeId'],
+                        'volume_size': data['VolumeSize'],
+                    },
+                    'tags': {t['Key']: t['Value'] for t in data.get('Tags', [])}
+                } for data in page['Snapshots']
+            }
+
+        pages = self.__iter_pages(
+            'ec2',
+            'describe_snapshots',
+            parse,
+            page_size=self.snapshot_page_size,
+            OwnerIds=[self.__account_number]
+        )
+        if pages is None or self.snapshot_page_size:
+            return pages
+
+        snapshots = {}
+        for page in pages:
+            snapshots.update(page)
+
+        return snapshots
+
     @retry
-    def update_beanstalks(self):
-        """Update list of Elastic BeanStalks for the account / region
+    def _fetch_beanstalks(self):
+        """Returns the HTTP (non-worker) Elastic BeanStalk environments for the account / region
 
         Returns:
-            `None`
+            `dict`
         """
-        self.log.debug('Updating ElasticBeanStalk environments for {}/{}'.format(
-            self.account.account_name,
-            self.region
-        ))
-        ebclient = self.session.client('elasticbeanstalk', region_name=self.region)
+        ebclient = self.__get_client('elasticbeanstalk')
 
         try:
-            existing_beanstalks = BeanStalk.get_all(self.account, self.region)
             beanstalks = {}
-            # region Fetch elastic beanstalks
-            for env in ebclient.describe_environments()['Environments']:
-                # Only get information for HTTP (non-worker) Beanstalks
-                if env['Tier']['Type'] == 'Standard':
-                    if 'CNAME' in env:
-                        beanstalks[env['EnvironmentId']] = {
-                            'id': env['EnvironmentId'],
-                            'environment_name': env['EnvironmentName'],
-                            'application_name': env['ApplicationName'],
-                            'cname': env['CNAME']
-                        }
-                    else:
-                        self.log.warning('Found a BeanStalk that does not have a CNAME: {} in {}/{}'.format(
-                            env['EnvironmentName'],
-                            self.account,
-                            self.region
-                        ))
-                else:
-                    self.log.debug('Skipping worker tier ElasticBeanstalk environment {}/{}/{}'.format(
-                        self.account.account_name,
-                        self.region,
-                        env['EnvironmentName']
-                    ))
-            # endregion
-
-            try:
-                for data in beanstalks.values():
-                    if data['id'] in existing_beanstalks:
-                        beanstalk = existing_beanstalks[data['id']]
-                        if beanstalk.update(data):
-                            self.log.debug('Change detected for ElasticBeanStalk {}/{}/{}'.format(
-                                self.account.account_name,
-                                self.region,
-                                data['id']
+            for page in self.__paginate(ebclient, 'describe_environments'):
+                for env in page['Environments']:
+                    # Only get information for HTTP (non-worker) Beanstalks
+                    if env['Tier']['Type'] == 'Standard':
+                        if 'CNAME' in env:
+                            beanstalks[env['EnvironmentId']] = {
+                                'id': env['EnvironmentId'],
+                                'environment_name': env['EnvironmentName'],
+                                'application_name': env['ApplicationName'],
+                                'cname': env['CNAME']
+                            }
+                        else:
+                            self.log.warning('Found a BeanStalk that does not have a CNAME: {} in {}/{}'.format(
+                                env['EnvironmentName'],
+                                self.__account_name,
+                                self.region
                             ))
                     else:
-                        bid = data.pop('id')
-                        tags = {}
-                        BeanStalk.create(
-                            bid,
-                            account_id=self.account.account_id,
-                            location=self.region,
-                            properties=data,
-                            tags=tags
-                        )
-
-                        self.log.debug('Added new ElasticBeanStalk {}/{}/{}'.format(
-                            self.account.account_name,
+                        self.log.debug('Skipping worker tier ElasticBeanstalk environment {}/{}/{}'.format(
+                            self.__account_name,
                             self.region,
-                            bid
+                            env['EnvironmentName']
                         ))
-                db.session.commit()
-
-                bk = set(beanstalks.keys())
-                ebk = set(existing_beanstalks.keys())
-
-                for resource_id in ebk - bk:
-                    db.session.delete(existing_beanstalks[resource_id].resource)
-                    self.log.debug('Deleted ElasticBeanStalk {}/{}/{}'.format(
-                        self.account.account_name,
-                        self.region,
-                        resource_id
-                    ))
-                db.session.commit()
-            except:
-                db.session.rollback()
 
             return beanstalks
         finally:
             del ebclient
 
     @retry
-    def update_vpcs(self):
-        """Update list of VPCs for the account / region
+    def _fetch_vpcs(self):
+        """Returns the VPCs for the account / region, as a `dict` mapping the VPC ID to a tuple of the API object and
+        the properties of the VPC
 
         Returns:
-            `None`
+            `dict`
         """
-        self.log.debug('Updating VPCs for {}/{}'.format(
-            self.account.account_name,
-            self.region
-        ))
+        ec2 = self.__get_resource('ec2')
+        ec2_client = self.__get_client('ec2')
 
-        existing_vpcs = VPC.get_all(self.account, self.region)
         try:
-            ec2 = self.session.resource('ec2', region_name=self.region)
-            ec2_client = self.session.client('ec2', region_name=self.region)
-            vpcs = {x.id: x for x in ec2.vpcs.all()}
-
-            for data in vpcs.values():
-                flow_logs = ec2_client.describe_flow_logs(
-                    Filters=[
-                        {
-                            'Name': 'resource-id',
-                            'Values': [data.vpc_id]
-                        }
-                    ]
-                ).get('FlowLogs')
+            # Fetch all flow logs for the region at once, instead of one call per VPC
+            flow_logs = {}
+            for page in self.__paginate(ec2_client, 'describe_flow_logs'):
+                for flow_log in page['FlowLogs']:
+                    flow_logs.setdefault(flow_log['ResourceId'], flow_log)
+
+            vpcs = {}
+            for data in ec2.vpcs.all():
+                flow_log = flow_logs.get(data.vpc_id)
 
                 tags = {t['Key']: t['Value'] for t in data.tags or {}}
-                properties = {
+                vpcs[data.id] = (data, {
                     'vpc_id': data.vpc_id,
                     'cidr_v4': data.cidr_block,
                     'is_default': data.is_default,
                     'state': data.state,
-                    'vpc_flow_logs_status': flow_logs[0]['FlowLogStatus'] if flow_logs else 'UNDEFINED',
-                    'vpc_flow_logs_log_group': flow_logs[0]['LogGroupName'] if flow_logs else 'UNDEFINED',
+                    'vpc_flow_logs_status': flow_log['FlowLogStatus'] if flow_log else 'UNDEFINED',
+                    'vpc_flow_logs_log_group': flow_log['LogGroupName'] if flow_log else 'UNDEFINED',
                     'tags': tags
-                }
-                if data.id in existing_vpcs:
-                    vpc = existing_vpcs[data.vpc_id]
-                    if vpc.update(data, properties):
-                        self.log.debug('Change detected for VPC {}/{}/{} '.format(data.vpc_id, self.region, properties))
+                })
+
+            return vpcs
+        finally:
+            del ec2, ec2_client
+
+    @retry
+    def _fetch_elbs(self):
+        """Returns the classic ELBs for the account / region, keyed by `region::LoadBalancerName`
+
+        Returns:
+            `dict`
+        """
+        elb_client = self.__get_client('elb')
+
+        try:
+            elbs_from_api = {}
+            for page in self.__paginate(elb_client, 'describe_load_balancers'):
+                for load_balancer in page['LoadBalancerDescriptions']:
+                    key = '{}::{}'.format(self.region, load_balancer['LoadBalancerName'])
+                    elbs_from_api[key] = load_balancer
+
+            return elbs_from_api
+        finally:
+            del elb_client
+
+    def _fetch_rds_databases(self):
+        """Returns the RDS Databases for the account / region, as reported by the RDS Lambda collector. Returns `None`
+        if the Lambda execution failed
+
+        Returns:
+            `list` of `dict`
+        """
+        # Special session pinned to a single account for Lambda invocation so we
+        # don't have to manage lambdas in every account & region
+        with self.__session_lock:
+            lambda_client = self.rds_session.client('lambda', region_name=self.rds_collector_region)
+
+        # The AWS Config Lambda will collect all the non-compliant resources for all regions
+        # within the account
+        input_payload = json.dumps({"account_id": self.__account_number,
+                                    "region": self.region,
+                                    "role": self.rds_role,
+                                    "config_rule_name": self.rds_config_rule_name
+                                    }).encode('utf-8')
+        response = lambda_client.invoke(FunctionName=self.rds_function_name, InvocationType='RequestResponse',
+                                        Payload=input_payload
+                                        )
+        response_payload = json.loads(response['Payload'].read().decode('utf-8'))
+        if not response_payload['success']:
+            self.log.error('RDS Lambda Execution Failed / {} / {} / {}'.
+                           format(self.__account_name, self.region, response_payload))
+            return None
+
+        return response_payload['data'] or []
+    # endregion
+
+    # region Sync functions
+    def _sync_instances(self, pages):
+        sync = ResourceSync(
+            EC2Instance,
+            self.account,
+            self.region,
+            create_only_properties=('created',),
+            digest_property='sync_digest' if self.incremental_collection else None
+        )
+        self.__log_sync_result(EC2Instance, sync.sync_stream(pages))
+
+    def _sync_amis(self, images):
+        self.__log_sync_result(AMI, ResourceSync(AMI, self.account, self.region).sync(images))
+
+    def _sync_volumes(self, pages):
+        self.__log_sync_result(EBSVolume, ResourceSync(EBSVolume, self.account, self.region).sync_stream(pages))
+
+    def _sync_snapshots(self, snapshots):
+        sync = ResourceSync(EBSSnapshot, self.account, self.region)
+
+        if self.snapshot_page_size:
+            self.__log_sync_result(EBSSnapshot, sync.sync_stream(snapshots))
+        else:
+            self.__log_sync_result(EBSSnapshot, sync.sync(snapshots))
+
+    def _sync_beanstalks(self, beanstalks):
+        existing_beanstalks = BeanStalk.get_all(self.account, self.region)
+
+        try:
+            for data in beanstalks.values():
+                if data['id'] in existing_beanstalks:
+                    beanstalk = existing_beanstalks[data['id']]
+                    if beanstalk.update(data):
+                        self.log.debug('Change detected for ElasticBeanStalk {}/{}/{}'.format(
+                            self.account.account_name,
+                            self.region,
+                            data['id']
+                        ))
                 else:
-                    VPC.create(
-                        data.id,
+                    bid = data.pop('id')
+                    tags = {}
+                    BeanStalk.create(
+                        bid,
                         account_id=self.account.account_id,
                         location=self.region,
-                        properties=properties,
+                        properties=data,
                         tags=tags
                     )
+
+                    self.log.debug('Added new ElasticBeanStalk {}/{}/{}'.format(
+                        self.account.account_name,
+                        self.region,
+                        bid
+                    ))
             db.session.commit()
 
-            # Removal of VPCs
-            vk = set(vpcs.keys())
-            evk = set(existing_vpcs.keys())
+            bk = set(beanstalks.keys())
+            ebk = set(existing_beanstalks.keys())
 
-            for resource_id in evk - vk:
-                db.session.delete(existing_vpcs[resource_id].resource)
-                self.log.debug('Removed VPCs {}/{}/{}'.format(
+            for resource_id in ebk - bk:
+                db.session.delete(existing_beanstalks[resource_id].resource)
+                self.log.debug('Deleted ElasticBeanStalk {}/{}/{}'.format(
                     self.account.account_name,
                     self.region,
                     resource_id
                 ))
             db.session.commit()
-
-        except Exception:
-            self.log.exception('There was a problem during VPC collection for {}/{}'.format(
-                self.account.account_name,
-                self.region
-            ))
+        except:
             db.session.rollback()
 
-    @retry
-    def update_elbs(self):
-        """Update list of ELBs for the account / region
+    def _sync_vpcs(self, vpcs):
+        existing_vpcs = VPC.get_all(self.account, self.region)
 
-        Returns:
-            `None`
-        """
-        self.log.debug('Updating ELBs for {}/{}'.format(
-            self.account.account_name,
-            self.region
-        ))
+        for vpc_id, (data, properties) in vpcs.items():
+            if vpc_id in existing_vpcs:
+                vpc = existing_vpcs[vpc_id]
+                if vpc.update(data, properties):
+                    self.log.debug('Change detected for VPC {}/{}/{} '.format(vpc_id, self.region, properties))
+            else:
+                VPC.create(
+                    vpc_id,
+                    account_id=self.account.account_id,
+                    location=self.region,
+                    properties=properties,
+                    tags=properties['tags']
+                )
+        db.session.commit()
 
+        # Removal of VPCs
+        vk = set(vpcs.keys())
+        evk = set(existing_vpcs.keys())
+
+        for resource_id in evk - vk:
+            db.session.delete(existing_vpcs[resource_id].resource)
+            self.log.debug('Removed VPCs {}/{}/{}'.format(
+                self.account.account_name,
+                self.region,
+                resource_id
+            ))
+        db.session.commit()
+
+    def _sync_elbs(self, elbs_from_api):
         # ELBs known to CINQ
         elbs_from_db = ELB.get_all(self.account, self.region)
-        try:
 
-            # ELBs known to AWS
-            elb_client = self.session.client('elb', region_name=self.region)
-            load_balancer_instances = elb_client.describe_load_balancers()['LoadBalancerDescriptions']
-            elbs_from_api = {}
-            for load_balancer in load_balancer_instances:
-                key = '{}::{}'.format(self.region, load_balancer['LoadBalancerName'])
-                elbs_from_api[key] = load_balancer
-
-            # Process ELBs known to AWS
-            for elb_identifier in elbs_from_api:
-                data = elbs_from_api[elb_identifier]
-                # ELB already in DB?
-                if elb_identifier in elbs_from_db:
-                    elb = elbs_from_db[elb_identifier]
-                    if elb.update(data):
-                        self.log.info(
-                            'Updating info for ELB {} in {}/{}'.format(
-                                elb.resource.resource_id,
-                                self.account.account_name,
-                                self.region
-                            )
+        # Process ELBs known to AWS
+        for elb_identifier in elbs_from_api:
+            data = elbs_from_api[elb_identifier]
+            # ELB already in DB?
+            if elb_identifier in elbs_from_db:
+                elb = elbs_from_db[elb_identifier]
+                if elb.update(data):
+                    self.log.info(
+                        'Updating info for ELB {} in {}/{}'.format(
+                            elb.resource.resource_id,
+                            self.account.account_name,
+                            self.region
                         )
-                        db.session.add(elb.resource)
-                else:
-                    # Not previously seen this ELB, so add it
-                    if 'Tags' in data:
-                        try:
-                            tags = {tag['Key']: tag['Value'] for tag in data['Tags']}
-                        except AttributeError:
-                            tags = {}
-                    else:
+                    )
+                    db.session.add(elb.resource)
+            else:
+                # Not previously seen this ELB, so add it
+                if 'Tags' in data:
+                    try:
+                        tags = {tag['Key']: tag['Value'] for tag in data['Tags']}
+                    except AttributeError:
                         tags = {}
+                else:
+                    tags = {}
 
-                    vpc_data = (data['VPCId'] if ('VPCId' in data and data['VPCId']) else 'no vpc')
-
-                    properties = {
-                        'lb_name': data['LoadBalancerName'],
-                        'dns_name': data['DNSName'],
-                        'instances': ' '.join(
-                            [instance['InstanceId'] for instance in data['Instances']]
-                        ),
-                        'num_instances': len(
-                            [instance['InstanceId'] for instance in data['Instances']]
-                        ),
-                        'vpc_id': vpc_data,
-                        'state': 'not_reported'
-                    }
-                    if 'CanonicalHostedZoneName' in data:
-                        properties['canonical_hosted_zone_name'] = data['CanonicalHostedZoneName']
-                    else:
-                        properties['canonical_hosted_zone_name'] = None
+                vpc_data = (data['VPCId'] if ('VPCId' in data and data['VPCId']) else 'no vpc')
 
-                    # LoadBalancerName doesn't have to be unique across all regions
-                    # Use region::LoadBalancerName as resource_id
-                    resource_id = '{}::{}'.format(self.region, data['LoadBalancerName'])
+                properties = {
+                    'lb_name': data['LoadBalancerName'],
+                    'dns_name': data['DNSName'],
+                    'instances': ' '.join(
+                        [instance['InstanceId'] for instance in data['Instances']]
+                    ),
+                    'num_instances': len(
+                        [instance['InstanceId'] for instance in data['Instances']]
+                    ),
+                    'vpc_id': vpc_data,
+                    'state': 'not_reported'
+                }
+                if 'CanonicalHostedZoneName' in data:
+                    properties['canonical_hosted_zone_name'] = data['CanonicalHostedZoneName']
+                else:
+                    properties['canonical_hosted_zone_name'] = None
+
+                # LoadBalancerName doesn't have to be unique across all regions
+                # Use region::LoadBalancerName as resource_id
+                resource_id = '{}::{}'.format(self.region, data['LoadBalancerName'])
+
+                # All done, create
+                elb = ELB.create(
+                    resource_id,
+                    account_id=self.account.account_id,
+                    location=self.region,
+                    properties=properties,
+                    tags=tags
+                )
 
-                    # All done, create
-                    elb = ELB.create(
-                        resource_id,
-                        account_id=self.account.account_id,
-                        location=self.region,
-                        properties=properties,
-                        tags=tags
+                self.log.info(
+                    'Added new ELB {}/{}/{}'.format(
+                        self.account.account_name,
+                        self.region,
+                        elb.resource.resource_id
                     )
+                )
 
-                    # elbs[elb.resource.resource_id] = elb
-                    self.log.info(
-                        'Added new ELB {}/{}/{}'.format(
-                            self.account.account_name,
-                            self.region,
-                            elb.resource.resource_id
-                        )
-                    )
+        # Delete no longer existing ELBs
+        elb_keys_from_db = set(list(elbs_from_db.keys()))
+        self.log.debug('elb_keys_from_db =  %s', elb_keys_from_db)
+        elb_keys_from_api = set(list(elbs_from_api.keys()))
+        self.log.debug('elb_keys_from_api = %s', elb_keys_from_api)
 
-            # Delete no longer existing ELBs
-            elb_keys_from_db = set(list(elbs_from_db.keys()))
-            self.log.debug('elb_keys_from_db =  %s', elb_keys_from_db)
-            elb_keys_from_api = set(list(elbs_from_api.keys()))
-            self.log.debug('elb_keys_from_api = %s', elb_keys_from_api)
+        for elb_identifier in elb_keys_from_db - elb_keys_from_api:
+            db.session.delete(elbs_from_db[elb_identifier].resource)
+            self.log.info('Deleted ELB {}/{}/{}'.format(
+                self.account.account_name,
+                self.region,
+                elb_identifier
+            ))
+        db.session.commit()
 
-            for elb_identifier in elb_keys_from_db - elb_keys_from_api:
-                db.session.delete(elbs_from_db[elb_identifier].resource)
-                self.log.info('Deleted ELB {}/{}/{}'.format(
-                    self.account.account_name,
-                    self.region,
-                    elb_identifier
+    def _sync_rds_databases(self, rds_dbs):
+        # Existing RDS resources come from database
+        existing_rds_dbs = RDSInstance.get_all(self.account, self.region)
+
+        for db_instance in rds_dbs:
+            # Ignore DocumentDB for now
+            if db_instance['engine'] in self.rds_ignore_db_types:
+                self.log.info(
+                    'Ignoring DB Instance... Account Name: {}, Region: {}, Instance Name: {}'.format(
+                        self.account.account_name,
+                        self.region,
+                        db_instance['resource_name']
+                    )
                 )
+                continue
+
+            tags = {t['Key']: t['Value'] for t in db_instance['tags'] or {}}
+            properties = {
+                'tags': tags,
+                'metrics': None,
+                'engine': db_instance['engine'],
+                'creation_date': db_instance['creation_date'],
+                'instance_name': db_instance['resource_name']
+            }
+            if db_instance['resource_id'] in existing_rds_dbs:
+                rds = existing_rds_dbs[db_instance['resource_id']]
+                if rds.update(db_instance, properties):
+                    self.log.debug(
+                        'Change detected for RDS instance {}/{} '.format(
+                            db_instance['resource_id'], properties
+                        )
+                    )
+            else:
+                RDSInstance.create(
+                    db_instance['resource_id'],
+                    account_id=self.account.account_id,
+                    location=db_instance['region'],
+                    properties=properties,
+                    tags=tags
                 )
-            db.session.commit()
 
+        # Removal of RDS instances
+        rk = {database['resource_id'] for database in rds_dbs}
+        erk = set(existing_rds_dbs.keys())
 
-        except:
-            self.log.exception('There was a problem during ELB collection for {}/{}'.format(
+        for resource_id in erk - rk:
+            db.session.delete(existing_rds_dbs[resource_id].resource)
+            self.log.debug('Removed RDS instances {}/{}'.format(
                 self.account.account_name,
-                self.region
+                resource_id
             ))
-            db.session.rollback()
+        db.session.commit()
+    # endregion
 
+    # region Helper functions
+    @property
+    def rds_session(self):
+        """Returns a session for the account running the RDS Lambda collector. The session is created on first access
 
-    @retry
-    def update_rds_databases(self):
-        """Update list of RDS Databases for the account / region
+        Returns:
+            :obj:`boto3:boto3.session.Session`
+        """
+        if not getattr(self, '_rds_session', None):
+            self._rds_session = get_aws_session(AWSAccount.get(self.rds_collector_account))
+
+        return self._rds_session
+
+    def __update(self, collection):
+        """Fetch the data for `collection` from the AWS APIs and synchronize it with the database. Collections fetched
+        as a generator of pages are synchronized one page at a time, as the pages are fetched
+
+        Args:
+            collection (`str`): Name of the collection, eg. `instances`
 
         Returns:
             `None`
         """
-        self.log.info('Updating RDS Databases for {} / {}'.format(
-            self.account, self.region
-        ))
-        # All RDS resources are polled via a Lambda collector in a central account
-        rds_collector_account = AWSAccount.get(self.rds_collector_account)
-        rds_session = get_aws_session(rds_collector_account)
-        # Existing RDS resources come from database
-        existing_rds_dbs = RDSInstance.get_all(self.account, self.region)
+        data = getattr(self, '_fetch_{}'.format(collection))()
 
-        try:
-            # Special session pinned to a single account for Lambda invocation so we
-            # don't have to manage lambdas in every account & region
-            lambda_client = rds_session.client('lambda', region_name=self.rds_collector_region)
-
-            # The AWS Config Lambda will collect all the non-compliant resources for all regions
-            # within the account
-            input_payload = json.dumps({"account_id": self.account.account_number,
-                                        "region": self.region,
-                                        "role": self.rds_role,
-                                        "config_rule_name": self.rds_config_rule_name
-                                        }).encode('utf-8')
-            response = lambda_client.invoke(FunctionName=self.rds_function_name, InvocationType='RequestResponse',
-                                            Payload=input_payload
-                                            )
-            response_payload = json.loads(response['Payload'].read().decode('utf-8'))
-            if response_payload['success']:
-                rds_dbs = response_payload['data']
-                if rds_dbs:
-                    for db_instance in rds_dbs:
-                        # Ignore DocumentDB for now
-                        if db_instance['engine'] in self.rds_ignore_db_types:
-                            self.log.info(
-                                'Ignoring DB Instance... Account Name: {}, Region: {}, Instance Name: {}'.format(
-                                    self.account.account_name,
-                                    self.region,
-                                    db_instance['resource_name']
-                                )
-                            )
-                            continue
-
-                        tags = {t['Key']: t['Value'] for t in db_instance['tags'] or {}}
-                        properties = {
-                            'tags': tags,
-                            'metrics': None,
-                            'engine': db_instance['engine'],
-                            'creation_date': db_instance['creation_date'],
-                            'instance_name': db_instance['resource_name']
-                        }
-                        if db_instance['resource_id'] in existing_rds_dbs:
-                            rds = existing_rds_dbs[db_instance['resource_id']]
-                            if rds.update(db_instance, properties):
-                                self.log.debug(
-                                    'Change detected for RDS instance {}/{} '.format(
-                                        db_instance['resource_id'], properties
-                                    )
-                                )
-                        else:
-                            RDSInstance.create(
-                                db_instance['resource_id'],
-                                account_id=self.account.account_id,
-                                location=db_instance['region'],
-                                properties=properties,
-                                tags=tags
-                            )
-                # Removal of RDS instances
-                rk = set()
-                erk = set()
-                if rds_dbs:
-                    for database in rds_dbs:
-                        rk.add(database['resource_id'])
-                for existing in existing_rds_dbs.keys():
-                    erk.add(existing)
-
-                for resource_id in erk - rk:
-                    db.session.delete(existing_rds_dbs[resource_id].resource)
-                    self.log.debug('Removed RDS instances {}/{}'.format(
+        # `retry` returns `None` if the service is not enabled for the account
+        if data is not None:
+            getattr(self, '_sync_{}'.format(collection))(data)
+
+    def __run_concurrent(self, collections):
+        """Fetch the data for all collections in parallel using a bounded thread pool sharing the session of the
+        collector, then apply the database changes serially in the calling thread. Collections that fail to update are
+        logged and skipped. As with sequential collection, errors of the `NON_FATAL_COLLECTIONS` are only logged, and
+        the first error of any other collection is re-raised once the remaining collections have been synchronized
+
+        Args:
+            collections (`list` of `str`): Names of the collections to update
+
+        Returns:
+            `None`
+        """
+        # Resolve anything that requires database access before handing off to the worker threads
+        if 'rds_databases' in collections:
+            self.rds_session
+
+        errors = []
+        with ThreadPoolExecutor(max_workers=min(self.concurrent_workers, len(collections) or 1)) as executor:
+            futures = [
+                (collection, executor.submit(self.__fetch_all, collection))
+                for collection in collections
+            ]
+
+            for collection, future in futures:
+                try:
+                    data = future.result()
+                    if data is not None:
+                        getattr(self, '_sync_{}'.format(collection))(data)
+
+                except Exception as ex:
+                    self.log.exception('Failed collecting {} for {}/{}'.format(
+                        collection,
                         self.account.account_name,
-                        resource_id
+                        self.region
                     ))
-                db.session.commit()
+                    db.session.rollback()
+                    if collection not in NON_FATAL_COLLECTIONS:
+                        errors.append(ex)
 
-            else:
-                self.log.error('RDS Lambda Execution Failed / {} / {} / {}'.
-                                format(self.account.account_name, self.region, response_payload))
+        if errors:
+            raise errors[0]
 
-        except Exception as e:
-            self.log.exception('There was a problem during RDS collection for {}/{}/{}'.format(
-                self.account.account_name, self.region, e
+    def __fetch_all(self, collection):
+        """Fetch the data for `collection` from the AWS APIs, including every page of collections fetched as a
+        generator of pages, so no API calls are left to be made by the thread synchronizing the collection
+
+        Args:
+            collection (`str`): Name of the collection, eg. `instances`
+
+        Returns:
+            `dict`, `list` of `dict` or `None`
+        """
+        data = getattr(self, '_fetch_{}'.format(collection))()
+        if isinstance(data, GeneratorType):
+            return list(data)
+
+        return data
+
+    def __iter_pages(self, service, operation, parse, page_size=None, **kwargs):
+        """Returns a generator returning the pages of a paginated API operation one at a time, as parsed by `parse`.
+        The first page is fetched immediately, so `None` can be returned if the service is not enabled for the account
+
+        Args:
+            service (`str`): Name of the AWS service
+            operation (`str`): Name of the API operation, eg. `describe_instances`
+            parse (`callable`): Function returning the resources of a page, in the :obj:`ResourceSync` format
+            page_size (`int`): Optional page size, overriding the `max_instances` option
+            **kwargs (`dict`): Arguments for the API operation
+
+        Returns:
+            `generator` of `dict` or `None`
+        """
+        client = self.__get_client(service)
+        kwargs['MaxResults'] = self.__get_page_size(operation, page_size)
+
+        page = self.__fetch_page(client, operation, **kwargs)
+        if page is None:
+            return None
+
+        return self.__parse_pages(client, operation, parse, page, kwargs)
+
+    def __parse_pages(self, client, operation, parse, page, kwargs):
+        """Generator parsing the first page of an API operation, then fetching and parsing the remaining pages. Raises
+        an :obj:`InquisitorError` if a page other than the first cannot be fetched, as the resources of the missing
+        pages would otherwise be deleted
+
+        Args:
+            client (:obj:`botocore.client.BaseClient`): Client to call the operation on
+            operation (`str`): Name of the API operation, eg. `describe_instances`
+            parse (`callable`): Function returning the resources of a page, in the :obj:`ResourceSync` format
+            page (`dict`): First page of the API operation
+            kwargs (`dict`): Arguments for the API operation
+
+        Yields:
+            `dict`
+        """
+        while True:
+            yield parse(page)
+
+            if not page.get('NextToken'):
+                break
+
+            kwargs['NextToken'] = page['NextToken']
+            page = self.__fetch_page(client, operation, **kwargs)
+            if page is None:
+                raise InquisitorError('Failed fetching a page of {} for {}/{}'.format(
+                    operation,
+                    self.__account_name,
+                    self.region
+                ))
+
+    @retry
+    def __fetch_page(self, client, operation, **kwargs):
+        """Fetch a single page of a paginated API operation. Pages are fetched without a paginator, as a paginator
+        cannot be resumed after a failed API call, so each page is retried on its own instead of restarting from the
+        first page
+
+        Args:
+            client (:obj:`botocore.client.BaseClient`): Client to call the operation on
+            operation (`str`): Name of the API operation, eg. `describe_instances`
+            **kwargs (`dict`): Arguments for the API operation
+
+        Returns:
+            `dict`
+        """
+        start = time.time()
+        page = getattr(client, operation)(**kwargs)
+        self.__record_page_latency(operation, time.time() - start)
+
+        return page
+
+    def __paginate(self, client, operation, page_size=None, **kwargs):
+        """Generator returning the pages of a paginated API operation one at a time, so each page can be processed
+        and released before the next one is fetched. The page size defaults to the `max_instances` option, limited to
+        the range supported by the operation, and the time spent fetching each page is recorded in `page_latency`
+
+        Args:
+            client (:obj:`botocore.client.BaseClient`): Client to call the operation on
+            operation (`str`): Name of the API operation, eg. `describe_instances`
+            page_size (`int`): Optional page size, overriding the `max_instances` option
+            **kwargs (`dict`): Arguments for the API operation
+
+        Yields:
+            `dict`
+        """
+        page_size = self.__get_page_size(operation, page_size)
+        pages = iter(client.get_paginator(operation).paginate(PaginationConfig={'PageSize': page_size}, **kwargs))
+
+        while True:
+            start = time.time()
+            page = next(pages, None)
+            if page is None:
+                break
+
+            self.__record_page_latency(operation, time.time() - start)
+            yield page
+
+    def __get_page_size(self, operation, page_size=None):
+        """Returns the page size for an API operation, defaulting to the `max_instances` option and limited to the
+        range supported by the operation. The page size is recorded in `page_sizes` for logging
+
+        Args:
+            operation (`str`): Name of the API operation, eg. `describe_instances`
+            page_size (`int`): Optional page size, overriding the `max_instances` option
+
+        Returns:
+            `int`
+        """
+        min_size, max_size = PAGE_SIZE_LIMITS.get(operation, (1, 1000))
+        self.page_sizes[operation] = max(min(page_size or self.max_instances, max_size), min_size)
+
+        return self.page_sizes[operation]
+
+    def __record_page_latency(self, operation, latency):
+        """Record the time spent fetching a page of a paginated API operation in `page_latency`
+
+        Args:
+            operation (`str`): Name of the API operation, eg. `describe_instances`
+            latency (`float`): Time in seconds spent fetching the page
+
+        Returns:
+            `None`
+        """
+        self.page_latency[operation].append(latency)
+        self.log.debug('Fetched page {} of {} for {}/{} in {:.3f}s'.format(
+            len(self.page_latency[operation]),
+            operation,
+            self.__account_name,
+            self.region,
+            latency
+        ))
+
+    def __log_page_latency(self):
+        """Log the number of pages fetched and the page latency for each paginated API operation
+
+        Returns:
+            `None`
+        """
+        for operation, latencies in self.page_latency.items():
+            self.log.info('Fetched {} pages of {} for {}/{} (page size {}): {:.3f}s average, {:.3f}s max'.format(
+                len(latencies),
+                operation,
+                self.__account_name,
+                self.region,
+                self.page_sizes[operation],
+                sum(latencies) / len(latencies),
+                max(latencies)
             ))
-            db.session.rollback()
+
+    def __log_throttling(self):
+        """Log the current rate of the API rate limiters for the account and region, if any calls were throttled
+
+        Returns:
+            `None`
+        """
+        for stats in get_rate_limiter_stats(self.__account_number, self.region):
+            if stats['throttles']:
+                self.log.warning(
+                    'Calls to {} for {}/{} throttled {} times ({} in the last minute), rate limited to {:.1f}/s'.format(
+                        stats['service'],
+                        self.__account_name,
+                        self.region,
+                        stats['throttles'],
+                        stats['throttlesPerMinute'],
+                        stats['rate']
+                    )
+                )
+
+    def __get_client(self, service):
+        """Returns a boto3 client for `service` in the region of the collector. boto3 sessions are not thread-safe, so
+        clients are created while holding a lock on the session
+
+        Args:
+            service (`str`): Name of the AWS service
+
+        Returns:
+            :obj:`botocore.client.BaseClient`
+        """
+        with self.__session_lock:
+            return self.session.client(service, region_name=self.region)
+
+    def __get_resource(self, service):
+        """Returns a boto3 service resource for `service` in the region of the collector
+
+        Args:
+            service (`str`): Name of the AWS service
+
+        Returns:
+            :obj:`boto3.resources.base.ServiceResource`
+        """
+        with self.__session_lock:
+            return self.session.resource(service, region_name=self.region)
+
+    def __log_sync_result(self, resource_class, result):
+        """Log the outcome of a bulk resource synchronization
+
+        Args:
+            resource_class (`BaseResource`): Resource type that was synchronized
+            result (:obj:`ResourceSyncResult`): Result returned from :meth:`ResourceSync.sync`
+
+        Returns:
+            `None`
+        """
+        self.log.debug('Synchronized {} for {}/{}: {} added, {} updated, {} deleted, {} unchanged'.format(
+            resource_class.resource_name,
+            self.account.account_name,
+            self.region,
+            len(result.inserted),
+            len(result.updated),
+            len(result.deleted),
+            len(result.unchanged)
+        ))
+    # endregion
@@ -1,27 +1,56 @@
+import hashlib
+import re
+import time
 from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from threading import Lock
 
 import requests
+from requests.adapters import HTTPAdapter
 from cloud_inquisitor.config import dbconfig, ConfigOption
 from cloud_inquisitor.database import db
 from cloud_inquisitor.exceptions import CloudFlareError
 from cloud_inquisitor.plugins import BaseCollector, CollectorType
 from cloud_inquisitor.plugins.types.accounts import AXFRAccount, CloudFlareAccount
-from cloud_inquisitor.plugins.types.resources import DNSZone, DNSRecord
+from cloud_inquisitor.plugins.types.resources import DNSZone, DNSRecord, ResourceSync
+from cloud_inquisitor.schema import ResourceProperty
 from cloud_inquisitor.utils import get_resource_id
 from cloud_inquisitor.wrappers import retry
-from dns import zone as dns_zone, query
+from dns import zone as dns_zone, query, message, rdatatype
 from dns.rdatatype import to_text as type_to_text
 
+from cinq_collector_dns.xfr import ZoneTransfer
+
+# Largest page sizes accepted by the CloudFlare API for the zone and DNS record listings
+CLOUDFLARE_ZONES_PER_PAGE = 50
+CLOUDFLARE_RECORDS_PER_PAGE = 5000
+
+# Number of requests left in the CloudFlare rate limit window required for each concurrent worker
+CLOUDFLARE_REQUESTS_PER_WORKER = 20
+
+
 class DNSCollector(BaseCollector):
     name = 'DNS'
     ns = 'collector_dns'
     type = CollectorType.GLOBAL
     interval = dbconfig.get('interval', ns, 15)
+    produces = (DNSZone.resource_type, DNSRecord.resource_type)
     options = (
         ConfigOption('enabled', False, 'bool', 'Enable the DNS collector plugin'),
         ConfigOption('interval', 15, 'int', 'Run frequency in minutes'),
         ConfigOption('cloudflare_enabled', False, 'bool', 'Enable CloudFlare as a source for DNS records'),
-        ConfigOption('axfr_enabled', False, 'bool', 'Enable using DNS Zone Transfers for records')
+        ConfigOption('axfr_enabled', False, 'bool', 'Enable using DNS Zone Transfers for records'),
+        ConfigOption('cloudflare_workers', 10, 'int',
+                     'Maximum number of CloudFlare zones to fetch concurrently per account. The number of workers is '
+                     'reduced when the CloudFlare API rate limit is close to being exhausted'),
+        ConfigOption('axfr_workers', 5, 'int', 'Number of DNS zone transfers to perform concurrently per server'),
+        ConfigOption('incremental_sync', True, 'bool',
+                     'Only update the records of zones that changed since the last run, by comparing the record ids '
+                     'of the zone. Zones with an unchanged SOA serial are not transferred again'),
+        ConfigOption('axfr_streaming', False, 'bool',
+                     'Stream zone transfers into the record sync one record at a time instead of loading the whole '
+                     'zone in memory, and request incremental transfers (IXFR) for zones transferred before. '
+                     'Requires incremental_sync')
     )
 
     def __init__(self):
@@ -29,18 +58,25 @@ class DNSCollector(BaseCollector):
 
         self.axfr_enabled = self.dbconfig.get('axfr_enabled', self.ns, False)
         self.cloudflare_enabled = self.dbconfig.get('cloudflare_enabled', self.ns, False)
+        self.cloudflare_workers = max(self.dbconfig.get('cloudflare_workers', self.ns, 10), 1)
+        self.axfr_workers = max(self.dbconfig.get('axfr_workers', self.ns, 5), 1)
+        self.incremental_sync = self.dbconfig.get('incremental_sync', self.ns, True)
+        self.axfr_streaming = self.incremental_sync and self.dbconfig.get('axfr_streaming', self.ns, False)
 
         self.axfr_accounts = list(AXFRAccount.get_all().values())
         self.cf_accounts = list(CloudFlareAccount.get_all().values())
 
         self.cloudflare_initialized = defaultdict(lambda: False)
         self.cloudflare_session = {}
+        self.cloudflare_ratelimit = {}
+        self.cloudflare_lock = Lock()
 
     def run(self):
         if self.axfr_enabled:
             try:
                 for account in self.axfr_accounts:
-                    records = self.get_axfr_records(account.server, account.domains)
+                    serials = self.get_zone_digests(account) if self.incremental_sync else None
+                    records = self.get_axfr_records(account.server, account.domains, serials)
                     self.process_zones(records, account)
             except:
                 self.log.exception('Failed processing domains via AXFR')
@@ -57,7 +93,7 @@ class DNSCollector(BaseCollector):
         self.log.info('Processing DNS records for {}'.format(account.account_name))
 
         # region Update zones
-        existing_zones = DNSZone.get_all(account)
+        existing_zones = DNSZone.get_all(account, load_relations=True)
         for data in zones:
             if data['zone_id'] in existing_zones:
                 zone = DNSZone.get(data['zone_id'])
@@ -71,7 +107,7 @@ class DNSCollector(BaseCollector):
                 DNSZone.create(
                     data['zone_id'],
                     account_id=account.account_id,
-                    properties={k: v for k, v in data.items() if k not in ('records', 'zone_id', 'tags')},
+                    properties={k: v for k, v in data.items() if k not in ('records', 'zone_id', 'tags', 'digest')},
                     tags=data['tags']
                 )
 
@@ -101,6 +137,179 @@ class DNSCollector(BaseCollector):
         # endregion
 
         # region Update resource records
+        if self.incremental_sync:
+            self.__sync_records(zones, account)
+        else:
+            self.__update_records(zones, account)
+        # endregion
+
+    def get_zone_digests(self, account):
+        """Returns the record digest stored for each DNS zone of the account when its records were last updated, or
+        `None` for zones without a digest
+
+        Args:
+            account (:obj:`Account`): Account owning the zones
+
+        Returns:
+            `dict` of `str`: `str`
+        """
+        return ResourceSync(DNSZone, account, digest_property='record_digest').load_digests()
+
+    def __sync_records(self, zones, account):
+        """Synchronize the records of the zones using set differences of the record ids. Record ids are derived from
+        the contents of the record, so a changed record shows up as one deleted and one added id, and records never
+        need to be compared field by field. Zones whose digest matches the digest stored at the end of the previous
+        sync are skipped entirely
+
+        Args:
+            zones (`list` of `dict`): Zones and their records, as returned by the AXFR or CloudFlare methods
+            account (:obj:`Account`): Account owning the zones
+
+        Returns:
+            `None`
+        """
+        digests = self.get_zone_digests(account)
+        changed_zones = [
+            zone for zone in zones
+            if zone['records'] is not None and (not zone['digest'] or zone['digest'] != digests.get(zone['zone_id']))
+        ]
+        self.log.info('Syncing records for {} of {} DNS zones for {}'.format(
+            len(changed_zones),
+            len(zones),
+            account.account_name
+        ))
+
+        sync = ResourceSync(DNSRecord, account)
+        existing_records = sync.load_children([zone['zone_id'] for zone in changed_zones])
+
+        for zone in changed_zones:
+            try:
+                existing = existing_records[zone['zone_id']]
+                records = zone['records']
+
+                if isinstance(records, ZoneTransfer):
+                    records.start()
+                    if records.up_to_date:
+                        continue
+
+                    zone['digest'] = str(records.current_serial)
+                    if records.incremental:
+                        added, removed = self.__get_record_changes(records.changes(), existing)
+                    else:
+                        added, removed = self.__get_record_difference(records.records(), existing)
+                else:
+                    added, removed = self.__get_record_difference(records, existing)
+
+                if added:
+                    sync.sync(added, existing=sync.load(added), delete=False, auto_commit=False)
+                    sync.add_children(zone['zone_id'], added)
+
+                sync.delete(removed)
+                self.__set_zone_digest(zone['zone_id'], zone['digest'])
+                db.session.commit()
+
+                self.log.debug('Synced DNS records for {}/{}: {} added, {} deleted'.format(
+                    account.account_name,
+                    zone['name'],
+                    len(added),
+                    len(removed)
+                ))
+            except:
+                self.log.exception('Error while attempting to update records for {}/{}'.format(
+                    account.account_name,
+                    zone['zone_id'],
+                ))
+                db.session.rollback()
+
+    @staticmethod
+    def __get_record_data(record):
+        return {
+            'properties': {k: v for k, v in record.items() if k not in ('records', 'zone_id')},
+            'tags': {}
+        }
+
+    def __get_record_difference(self, records, existing):
+        """Compare the full set of records of a zone with the ids of the records in the database. Only the records
+        that are not in the database are kept in memory, so `records` can be a generator streaming a large zone
+
+        Args:
+            records (`iterable` of `dict`): All records of the zone
+            existing (`set` of `str`): Ids of the records of the zone in the database
+
+        Returns:
+            `tuple` of (`dict`, `set`): The data of the added records keyed by id, and the ids of the removed records
+        """
+        added = {}
+        seen = set()
+
+        for record in records:
+            seen.add(record['id'])
+            if record['id'] not in existing:
+                added[record['id']] = self.__get_record_data(record)
+
+        return added, existing - seen
+
+    def __get_record_changes(self, changes, existing):
+        """Apply the changes of an incremental zone transfer to the ids of the records in the database, in order, so
+        records added and deleted again in later versions of the zone cancel out
+
+        Args:
+            changes (`iterable` of `tuple` of (`bool`, `dict`)): Added or deleted records, as yielded by
+                :meth:`ZoneTransfer.changes`
+            existing (`set` of `str`): Ids of the records of the zone in the database
+
+        Returns:
+            `tuple` of (`dict`, `set`): The data of the added records keyed by id, and the ids of the removed records
+        """
+        added = {}
+        removed = set()
+
+        for is_added, record in changes:
+            if is_added:
+                removed.discard(record['id'])
+                if record['id'] not in existing:
+                    added[record['id']] = self.__get_record_data(record)
+
+            else:
+                added.pop(record['id'], None)
+                if record['id'] in existing:
+                    removed.add(record['id'])
+
+        return added, removed
+
+    def __set_zone_digest(self, zone_id, digest):
+        """Store the record digest of a zone, without loading the zone
+
+        Args:
+            zone_id (`str`): Id of the zone
+            digest (`str`): Digest of the records of the zone
+
+        Returns:
+            `None`
+        """
+        updated = db.session.query(ResourceProperty).filter(
+            ResourceProperty.resource_id == zone_id,
+            ResourceProperty.name == 'record_digest'
+        ).update({'value': digest}, synchronize_session=False)
+
+        if not updated:
+            prop = ResourceProperty()
+            prop.resource_id = zone_id
+            prop.name = 'record_digest'
+            prop.value = digest
+            db.session.add(prop)
+
+    def __update_records(self, zones, account):
+        """Update the records of the zones one by one, comparing each record loaded from the database with the
+        record returned by the source
+
+        Args:
+            zones (`list` of `dict`): Zones and their records, as returned by the AXFR or CloudFlare methods
+            account (:obj:`Account`): Account owning the zones
+
+        Returns:
+            `None`
+        """
         for zone in zones:
             try:
                 existing_zone = DNSZone.get(zone['zone_id'])
@@ -142,6 +351,10 @@ class DNSCollector(BaseCollector):
                         zone['zone_id'],
                         record.name
                     ))
+
+                # Keep the digest current, in case incremental sync is enabled again later
+                if zone['digest']:
+                    self.__set_zone_digest(zone['zone_id'], zone['digest'])
                 db.session.commit()
             except:
                 self.log.exception('Error while attempting to update records for {}/{}'.format(
@@ -149,89 +362,196 @@ class DNSCollector(BaseCollector):
                     zone['zone_id'],
                 ))
                 db.session.rollback()
-        # endregion
 
     @retry
-    def get_axfr_records(self, server, domains):
-        """Return a `list` of `dict`s containing the zones and their records, obtained from the DNS server
+    def get_axfr_records(self, server, domains, serials=None):
+        """Return a `list` of `dict`s containing the zones and their records, obtained from the DNS server. Up to
+        `axfr_workers` zone transfers are performed concurrently.
+
+        If `serials` is provided, the SOA serial of each zone is queried first, and zones whose serial matches the
+        serial in `serials` are not transferred. Those zones are returned with `records` set to `None`.
+
+        If `axfr_streaming` is enabled, no transfers are made. Instead `records` is set to a :obj:`ZoneTransfer`, which
+        streams the records of the zone when the records are synchronized
+
+        Args:
+            server (`str`): DNS server to request the zone transfers from
+            domains (`list` of `str`): Names of the DNS zones
+            serials (`dict` of `str`: `str`): SOA serial of the zones from the previous run, keyed by zone id
 
         Returns:
             :obj:`list` of `dict`
         """
-        zones = []
-        for zoneName in domains:
-            try:
-                zone = {
-                    'zone_id': get_resource_id('axfrz', zoneName),
-                    'name': zoneName,
-                    'source': 'AXFR',
-                    'comment': None,
-                    'tags': {},
-                    'records': []
-                }
-
-                z = dns_zone.from_xfr(query.xfr(server, zoneName))
-                rdata_fields = ('name', 'ttl', 'rdata')
-                for rr in [dict(zip(rdata_fields, x)) for x in z.iterate_rdatas()]:
-                    record_name = rr['name'].derelativize(z.origin).to_text()
-                    zone['records'].append(
-                    {
-                        'id': get_resource_id('axfrr', record_name, ['{}={}'.format(k, str(v)) for k, v in rr.items()]),
-                        'zone_id': zone['zone_id'],
-                        'name': record_name,
-                        'value': sorted([rr['rdata'].to_text()]),
-                        'type': type_to_text(rr['rdata'].rdtype)
-                    })
-
-                if len(zone['records']) > 0:
-                    zones.append(zone)
-
-            except Exception as ex:
-                self.log.exception('Failed fetching DNS zone information for {}: {}'.format(zoneName, ex))
-                raise
+        if self.axfr_streaming:
+            return [self.__get_axfr_zone_stream(server, zoneName, serials) for zoneName in domains]
 
-        return zones
+        with ThreadPoolExecutor(max_workers=self.axfr_workers) as executor:
+            zones = list(executor.map(lambda zoneName: self.__get_axfr_zone(server, zoneName, serials), domains))
+
+        return [zone for zone in zones if zone['records'] is None or len(zone['records']) > 0]
+
+    def __get_axfr_zone(self, server, zoneName, serials=None):
+        """Return a `dict` containing the zone and its records, obtained from a zone transfer from the DNS server.
+        The SOA serial of the zone is returned as the `digest` of the zone
+
+        Args:
+            server (`str`): DNS server to request the zone transfer from
+            zoneName (`str`): Name of the DNS zone
+            serials (`dict` of `str`: `str`): SOA serial of the zones from the previous run, keyed by zone id
+
+        Returns:
+            `dict`
+        """
+        try:
+            zone = {
+                'zone_id': get_resource_id('axfrz', zoneName),
+                'name': zoneName,
+                'source': 'AXFR',
+                'comment': None,
+                'tags': {},
+                'records': [],
+                'digest': None
+            }
+
+            if serials and serials.get(zone['zone_id']):
+                serial = self.__get_axfr_serial(server, zoneName)
+                if serial == serials[zone['zone_id']]:
+                    self.log.debug('SOA serial unchanged for DNS zone AXFR/{}, skipping transfer'.format(zoneName))
+                    zone['records'] = None
+                    zone['digest'] = serial
+                    return zone
+
+            z = dns_zone.from_xfr(query.xfr(server, zoneName))
+            zone['digest'] = str(z.find_rdataset(z.origin, rdatatype.SOA)[0].serial)
+            rdata_fields = ('name', 'ttl', 'rdata')
+            for rr in [dict(zip(rdata_fields, x)) for x in z.iterate_rdatas()]:
+                record_name = rr['name'].derelativize(z.origin).to_text()
+                zone['records'].append(
+                {
+                    'id': get_resource_id('axfrr', record_name, ['{}={}'.format(k, str(v)) for k, v in rr.items()]),
+                    'zone_id': zone['zone_id'],
+                    'name': record_name,
+                    'value': sorted([rr['rdata'].to_text()]),
+                    'type': type_to_text(rr['rdata'].rdtype)
+                })
+
+            return zone
+
+        except Exception as ex:
+            self.log.exception('Failed fetching DNS zone information for {}: {}'.format(zoneName, ex))
+            raise
+
+    def __get_axfr_zone_stream(self, server, zoneName, serials=None):
+        """Return a `dict` for the zone, with a :obj:`ZoneTransfer` in place of the records. An incremental transfer
+        is requested if the SOA serial of the zone from the previous run is known
+
+        Args:
+            server (`str`): DNS server to request the zone transfer from
+            zoneName (`str`): Name of the DNS zone
+            serials (`dict` of `str`: `str`): SOA serial of the zones from the previous run, keyed by zone id
+
+        Returns:
+            `dict`
+        """
+        zone_id = get_resource_id('axfrz', zoneName)
+        serial = (serials or {}).get(zone_id)
+
+        return {
+            'zone_id': zone_id,
+            'name': zoneName,
+            'source': 'AXFR',
+            'comment': None,
+            'tags': {},
+            'records': ZoneTransfer(server, zoneName, int(serial) if str(serial).isdigit() else None),
+            'digest': None
+        }
+
+    def __get_axfr_serial(self, server, zoneName):
+        """Returns the SOA serial of the zone as a string, or `None` if the serial could not be queried
+
+        Args:
+            server (`str`): DNS server to query
+            zoneName (`str`): Name of the DNS zone
+
+        Returns:
+            `str`
+        """
+        try:
+            response = query.udp(message.make_query(zoneName, rdatatype.SOA), server, timeout=5)
+            for rrset in response.answer:
+                if rrset.rdtype == rdatatype.SOA:
+                    return str(rrset[0].serial)
+
+        except Exception as ex:
+            self.log.warning('Failed querying SOA serial for {}: {}'.format(zoneName, ex))
 
     def get_cloudflare_records(self, *, account):
-        """Return a `list` of `dict`s containing the zones and their records, obtained from the CloudFlare API
+        """Return a `list` of `dict`s containing the zones and their records, obtained from the CloudFlare API. Zones
+        are fetched concurrently, with the number of workers reduced as the CloudFlare rate limit is being exhausted
 
         Returns:
             account (:obj:`CloudFlareAccount`): A CloudFlare Account object
             :obj:`list` of `dict`
         """
         zones = []
+        zobjs = self.__cloudflare_list_zones(account=account)
 
-        for zobj in self.__cloudflare_list_zones(account=account):
-            try:
-                self.log.debug('Processing DNS zone CloudFlare/{}'.format(zobj['name']))
-                zone = {
-                    'zone_id': get_resource_id('cfz', zobj['name']),
-                    'name': zobj['name'],
-                    'source': 'CloudFlare',
-                    'comment': None,
-                    'tags': {},
-                    'records': []
-                }
-
-                for record in self.__cloudflare_list_zone_records(account=account, zoneID=zobj['id']):
-                    zone['records'].append({
-                        'id': get_resource_id('cfr', zobj['id'], ['{}={}'.format(k, v) for k, v in record.items()]),
-                        'zone_id': zone['zone_id'],
-                        'name': record['name'],
-                        'value': record['value'],
-                        'type': record['type']
-                    })
+        with ThreadPoolExecutor(max_workers=self.cloudflare_workers) as executor:
+            while zobjs:
+                workers = self.__get_cloudflare_workers(account)
+                batch, zobjs = zobjs[:workers], zobjs[workers:]
 
-                if len(zone['records']) > 0:
-                    zones.append(zone)
-            except CloudFlareError:
-                self.log.exception('Failed getting records for CloudFlare zone {}'.format(zobj['name']))
+                for zone in executor.map(lambda zobj: self.__get_cloudflare_zone(account, zobj), batch):
+                    if zone and len(zone['records']) > 0:
+                        zones.append(zone)
 
         return zones
 
+    def __get_cloudflare_zone(self, account, zobj):
+        """Return a `dict` containing the zone and its records, or `None` if the records could not be fetched
+
+        Args:
+            account (:obj:`CloudFlareAccount`): A CloudFlare Account object
+            zobj (`dict`): Zone information returned by the CloudFlare API
+
+        Returns:
+            `dict`
+        """
+        try:
+            self.log.debug('Processing DNS zone CloudFlare/{}'.format(zobj['name']))
+            zone = {
+                'zone_id': get_resource_id('cfz', zobj['name']),
+                'name': zobj['name'],
+                'source': 'CloudFlare',
+                'comment': None,
+                'tags': {},
+                'records': [],
+                'digest': None
+            }
+
+            for record in self.__cloudflare_list_zone_records(account=account, zoneID=zobj['id']):
+                zone['records'].append({
+                    'id': get_resource_id('cfr', zobj['id'], ['{}={}'.format(k, v) for k, v in record.items()]),
+                    'zone_id': zone['zone_id'],
+                    'name': record['name'],
+                    'value': record['value'],
+                    'type': record['type']
+                })
+
+            # CloudFlare has no zone serial, but record ids are derived from the record contents
+            zone['digest'] = hashlib.sha256(
+                ','.join(sorted(record['id'] for record in zone['records'])).encode('utf-8')
+            ).hexdigest()
+
+            return zone
+
+        except CloudFlareError:
+            self.log.exception('Failed getting records for CloudFlare zone {}'.format(zobj['name']))
+
     # region Helper functions for CloudFlare
     def __cloudflare_request(self, *, account, path, args=None):
-        """Helper function to interact with the CloudFlare API.
+        """Helper function to interact with the CloudFlare API. Requests rejected by the rate limit are retried after
+        the delay requested by the API
 
         Args:
             account (:obj:`CloudFlareAccount`): CloudFlare Account object
@@ -244,26 +564,95 @@ class DNSCollector(BaseCollector):
         if not args:
             args = {}
 
-        if not self.cloudflare_initialized[account.account_id]:
-            self.cloudflare_session[account.account_id] = requests.Session()
-            self.cloudflare_session[account.account_id].headers.update({
-                'X-Auth-Email': account.email,
-                'X-Auth-Key': account.api_key,
-                'Content-Type': 'application/json'
-            })
-            self.cloudflare_initialized[account.account_id] = True
-
         if 'per_page' not in args:
             args['per_page'] = 100
 
-        response = self.cloudflare_session[account.account_id].get(account.endpoint + path, params=args)
+        session = self.__get_cloudflare_session(account)
+
+        for attempt in range(5):
+            response = session.get(account.endpoint + path, params=args)
+            self.__update_cloudflare_ratelimit(account, response)
+
+            if response.status_code != 429:
+                break
+
+            delay = int(response.headers.get('Retry-After', 2 ** attempt))
+            self.log.warning('CloudFlare rate limit exceeded for {}, retrying in {} seconds'.format(
+                account.account_name,
+                delay
+            ))
+            time.sleep(delay)
+
         if response.status_code != 200:
             raise CloudFlareError('Request failed: {}'.format(response.text))
 
         return response.json()
 
+    def __get_cloudflare_session(self, account):
+        """Returns the `requests` session for the account, creating it if required. The session is shared by all
+        workers fetching zones for the account, so its connection pool is sized for the maximum number of workers
+
+        Args:
+            account (:obj:`CloudFlareAccount`): CloudFlare Account object
+
+        Returns:
+            :obj:`requests.Session`
+        """
+        with self.cloudflare_lock:
+            if not self.cloudflare_initialized[account.account_id]:
+                session = requests.Session()
+                session.mount('https://', HTTPAdapter(pool_maxsize=self.cloudflare_workers))
+                session.headers.update({
+                    'X-Auth-Email': account.email,
+                    'X-Auth-Key': account.api_key,
+                    'Content-Type': 'application/json'
+                })
+                self.cloudflare_session[account.account_id] = session
+                self.cloudflare_initialized[account.account_id] = True
+
+            return self.cloudflare_session[account.account_id]
+
+    def __update_cloudflare_ratelimit(self, account, response):
+        """Record the number of requests left in the current rate limit window for the account, from either the
+        `RateLimit` (eg. `"default";r=1150;t=240`) or the `X-RateLimit-Remaining` response headers
+
+        Args:
+            account (:obj:`CloudFlareAccount`): CloudFlare Account object
+            response (:obj:`requests.Response`): Response from the CloudFlare API
+
+        Returns:
+            `None`
+        """
+        if response.status_code == 429:
+            self.cloudflare_ratelimit[account.account_id] = 0
+            return
+
+        match = re.search(r'\br=(\d+)', response.headers.get('RateLimit', ''))
+        if match:
+            self.cloudflare_ratelimit[account.account_id] = int(match.group(1))
+
+        elif 'X-RateLimit-Remaining' in response.headers:
+            self.cloudflare_ratelimit[account.account_id] = int(response.headers['X-RateLimit-Remaining'])
+
+    def __get_cloudflare_workers(self, account):
+        """Returns the number of zones to fetch concurrently for the account, based on the number of requests left in
+        the CloudFlare rate limit window
+
+        Args:
+            account (:obj:`CloudFlareAccount`): CloudFlare Account object
+
+        Returns:
+            `int`
+        """
+        remaining = self.cloudflare_ratelimit.get(account.account_id)
+        if remaining is None:
+            return self.cloudflare_workers
+
+        return max(1, min(self.cloudflare_workers, remaining // CLOUDFLARE_REQUESTS_PER_WORKER))
+
     def __cloudflare_list_zones(self, *, account, **kwargs):
-        """Helper function to list all zones registered in the CloudFlare system. Returns a `list` of the zones
+        """Helper function to list all zones registered in the CloudFlare system. Returns a `list` of the zones. Once
+        the first page has been returned, the remaining pages are fetched concurrently
 
         Args:
             account (:obj:`CloudFlareAccount`): A CloudFlare Account object
@@ -272,21 +661,17 @@ class DNSCollector(BaseCollector):
         Returns:
             `list` of `dict`
         """
-        done = False
-        zones = []
-        page = 1
+        def get_page(page):
+            return self.__cloudflare_request(account=account, path='/zones', args=dict(kwargs, page=page))
 
-        while not done:
-            kwargs['page'] = page
-            response = self.__cloudflare_request(account=account, path='/zones', args=kwargs)
-            info = response['result_info']
-
-            if 'total_pages' not in info or page == info['total_pages']:
-                done = True
-            else:
-                page += 1
+        kwargs['per_page'] = CLOUDFLARE_ZONES_PER_PAGE
+        response = get_page(1)
+        zones = response['result']
+        pages = range(2, response['result_info'].get('total_pages', 1) + 1)
 
-            zones += response['result']
+        with ThreadPoolExecutor(max_workers=self.__get_cloudflare_workers(account)) as executor:
+            for response in executor.map(get_page, pages):
+                zones += response['result']
 
         return zones
 
@@ -305,6 +690,7 @@ class DNSCollector(BaseCollector):
         done = False
         records = {}
         page = 1
+        kwargs['per_page'] = CLOUDFLARE_RECORDS_PER_PAGE
 
         while not done:
             kwargs['page'] = page
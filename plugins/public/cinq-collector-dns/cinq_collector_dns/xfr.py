@@ -0,0 +1,151 @@
+from itertools import chain
+
+from cloud_inquisitor.utils import get_resource_id
+from dns import name as dns_name, query, rdatatype
+from dns.rdatatype import to_text as type_to_text
+
+
+class ZoneTransfer(object):
+    """Streaming DNS zone transfer. Instead of building a :obj:`dns.zone.Zone` from the transfer, the resource records
+    are normalized and yielded one at a time while the messages are read from the server, keeping memory usage
+    independent of the size of the zone.
+
+    If the SOA serial from a previous transfer is provided, an incremental zone transfer (IXFR) is requested. Servers
+    without IXFR support, or without history for the serial, reply with the full zone instead, which is detected
+    automatically
+
+    Example::
+
+        transfer = ZoneTransfer('10.0.0.53', 'example.com', serial=2018010101)
+        transfer.start()
+
+        if transfer.up_to_date:
+            pass
+        elif transfer.incremental:
+            for added, record in transfer.changes():
+                ...
+        else:
+            for record in transfer.records():
+                ...
+
+    Args:
+        server (`str`): IP address of the DNS server to request the transfer from
+        zone_name (`str`): Name of the DNS zone
+        serial (`int`): SOA serial of the zone from a previous transfer. Default: `None`, request a full transfer
+        port (`int`): Port of the DNS server. Default: 53
+        timeout (`float`): Timeout in seconds for reading each message from the server. Default: 30
+        lifetime (`float`): Maximum duration of the transfer in seconds. Default: 3600
+
+    Attributes:
+        zone_id (`str`): Resource id of the zone
+        current_serial (`int`): SOA serial of the zone on the server, available after calling :meth:`start`
+        up_to_date (`bool`): `True` if the zone has not changed since `serial`
+        incremental (`bool`): `True` if the server replied with the changes since `serial` instead of the full zone
+    """
+    def __init__(self, server, zone_name, serial=None, *, port=53, timeout=30, lifetime=3600):
+        self.server = server
+        self.zone_name = zone_name
+        self.serial = serial
+        self.port = port
+        self.timeout = timeout
+        self.lifetime = lifetime
+        self.zone_id = get_resource_id('axfrz', zone_name)
+        self.origin = dns_name.from_text(zone_name)
+        self.current_serial = None
+        self.up_to_date = False
+        self.incremental = False
+        self.__rrsets = None
+        self.__soa = None
+
+    def start(self):
+        """Request the zone transfer, and read the start of the response to determine the type of the response
+
+        Returns:
+            `None`
+        """
+        rdtype = rdatatype.IXFR if self.serial else rdatatype.AXFR
+        rrsets = self.__iter_rrsets(query.xfr(
+            self.server,
+            self.zone_name,
+            rdtype=rdtype,
+            port=self.port,
+            timeout=self.timeout,
+            lifetime=self.lifetime,
+            serial=self.serial or 0
+        ))
+
+        self.__soa = next(rrsets)
+        if self.__soa.rdtype != rdatatype.SOA:
+            raise ValueError('Zone transfer for {} did not start with an SOA record'.format(self.zone_name))
+
+        self.current_serial = self.__soa[0].serial
+        if self.serial and self.current_serial <= self.serial:
+            self.up_to_date = True
+            self.__rrsets = iter(())
+
+            # Consume the rest of the response, so the connection is closed
+            for _ in rrsets:
+                pass
+            return
+
+        # An incremental response continues with the SOA record of the serial we requested, anything else is the
+        # full zone
+        second = next(rrsets, None)
+        self.incremental = bool(
+            self.serial and second is not None and second.rdtype == rdatatype.SOA and second[0].serial == self.serial
+        )
+        self.__rrsets = chain([second] if second is not None else [], rrsets)
+
+    def records(self):
+        """Yield the records of a full zone transfer
+
+        Yields:
+            `dict`
+        """
+        yield from self.__get_records(self.__soa)
+
+        for rrset in self.__rrsets:
+            # The SOA record is repeated at the end of the transfer
+            if rrset.rdtype == rdatatype.SOA:
+                continue
+
+            yield from self.__get_records(rrset)
+
+    def changes(self):
+        """Yield the changes of an incremental zone transfer, in the order they were applied on the server. Each change
+        is a tuple of a flag, `True` if the record was added and `False` if it was deleted, and the record
+
+        Yields:
+            `tuple` of (`bool`, `dict`)
+        """
+        delete_mode = False
+
+        for rrset in self.__rrsets:
+            # Each difference sequence starts with the old SOA record, followed by the deleted records, and the new SOA
+            # record followed by the added records. The response ends with the current SOA record
+            if rrset.rdtype == rdatatype.SOA:
+                delete_mode = not delete_mode
+                if delete_mode and rrset[0].serial == self.current_serial:
+                    continue
+
+            for record in self.__get_records(rrset):
+                yield not delete_mode, record
+
+    def __get_records(self, rrset):
+        record_name = rrset.name.derelativize(self.origin).to_text()
+
+        for rdata in rrset:
+            # Matches the ids of the records collected from dns.zone objects in previous versions of the collector
+            rr = {'name': rrset.name, 'ttl': rrset.ttl, 'rdata': rdata}
+            yield {
+                'id': get_resource_id('axfrr', record_name, ['{}={}'.format(k, str(v)) for k, v in rr.items()]),
+                'zone_id': self.zone_id,
+                'name': record_name,
+                'value': sorted([rdata.to_text()]),
+                'type': type_to_text(rdata.rdtype)
+            }
+
+    @staticmethod
+    def __iter_rrsets(messages):
+        for msg in messages:
+            yield from msg.answer
@@ -1,31 +1,78 @@
+import atexit
 import json
+import threading
+import time
 from datetime import datetime, timedelta
 from uuid import uuid4
 
 from apscheduler.executors.pool import ProcessPoolExecutor
+from apscheduler.jobstores.memory import MemoryJobStore
+from apscheduler.jobstores.sqlalchemy import SQLAlchemyJobStore
 from apscheduler.schedulers.blocking import BlockingScheduler as APScheduler
 from botocore.exceptions import ClientError
 from cloud_inquisitor import app_config, get_local_aws_session, AWS_REGIONS
 from cloud_inquisitor.config import dbconfig, ConfigOption
 from cloud_inquisitor.constants import NS_SCHEDULER_SQS, SchedulerStatus
 from cloud_inquisitor.database import db
-from cloud_inquisitor.exceptions import InquisitorError, SchedulerError
+from cloud_inquisitor.exceptions import InquisitorError
 from cloud_inquisitor.plugins import CollectorType, BaseScheduler
 from cloud_inquisitor.plugins.types.accounts import BaseAccount, AWSAccount
+from cloud_inquisitor.schema import Account, ConfigItem
 from cloud_inquisitor.schema.base import SchedulerBatch, SchedulerJob
+from cloud_inquisitor.scheduling import DependencyTracker
 from cloud_inquisitor.utils import get_hash
 from cloud_inquisitor.wrappers import retry
+from sqlalchemy import and_, exists, func
+
+# Maximum number of entries in a single SQS batch request
+SQS_BATCH_SIZE = 10
+
+# Scheduler running the jobs of the persistent job store in this process
+active_scheduler = None
+
+
+def queue_persistent_job(*, job_name, entry_point, worker_args):
+    """Queue a collector or auditor job from the persistent job store in the current batch. Jobs in the persistent job
+    store can only reference module level functions, not methods of the scheduler
+
+    Args:
+        job_name (`str`): Non-unique ID of the job
+        entry_point (`dict`): A dictionary providing the entry point information for the worker to load the class
+        worker_args (`dict`): A dictionary with the arguments required by the worker class
+
+    Returns:
+        `None`
+    """
+    active_scheduler.queue_worker_message(
+        batch_id=active_scheduler.batch_id,
+        job_name=job_name,
+        entry_point=entry_point,
+        worker_args=worker_args
+    )
 
 
 class SQSScheduler(BaseScheduler):
     name = 'SQS Scheduler'
     ns = NS_SCHEDULER_SQS
+    supports_runtime = True
     options = (
         ConfigOption('queue_region', 'us-west-2', 'string', 'Region of the SQS Queues'),
         ConfigOption('job_queue_url', '', 'string', 'URL of the SQS Queue for pending jobs'),
         ConfigOption('status_queue_url', '', 'string', 'URL of the SQS Queue for worker reports'),
+        ConfigOption('priority_job_queue_url', '', 'string', 'URL of the SQS Queue for pending jobs of collectors and '
+                     'auditors with a priority above 0. Workers check this queue before the job queue. Optional'),
         ConfigOption('job_delay', 2, 'float', 'Time between each scheduled job, in seconds. Can be used to '
                      'avoid spiky load during execution of tasks'),
+        ConfigOption('job_flush_interval', 5, 'int', 'Maximum time in seconds scheduled jobs are held before being '
+                     'sent to the job queue in batches'),
+        ConfigOption('worker_wait_time', 20, 'int', 'Time in seconds a worker waits for new jobs on each poll of the '
+                     'job queue (SQS long polling, max 20)'),
+        ConfigOption('status_flush_interval', 5, 'int', 'Maximum time in seconds job status updates are held by a '
+                     'worker before being sent to the status queue in batches'),
+        ConfigOption('schedule_check_interval', 60, 'int', 'Time in seconds between checks for account and '
+                     'configuration changes requiring jobs to be scheduled or removed'),
+        ConfigOption('schedule_refresh_interval', 60, 'int', 'Time in minutes after which all jobs are rescheduled '
+                     'even without account or configuration changes, to update the intervals of empty regions'),
     )
 
     def __init__(self):
@@ -36,6 +83,10 @@ class SQSScheduler(BaseScheduler):
         self.pool = ProcessPoolExecutor(1)
         self.scheduler = APScheduler(
             threadpool=self.pool,
+            jobstores={
+                'default': MemoryJobStore(),
+                'persistent': SQLAlchemyJobStore(engine=db.engine, tablename='scheduler_sqs_jobs')
+            },
             job_defaults={
                 'coalesce': True,
                 'misfire_grace_time': 30
@@ -47,23 +98,55 @@ class SQSScheduler(BaseScheduler):
 
         self.job_queue = sqs.Queue(self.dbconfig.get('job_queue_url', self.ns))
         self.status_queue = sqs.Queue(self.dbconfig.get('status_queue_url', self.ns))
+        priority_queue_url = self.dbconfig.get('priority_job_queue_url', self.ns)
+        self.priority_job_queue = sqs.Queue(priority_queue_url) if priority_queue_url else None
+
+        # Only set in the scheduler process, when dependency scheduling is enabled
+        self.dependencies = None
+
+        self.batch_id = None
+        self.__batch_created = None
+        self.__schedule_state = None
+        self.__schedule_refreshed = None
+        self.__job_buffer = []
+        self.__job_lock = threading.Lock()
+        self.__status_buffer = {}
+        self.__status_lock = threading.Lock()
+        self.__status_flusher = None
 
     def execute_scheduler(self):
         """Main entry point for the scheduler. This method will start two scheduled jobs, `schedule_jobs` which takes
          care of scheduling the actual SQS messaging and `process_status_queue` which will track the current status
          of the jobs as workers are executing them
 
+        The collector and auditor jobs are kept in a persistent job store in the database, so they keep running on
+        their existing schedule as soon as the scheduler is restarted
+
+        With `dependency_scheduling` enabled, auditor jobs are held until the collector jobs producing the resource
+        types they audit have completed
+
         Returns:
             `None`
         """
+        global active_scheduler
+        active_scheduler = self
+
+        if self.dbconfig.get('dependency_scheduling', default=False):
+            self.dependencies = DependencyTracker(self.dbconfig.get('dependency_timeout', default=30) * 60)
+
+        # Jobs from the persistent job store which were due while the scheduler was stopped run as soon as the
+        # scheduler starts, before the first run of `schedule_jobs`, so they need a batch to be queued in
+        self.__create_batch()
+
         try:
             # Schedule periodic scheduling of jobs
             self.scheduler.add_job(
                 self.schedule_jobs,
                 trigger='interval',
                 name='schedule_jobs',
-                minutes=15,
-                start_date=datetime.now() + timedelta(seconds=1)
+                seconds=self.dbconfig.get('schedule_check_interval', self.ns, 60),
+                start_date=datetime.now() + timedelta(seconds=1),
+                max_instances=1
             )
 
             self.scheduler.add_job(
@@ -75,33 +158,67 @@ class SQSScheduler(BaseScheduler):
                 max_instances=1
             )
 
+            self.scheduler.add_job(
+                self.flush_worker_queue,
+                trigger='interval',
+                name='flush_worker_queue',
+                seconds=self.dbconfig.get('job_flush_interval', self.ns, 5),
+                start_date=datetime.now() + timedelta(seconds=2),
+                max_instances=1
+            )
+
             self.scheduler.start()
 
         except KeyboardInterrupt:
             self.scheduler.shutdown()
 
     def list_current_jobs(self):
-        """Return a list of the currently scheduled jobs in APScheduler
+        """Return a list of the currently scheduled collector and auditor jobs in APScheduler
 
         Returns:
             `dict` of `str`: :obj:`apscheduler/job:Job`
         """
-        jobs = {}
-        for job in self.scheduler.get_jobs():
-            if job.name not in ('schedule_jobs', 'process_status_queue'):
-                jobs[job.name] = job
+        return {job.id: job for job in self.scheduler.get_jobs(jobstore='persistent')}
+
+    def get_schedule_state(self):
+        """Returns a hash of the enabled accounts and the configuration items, which changes whenever an account is
+        added, enabled or disabled, or a collector or auditor is enabled, disabled or reconfigured
+
+        Returns:
+            `str`
+        """
+        accounts = db.session.query(
+            Account.account_name,
+            Account.account_type_id
+        ).filter(Account.enabled == 1).order_by(Account.account_id).all()
 
-        return jobs
+        config = db.session.query(
+            ConfigItem.namespace_prefix,
+            ConfigItem.key,
+            ConfigItem.value
+        ).order_by(ConfigItem.config_item_id).all()
+
+        return get_hash((accounts, config))
 
     def schedule_jobs(self):
         """Schedule or remove jobs as needed.
 
-        Checks to see if there are any jobs that needs to be scheduled, after refreshing the database configuration
-        as well as the list of collectors and auditors.
+        The full list of jobs is only rebuilt when the enabled accounts or the configuration have changed, or
+        `schedule_refresh_interval` minutes after the last rebuild, to pick up changes in the regions accounts are
+        active in. Otherwise only a new batch is started every 15 minutes.
 
         Returns:
             `None`
         """
+        if not self.batch_id or self.__batch_created < datetime.now() - timedelta(minutes=15):
+            self.__create_batch()
+
+        state = self.get_schedule_state()
+        refresh_interval = timedelta(minutes=self.dbconfig.get('schedule_refresh_interval', self.ns, 60))
+        if state == self.__schedule_state and self.__schedule_refreshed > datetime.now() - refresh_interval:
+            self.log.debug('Accounts and configuration unchanged, skipping scheduling of jobs')
+            return
+
         self.dbconfig.reload_data()
         self.collectors = {}
         self.auditors = []
@@ -109,128 +226,160 @@ class SQSScheduler(BaseScheduler):
 
         _, accounts = BaseAccount.search(include_disabled=False)
         current_jobs = self.list_current_jobs()
-        new_jobs = []
-        batch_id = str(uuid4())
-
-        batch = SchedulerBatch()
-        batch.batch_id = batch_id
-        batch.status = SchedulerStatus.PENDING
-        db.session.add(batch)
-        db.session.commit()
-
-        start = datetime.now() + timedelta(seconds=1)
-        job_delay = dbconfig.get('job_delay', self.ns, 0.5)
+        new_jobs = {}
 
         # region Global collectors (non-aws)
-        if CollectorType.GLOBAL in self.collectors:
-            for worker in self.collectors[CollectorType.GLOBAL]:
-                job_name = get_hash(worker)
-
-                if job_name in current_jobs:
-                    continue
-
-                self.scheduler.add_job(
-                    self.send_worker_queue_message,
-                    trigger='interval',
-                    name=job_name,
-                    minutes=worker.interval,
-                    start_date=start,
-                    kwargs={
-                        'batch_id': batch_id,
-                        'job_name': job_name,
-                        'entry_point': worker.entry_point,
-                        'worker_args': {}
-                    }
-                )
-                start += timedelta(seconds=job_delay)
+        for worker in self.collectors.get(CollectorType.GLOBAL, []):
+            new_jobs[get_hash(worker)] = (worker.interval, worker.entry_point, {})
         # endregion
 
         # region AWS collectors
         aws_accounts = list(filter(lambda x: x.account_type == AWSAccount.account_type, accounts))
-        if CollectorType.AWS_ACCOUNT in self.collectors:
-            for worker in self.collectors[CollectorType.AWS_ACCOUNT]:
-                for account in aws_accounts:
-                    job_name = get_hash((account.account_name, worker))
-                    if job_name in current_jobs:
-                        continue
-
-                    new_jobs.append(job_name)
-
-                    self.scheduler.add_job(
-                        self.send_worker_queue_message,
-                        trigger='interval',
-                        name=job_name,
-                        minutes=worker.interval,
-                        start_date=start,
-                        kwargs={
-                            'batch_id': batch_id,
-                            'job_name': job_name,
-                            'entry_point': worker.entry_point,
-                            'worker_args': {
-                                'account': account.account_name
-                            }
-                        }
-                    )
-                    start += timedelta(seconds=job_delay)
+        for worker in self.collectors.get(CollectorType.AWS_ACCOUNT, []):
+            for account in aws_accounts:
+                new_jobs[get_hash((account.account_name, worker))] = (
+                    worker.interval,
+                    worker.entry_point,
+                    {'account': account.account_name}
+                )
 
         if CollectorType.AWS_REGION in self.collectors:
+            active_regions = self.get_active_regions()
             for worker in self.collectors[CollectorType.AWS_REGION]:
                 for region in AWS_REGIONS:
                     for account in aws_accounts:
-                        job_name = get_hash((account.account_name, region, worker))
-
-                        if job_name in current_jobs:
-                            continue
-
-                        new_jobs.append(job_name)
-
-                        self.scheduler.add_job(
-                            self.send_worker_queue_message,
-                            trigger='interval',
-                            name=job_name,
-                            minutes=worker.interval,
-                            start_date=start,
-                            kwargs={
-                                'batch_id': batch_id,
-                                'job_name': job_name,
-                                'entry_point': worker.entry_point,
-                                'worker_args': {
-                                    'account': account.account_name,
-                                    'region': region
-                                }
-                            }
+                        new_jobs[get_hash((account.account_name, region, worker))] = (
+                            self.get_region_interval(worker, account.account_name, region, active_regions),
+                            worker.entry_point,
+                            {'account': account.account_name, 'region': region}
                         )
-                        start += timedelta(seconds=job_delay)
         # endregion
 
         # region Auditors
-        if app_config.log_level == 'DEBUG':
+        auditor_jobs = set()
+        for worker in self.auditors:
+            job_name = get_hash((worker,))
+            auditor_jobs.add(job_name)
+            new_jobs[job_name] = (worker.interval, worker.entry_point, {})
+        # endregion
+
+        # Remove the jobs of disabled accounts, collectors and auditors
+        removed_jobs = set(current_jobs) - set(new_jobs)
+        for job_name in removed_jobs:
+            current_jobs[job_name].remove()
+
+        start = datetime.now() + timedelta(seconds=1)
+        if self.dependencies:
+            # Auditors are held until their collectors complete, they only need to start after the collectors
+            audit_start = None
+        elif app_config.log_level == 'DEBUG':
             audit_start = start + timedelta(seconds=5)
         else:
             audit_start = start + timedelta(minutes=5)
+        job_delay = dbconfig.get('job_delay', self.ns, 0.5)
 
-        for worker in self.auditors:
-            job_name = get_hash((worker,))
+        added = 0
+        for job_name, (interval, entry_point, worker_args) in new_jobs.items():
             if job_name in current_jobs:
+                # Reschedule the job if the region became active or empty since it was scheduled
+                job = current_jobs[job_name]
+                if job.trigger.interval != timedelta(minutes=interval):
+                    job.reschedule(trigger='interval', minutes=interval)
+
                 continue
 
-            new_jobs.append(job_name)
+            if job_name in auditor_jobs:
+                if not audit_start:
+                    # Auditors are added after all collectors, and the collectors are sent to the queue within
+                    # `job_flush_interval` seconds of their start
+                    audit_start = start + timedelta(seconds=self.dbconfig.get('job_flush_interval', self.ns, 5))
+
+                start_date = audit_start
+                audit_start += timedelta(seconds=job_delay)
+            else:
+                start_date = start
+                start += timedelta(seconds=job_delay)
 
             self.scheduler.add_job(
-                self.send_worker_queue_message,
+                queue_persistent_job,
                 trigger='interval',
+                id=job_name,
                 name=job_name,
-                minutes=worker.interval,
-                start_date=audit_start,
+                minutes=interval,
+                start_date=start_date,
+                jobstore='persistent',
+                replace_existing=True,
                 kwargs={
-                    'batch_id': batch_id,
                     'job_name': job_name,
-                    'entry_point': worker.entry_point,
-                    'worker_args': {}
+                    'entry_point': entry_point,
+                    'worker_args': worker_args
                 }
             )
-            audit_start += timedelta(seconds=job_delay)
-        # endregion
+            added += 1
+
+        self.__schedule_state = state
+        self.__schedule_refreshed = datetime.now()
+        self.log.info('Scheduled {} new jobs and removed {} jobs'.format(added, len(removed_jobs)))
+
+    def __create_batch(self):
+        batch = SchedulerBatch()
+        batch.batch_id = str(uuid4())
+        batch.status = SchedulerStatus.PENDING
+        db.session.add(batch)
+        db.session.commit()
+
+        self.batch_id = batch.batch_id
+        self.__batch_created = datetime.now()
+
+    def queue_worker_message(self, *, batch_id, job_name, entry_point, worker_args):
+        """Add a job to the jobs waiting to be sent to the `worker_queue`. The waiting jobs are sent as soon as there
+        are enough jobs for a full batch, or by the `flush_worker_queue` job. With dependency scheduling enabled,
+        auditor jobs are instead held until the collector jobs they depend on have completed
+
+        Args:
+            batch_id (`str`): Unique ID of the batch the job belongs to
+            job_name (`str`): Non-unique ID of the job
+            entry_point (`dict`): A dictionary providing the entry point information for the worker to load the class
+            worker_args (`dict`): A dictionary with the arguments required by the worker class (if any, can be an
+            empty dictionary)
+
+        Returns:
+            `None`
+        """
+        job = {
+            'batch_id': batch_id,
+            'job_name': job_name,
+            'entry_point': entry_point,
+            'worker_args': worker_args
+        }
+
+        if self.dependencies:
+            dependencies = self.get_job_dependencies(entry_point)
+            if dependencies and self.dependencies.hold(job, entry_point['name'], dependencies):
+                self.log.debug('Holding {} job until its collectors have completed'.format(entry_point['name']))
+                return
+
+        with self.__job_lock:
+            self.__job_buffer.append(job)
+
+            if len(self.__job_buffer) < SQS_BATCH_SIZE:
+                return
+
+            jobs, self.__job_buffer = self.__job_buffer, []
+
+        self.send_worker_queue_messages(jobs)
+
+    def flush_worker_queue(self):
+        """Send all jobs waiting to be sent to the `worker_queue`
+
+        Returns:
+            `None`
+        """
+        with self.__job_lock:
+            jobs, self.__job_buffer = self.__job_buffer, []
+
+        if jobs:
+            self.send_worker_queue_messages(jobs)
 
     def send_worker_queue_message(self, *, batch_id, job_name, entry_point, worker_args, retry_count=0):
         """Send a message to the `worker_queue` for a worker to execute the requests job
@@ -248,114 +397,275 @@ class SQSScheduler(BaseScheduler):
         Returns:
             `None`
         """
-        try:
-            job_id = str(uuid4())
-            self.job_queue.send_message(
-                MessageBody=json.dumps({
-                    'batch_id': batch_id,
-                    'job_id': job_id,
-                    'job_name': job_name,
-                    'entry_point': entry_point,
-                    'worker_args': worker_args,
-                }),
-                MessageDeduplicationId=job_id,
-                MessageGroupId=batch_id,
-                MessageAttributes={
-                    'RetryCount': {
-                        'StringValue': str(retry_count),
-                        'DataType': 'Number'
-
-                    }
-                }
-            )
+        self.send_worker_queue_messages([{
+            'batch_id': batch_id,
+            'job_name': job_name,
+            'entry_point': entry_point,
+            'worker_args': worker_args,
+            'retry_count': retry_count
+        }])
+
+    def send_worker_queue_messages(self, jobs):
+        """Send messages to the `worker_queue` for a list of jobs, using a single request for up to 10 jobs. Jobs are
+        sent in order of priority, and jobs with a priority above 0 are sent to the `priority_job_queue` if configured
+
+        Args:
+            jobs (`list` of `dict`): List of jobs, each with the keyword arguments of
+            :meth:`send_worker_queue_message`
+
+        Returns:
+            `int`: Number of jobs sent
+        """
+        jobs = sorted(jobs, key=lambda job: self.get_job_priority(job['entry_point']), reverse=True)
+        queues = {}
+        for job in jobs:
+            if self.priority_job_queue and self.get_job_priority(job['entry_point']) > 0:
+                queues.setdefault(self.priority_job_queue, []).append(job)
+            else:
+                queues.setdefault(self.job_queue, []).append(job)
+
+        return sum(self.__send_jobs(queue, queue_jobs) for queue, queue_jobs in queues.items())
+
+    def __send_jobs(self, queue, jobs):
+        sent = 0
+        for i in range(0, len(jobs), SQS_BATCH_SIZE):
+            try:
+                entries = [(str(uuid4()), job) for job in jobs[i:i + SQS_BATCH_SIZE]]
+                response = queue.send_messages(Entries=[
+                    {
+                        'Id': job_id,
+                        'MessageBody': json.dumps({
+                            'batch_id': job['batch_id'],
+                            'job_id': job_id,
+                            'job_name': job['job_name'],
+                            'entry_point': job['entry_point'],
+                            'worker_args': job['worker_args'],
+                        }),
+                        'MessageDeduplicationId': job_id,
+                        'MessageGroupId': job['batch_id'],
+                        'MessageAttributes': {
+                            'RetryCount': {
+                                'StringValue': str(job.get('retry_count', 0)),
+                                'DataType': 'Number'
+                            }
+                        }
+                    } for job_id, job in entries
+                ])
+
+                failed = {x['Id']: x for x in response.get('Failed', [])}
+                for job_id, job in entries:
+                    if job_id in failed:
+                        self.log.error('Failed sending job {} to the worker queue: {}'.format(
+                            job['job_name'],
+                            failed[job_id].get('Message', failed[job_id]['Code'])
+                        ))
+                        continue
 
-            if retry_count == 0:
-                job = SchedulerJob()
-                job.job_id = job_id
-                job.batch_id = batch_id
-                job.status = SchedulerStatus.PENDING
-                job.data = worker_args
+                    sent += 1
+                    if job.get('retry_count', 0) == 0:
+                        scheduler_job = SchedulerJob()
+                        scheduler_job.job_id = job_id
+                        scheduler_job.batch_id = job['batch_id']
+                        scheduler_job.status = SchedulerStatus.PENDING
+                        scheduler_job.data = job['worker_args']
+
+                        db.session.add(scheduler_job)
+
+                        if self.dependencies:
+                            self.__track_job(job_id, job)
 
-                db.session.add(job)
                 db.session.commit()
-        except:
-            self.log.exception('Error when processing worker task')
+            except:
+                self.log.exception('Error when processing worker task')
+
+        return sent
+
+    def __track_job(self, job_id, job):
+        name = job['entry_point']['name']
+        if name in self.consumed_types:
+            if 'collect_start' in job:
+                self.dependencies.audit_queued(job_id, name, job['batch_id'], job['collect_start'])
+        else:
+            self.dependencies.job_queued(job_id, name)
+
+    def release_held_jobs(self, finished_jobs):
+        """Send the held auditor jobs released by the finished collector jobs, or held for longer than
+        `dependency_timeout`, to the workers
+
+        Args:
+            finished_jobs (`list` of `str`): IDs of the jobs which have completed, failed or were aborted
+
+        Returns:
+            `int`: Number of jobs released
+        """
+        released = []
+        for job_id in finished_jobs:
+            released += self.dependencies.job_finished(job_id)
+        released += self.dependencies.release_expired()
+
+        jobs = []
+        for held in released:
+            held.job['collect_start'] = held.collect_start
+            jobs.append(held.job)
+
+        if jobs:
+            self.log.debug('Releasing {} held jobs'.format(len(jobs)))
+            self.send_worker_queue_messages(jobs)
+
+        return len(jobs)
 
     def execute_worker(self):
         """Retrieve a message from the `worker_queue` and process the request.
 
         This function will read a single message from the `worker_queue` and load the specified `EntryPoint`
         and execute the worker with the provided arguments. Upon completion (failure or otherwise) a message is sent
-        to the `status_queue` information the scheduler about the return status (success/failure) of the worker
+        to the `status_queue` information the scheduler about the return status (success/failure) of the worker.
+
+        The `worker_queue` is long polled, waiting up to `worker_wait_time` seconds for a message to arrive, so the
+        worker can be called again immediately after it returns
 
         Returns:
-            `None`
+            `bool`: `True` if the worker can be called again immediately, `False` if the caller should wait before
+            calling it again
         """
         try:
             try:
-                messages = self.job_queue.receive_messages(
-                    MaxNumberOfMessages=1,
-                    MessageAttributeNames=('RetryCount',)
-                )
+                job = self.get_worker_job()
 
             except ClientError:
                 self.log.exception('Failed fetching messages from SQS queue')
-                return
+                return False
 
-            if not messages:
+            if not job:
                 self.log.debug('No pending jobs')
-                return
+                return self.dbconfig.get('worker_wait_time', self.ns, 20) > 0
 
-            for message in messages:
-                try:
-                    retry_count = int(message.message_attributes['RetryCount']['StringValue'])
-
-                    data = json.loads(message.body)
-                    try:
-                        # SQS FIFO queues will not allow another thread to get any new messages until the messages
-                        # in-flight are returned to the queue or deleted, so we remove the message from the queue as
-                        # soon as we've loaded the data
-                        self.send_status_message(data['job_id'], SchedulerStatus.STARTED)
-                        message.delete()
-
-                        cls = self.get_class_from_ep(data['entry_point'])
-                        worker = cls(**data['worker_args'])
-                        if hasattr(worker, 'type'):
-                            if worker.type == CollectorType.GLOBAL:
-                                self.log.info('RUN_INFO: {} starting at {}, next run will be at approximately {}'.format(data['entry_point']['module_name'], datetime.now().strftime("%Y-%m-%d %H:%M:%S"), (datetime.now() + timedelta(minutes=worker.interval)).strftime("%Y-%m-%d %H:%M:%S")))
-                            elif worker.type == CollectorType.AWS_REGION:
-                                self.log.info('RUN_INFO: {} starting at {} for account {} / region {}, next run will be at approximately {}'.format(data['entry_point']['module_name'],	datetime.now().strftime("%Y-%m-%d %H:%M:%S"), data['worker_args']['account'], data['worker_args']['region'], (datetime.now() + timedelta(minutes=worker.interval)).strftime("%Y-%m-%d %H:%M:%S")))
-                            elif worker.type == CollectorType.AWS_ACCOUNT:
-                                self.log.info('RUN_INFO: {} starting at {} for account {} next run will be at approximately {}'.format(data['entry_point']['module_name'], datetime.now().strftime("%Y-%m-%d %H:%M:%S"), data['worker_args']['account'], (datetime.now() + timedelta(minutes=worker.interval)).strftime("%Y-%m-%d %H:%M:%S")))
-                        else:
-                            self.log.info('RUN_INFO: {} starting at {} next run will be at approximately {}'.format(data['entry_point']['module_name'], datetime.now().strftime("%Y-%m-%d %H:%M:%S"), (datetime.now() + timedelta(minutes=worker.interval)).strftime("%Y-%m-%d %H:%M:%S")))
-                        worker.run()
-
-                        self.send_status_message(data['job_id'], SchedulerStatus.COMPLETED)
-                    except InquisitorError:
-                        # If the job failed for some reason, reschedule it unless it has already been retried 3 times
-                        if retry_count >= 3:
-                            self.send_status_message(data['job_id'], SchedulerStatus.FAILED)
-                        else:
-                            self.send_worker_queue_message(
-                                batch_id=data['batch_id'],
-                                job_name=data['job_name'],
-                                entry_point=data['entry_point'],
-                                worker_args=data['worker_args'],
-                                retry_count=retry_count + 1
-                            )
-                except:
-                    self.log.exception('Failed processing scheduler job: {}'.format(message.body))
+            self.run_worker_job(job[1])
+            return True
 
         except KeyboardInterrupt:
             self.log.info('Shutting down worker thread')
+            return False
 
+    def get_worker_job(self):
+        """Retrieve a single message from the `worker_queue`, waiting up to `worker_wait_time` seconds for a message
+        to arrive. The message is removed from the queue as soon as it is received. If a `priority_job_queue` is
+        configured, it is checked for pending jobs first
+
+        Returns:
+            `tuple` of (`str`, `dict`): Entry point name of the worker and the job, or `None` if there are no pending
+            jobs
+        """
+        messages = None
+        if self.priority_job_queue:
+            messages = self.priority_job_queue.receive_messages(
+                MaxNumberOfMessages=1,
+                WaitTimeSeconds=0,
+                MessageAttributeNames=('RetryCount',)
+            )
+
+        if not messages:
+            messages = self.job_queue.receive_messages(
+                MaxNumberOfMessages=1,
+                WaitTimeSeconds=self.dbconfig.get('worker_wait_time', self.ns, 20),
+                MessageAttributeNames=('RetryCount',)
+            )
+
+        if not messages:
+            return None
+
+        message = messages[0]
+        try:
+            job = {
+                'retry_count': int(message.message_attributes['RetryCount']['StringValue']),
+                'data': json.loads(message.body)
+            }
+
+            # SQS FIFO queues will not allow another thread to get any new messages until the messages in-flight are
+            # returned to the queue or deleted, so we remove the message from the queue as soon as we've loaded the
+            # data
+            self.send_status_message(job['data']['job_id'], SchedulerStatus.STARTED)
+            message.delete()
+
+            return job['data']['entry_point']['name'], job
+        except ClientError:
+            raise
+        except:
+            self.log.exception('Failed processing scheduler job: {}'.format(message.body))
+            return None
+
+    def run_worker_job(self, job):
+        """Load the `EntryPoint` of a job retrieved with :meth:`get_worker_job` and execute the worker with the provided
+        arguments. Upon completion a message is sent to the `status_queue`, or the job is rescheduled if it failed
+
+        Args:
+            job (`dict`): Job retrieved with :meth:`get_worker_job`
+
+        Returns:
+            `bool`: `True` if the worker completed successfully
+        """
+        data = job['data']
+        retry_count = job['retry_count']
+
+        try:
+            try:
+                cls = self.get_class_from_ep(data['entry_point'])
+                worker = cls(**data['worker_args'])
+                start = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+                next_run = (datetime.now() + timedelta(minutes=worker.interval)).strftime("%Y-%m-%d %H:%M:%S")
+                module_name = data['entry_point']['module_name']
+                if hasattr(worker, 'type'):
+                    if worker.type == CollectorType.GLOBAL:
+                        self.log.info('RUN_INFO: {} starting at {}, next run will be at approximately {}'.format(
+                            module_name, start, next_run
+                        ))
+                    elif worker.type == CollectorType.AWS_REGION:
+                        self.log.info(
+                            'RUN_INFO: {} starting at {} for account {} / region {}, next run will be at '
+                            'approximately {}'.format(
+                                module_name, start, data['worker_args']['account'], data['worker_args']['region'],
+                                next_run
+                            )
+                        )
+                    elif worker.type == CollectorType.AWS_ACCOUNT:
+                        self.log.info(
+                            'RUN_INFO: {} starting at {} for account {} next run will be at approximately {}'.format(
+                                module_name, start, data['worker_args']['account'], next_run
+                            )
+                        )
+                else:
+                    self.log.info('RUN_INFO: {} starting at {} next run will be at approximately {}'.format(
+                        module_name, start, next_run
+                    ))
+                worker.run()
+
+                self.send_status_message(data['job_id'], SchedulerStatus.COMPLETED)
+                return True
+            except InquisitorError:
+                # If the job failed for some reason, reschedule it unless it has already been retried 3 times
+                if retry_count >= 3:
+                    self.send_status_message(data['job_id'], SchedulerStatus.FAILED)
+                else:
+                    self.send_worker_queue_message(
+                        batch_id=data['batch_id'],
+                        job_name=data['job_name'],
+                        entry_point=data['entry_point'],
+                        worker_args=data['worker_args'],
+                        retry_count=retry_count + 1
+                    )
+        except:
+            self.log.exception('Failed processing scheduler job: {}'.format(json.dumps(data)))
+
+        return False
 
-    @retry
     def send_status_message(self, object_id, status):
-        """Send a message to the `status_queue` to update a job's status.
+        """Queue a message to the `status_queue` to update a job's status.
+
+        Status updates are sent in batches, by a background thread every `status_flush_interval` seconds or as soon
+        as there are enough updates for a full batch. Updates of the same job are coalesced, only sending the latest
+        status of the job.
 
-        Returns `True` if the message was sent, else `False`
+        Returns `True` if the message was queued
 
         Args:
             object_id (`str`): ID of the job that was executed
@@ -364,21 +674,78 @@ class SQSScheduler(BaseScheduler):
         Returns:
             `bool`
         """
-        try:
-            body = json.dumps({
-                'id': object_id,
-                'status': status
-            })
-
-            self.status_queue.send_message(
-                MessageBody=body,
-                MessageGroupId='job_status',
-                MessageDeduplicationId=get_hash((object_id, status))
-            )
-            return True
-        except Exception as ex:
-            print(ex)
-            return False
+        with self.__status_lock:
+            if not self.__status_flusher:
+                self.__status_flusher = threading.Thread(
+                    target=self.__flush_status_thread,
+                    args=(self.dbconfig.get('status_flush_interval', self.ns, 5),),
+                    name='sqs-status-flusher',
+                    daemon=True
+                )
+                self.__status_flusher.start()
+                atexit.register(self.flush_status_messages)
+
+            self.__status_buffer[object_id] = max(status, self.__status_buffer.get(object_id, status))
+            full = len(self.__status_buffer) >= SQS_BATCH_SIZE
+
+        if full:
+            self.flush_status_messages()
+
+        return True
+
+    def flush_status_messages(self):
+        """Send all queued job status updates to the `status_queue`, using a single request for up to 10 updates.
+        Updates that could not be sent are queued again
+
+        Returns:
+            `None`
+        """
+        with self.__status_lock:
+            updates, self.__status_buffer = list(self.__status_buffer.items()), {}
+
+        for i in range(0, len(updates), SQS_BATCH_SIZE):
+            batch = dict(updates[i:i + SQS_BATCH_SIZE])
+            try:
+                response = self.status_queue.send_messages(Entries=[
+                    {
+                        'Id': object_id,
+                        'MessageBody': json.dumps({
+                            'id': object_id,
+                            'status': status
+                        }),
+                        'MessageGroupId': 'job_status',
+                        'MessageDeduplicationId': get_hash((object_id, status))
+                    } for object_id, status in batch.items()
+                ])
+
+                failed = {}
+                for failure in response.get('Failed', []):
+                    self.log.error('Failed sending status of job {}: {}'.format(
+                        failure['Id'],
+                        failure.get('Message', failure['Code'])
+                    ))
+
+                    if not failure['SenderFault']:
+                        failed[failure['Id']] = batch[failure['Id']]
+
+            except Exception:
+                self.log.exception('Failed sending job status updates')
+                failed = batch
+
+            if failed:
+                with self.__status_lock:
+                    for object_id, status in failed.items():
+                        self.__status_buffer[object_id] = max(status, self.__status_buffer.get(object_id, status))
+
+    def __flush_status_thread(self, interval):
+        """Send the queued job status updates every `interval` seconds, for as long as the process is running"""
+        while True:
+            time.sleep(interval)
+            try:
+                self.flush_status_messages()
+
+            except Exception:
+                self.log.exception('Failed flushing job status updates')
 
     @retry
     def process_status_queue(self):
@@ -388,44 +755,129 @@ class SQSScheduler(BaseScheduler):
             `None`
         """
         self.log.debug('Start processing status queue')
+        finished_jobs = []
         while True:
             messages = self.status_queue.receive_messages(MaxNumberOfMessages=10)
 
             if not messages:
                 break
 
+            # Only apply the latest status of each job
+            updates = {}
             for message in messages:
                 data = json.loads(message.body)
-                job = SchedulerJob.get(data['id'])
-                try:
-                    if job and job.update_status(data['status']):
-                        db.session.commit()
-                except SchedulerError as ex:
-                    if hasattr(ex, 'message') and ex.message == 'Attempting to update already completed job':
-                        pass
-
-                message.delete()
-
-        # Close any batch that is now complete
-        open_batches = db.SchedulerBatch.find(SchedulerBatch.status < SchedulerStatus.COMPLETED)
-        for batch in open_batches:
-            open_jobs = list(filter(lambda x: x.status < SchedulerStatus.COMPLETED, batch.jobs))
-            if not open_jobs:
-                open_batches.remove(batch)
-                batch.update_status(SchedulerStatus.COMPLETED)
-                self.log.debug('Closed completed batch {}'.format(batch.batch_id))
-            else:
-                started_jobs = list(filter(lambda x: x.status > SchedulerStatus.PENDING, open_jobs))
-                if batch.status == SchedulerStatus.PENDING and len(started_jobs) > 0:
-                    batch.update_status(SchedulerStatus.STARTED)
-                    self.log.debug('Started batch manually {}'.format(batch.batch_id))
-
-        # Check for stale batches / jobs
-        for batch in open_batches:
-            if batch.started < datetime.now() - timedelta(hours=2):
-                self.log.warning('Closing a stale scheduler batch: {}'.format(batch.batch_id))
-                for job in batch.jobs:
-                    if job.status < SchedulerStatus.COMPLETED:
-                        job.update_status(SchedulerStatus.ABORTED)
-                batch.update_status(SchedulerStatus.ABORTED)
+                updates[data['id']] = max(data['status'], updates.get(data['id'], data['status']))
+
+            self.update_job_statuses(updates)
+            db.session.commit()
+            finished_jobs += [job_id for job_id, status in updates.items() if status >= SchedulerStatus.COMPLETED]
+
+            self.status_queue.delete_messages(Entries=[
+                {'Id': str(idx), 'ReceiptHandle': message.receipt_handle} for idx, message in enumerate(messages)
+            ])
+
+        self.update_batch_statuses()
         db.session.commit()
+
+        if self.dependencies:
+            self.release_held_jobs(finished_jobs)
+
+    def update_job_statuses(self, updates):
+        """Update the status of multiple jobs, using a single UPDATE statement per status. As with
+        :meth:`SchedulerJob.update_status`, the status of a job is only ever increased, and completed jobs are not
+        updated
+
+        Args:
+            updates (`dict` of `str`: `int`): New status for each job id
+
+        Returns:
+            `int`: Number of jobs updated
+        """
+        job_ids = {}
+        for job_id, status in updates.items():
+            job_ids.setdefault(status, []).append(job_id)
+
+        updated = 0
+        for status, ids in job_ids.items():
+            updated += db.session.query(SchedulerJob).filter(
+                SchedulerJob.job_id.in_(ids),
+                SchedulerJob.status < status,
+                SchedulerJob.status != SchedulerStatus.COMPLETED
+            ).update({'status': status}, synchronize_session=False)
+
+        return updated
+
+    def update_batch_statuses(self):
+        """Close open batches without any open jobs, mark pending batches with started jobs as started and abort
+        batches which have been open for more than two hours. The number of jobs in each status is aggregated per
+        batch by the database, instead of loading the jobs of every open batch
+
+        Returns:
+            `None`
+        """
+        qry = db.session.query(
+            SchedulerBatch.batch_id,
+            SchedulerBatch.status,
+            SchedulerBatch.started,
+            SchedulerJob.status,
+            func.count(SchedulerJob.job_id)
+        ).outerjoin(
+            SchedulerJob, SchedulerJob.batch_id == SchedulerBatch.batch_id
+        ).filter(
+            SchedulerBatch.status < SchedulerStatus.COMPLETED
+        ).group_by(
+            SchedulerBatch.batch_id,
+            SchedulerBatch.status,
+            SchedulerBatch.started,
+            SchedulerJob.status
+        )
+
+        open_batches = {}
+        for batch_id, batch_status, started, job_status, count in qry:
+            batch = open_batches.setdefault(batch_id, {'status': batch_status, 'started': started, 'jobs': {}})
+            if job_status is not None:
+                batch['jobs'][job_status] = count
+
+        completed_batches = []
+        started_batches = []
+        stale_batches = []
+        stale_cutoff = datetime.now() - timedelta(hours=2)
+        for batch_id, batch in open_batches.items():
+            if not any(status < SchedulerStatus.COMPLETED for status in batch['jobs']):
+                completed_batches.append(batch_id)
+                self.log.debug('Closed completed batch {}'.format(batch_id))
+                continue
+
+            if batch['status'] == SchedulerStatus.PENDING and batch['jobs'].get(SchedulerStatus.STARTED):
+                started_batches.append(batch_id)
+                self.log.debug('Started batch manually {}'.format(batch_id))
+
+            if batch['started'] < stale_cutoff:
+                stale_batches.append(batch_id)
+                self.log.warning('Closing a stale scheduler batch: {}'.format(batch_id))
+
+        if completed_batches:
+            # Jobs added to a batch after the aggregation keep the batch open
+            db.session.query(SchedulerBatch).filter(
+                SchedulerBatch.batch_id.in_(completed_batches),
+                ~exists().where(and_(
+                    SchedulerJob.batch_id == SchedulerBatch.batch_id,
+                    SchedulerJob.status < SchedulerStatus.COMPLETED
+                ))
+            ).update({'status': SchedulerStatus.COMPLETED, 'completed': datetime.now()}, synchronize_session=False)
+
+        if started_batches:
+            db.session.query(SchedulerBatch).filter(
+                SchedulerBatch.batch_id.in_(started_batches),
+                SchedulerBatch.status == SchedulerStatus.PENDING
+            ).update({'status': SchedulerStatus.STARTED}, synchronize_session=False)
+
+        if stale_batches:
+            db.session.query(SchedulerJob).filter(
+                SchedulerJob.batch_id.in_(stale_batches),
+                SchedulerJob.status < SchedulerStatus.COMPLETED
+            ).update({'status': SchedulerStatus.ABORTED}, synchronize_session=False)
+
+            db.session.query(SchedulerBatch).filter(
+                SchedulerBatch.batch_id.in_(stale_batches)
+            ).update({'status': SchedulerStatus.ABORTED, 'completed': datetime.now()}, synchronize_session=False)
@@ -1,4 +1,5 @@
 from datetime import datetime, timedelta
+from functools import partial
 
 from apscheduler.executors.pool import ProcessPoolExecutor
 from apscheduler.schedulers.blocking import BlockingScheduler as APScheduler
@@ -9,6 +10,8 @@ from cloud_inquisitor.plugins import CollectorType, BaseScheduler
 from cloud_inquisitor.plugins.types.accounts import BaseAccount, AWSAccount
 from cloud_inquisitor.schema import LogEvent
 
+from cinq_scheduler_standalone.dispatcher import Job, JobDispatcher
+
 
 class StandaloneScheduler(BaseScheduler):
     """Main workers refreshing data from AWS
@@ -20,6 +23,12 @@ class StandaloneScheduler(BaseScheduler):
     options = (
         ConfigOption('worker_threads', 20, 'int', 'Number of worker threads to spawn'),
         ConfigOption('worker_interval', 30, 'int', 'Delay between each worker thread being spawned, in seconds'),
+        ConfigOption('dispatcher_enabled', False, 'bool',
+                     'Run jobs on worker_threads long-lived worker processes, each owning a shard of the accounts, '
+                     'instead of a new process per job. Idle workers take over queued jobs from busy workers'),
+        ConfigOption('account_concurrency', 2, 'int',
+                     'Maximum number of jobs running at the same time for a single account, when the dispatcher is '
+                     'enabled'),
     )
 
     def __init__(self):
@@ -27,8 +36,19 @@ class StandaloneScheduler(BaseScheduler):
         self.collectors = {}
         self.auditors = []
         self.region_workers = []
+        self.dispatcher = None
+
+        if self.dbconfig.get('dispatcher_enabled', self.ns, False):
+            self.dispatcher = JobDispatcher(
+                self.run_job,
+                self.dbconfig.get('worker_threads', self.ns, 20),
+                self.dbconfig.get('account_concurrency', self.ns, 2),
+                initializer=self.init_dispatcher_worker
+            )
+            self.pool = None
+        else:
+            self.pool = ProcessPoolExecutor(self.dbconfig.get('worker_threads', self.ns, 20))
 
-        self.pool = ProcessPoolExecutor(self.dbconfig.get('worker_threads', self.ns, 20))
         self.scheduler = APScheduler(
             threadpool=self.pool,
             job_defaults={
@@ -68,6 +88,17 @@ class StandaloneScheduler(BaseScheduler):
             start_date=datetime.now() + timedelta(seconds=3)
         )
 
+        if self.dispatcher:
+            self.scheduler.add_job(
+                self.log_dispatcher_stats,
+                trigger='interval',
+                name='dispatcher_stats',
+                minutes=5
+            )
+
+            # Worker processes are forked, so they must be started before the scheduler starts its threads
+            self.dispatcher.start()
+
         self.scheduler.start()
 
     def execute_worker(self):
@@ -80,7 +111,8 @@ class StandaloneScheduler(BaseScheduler):
             x.name: x for x in self.scheduler.get_jobs() if x.name not in (
                 'cleanup',
                 'schedule_jobs',
-                'reload_dbconfig'
+                'reload_dbconfig',
+                'dispatcher_stats'
             )
         }
         new_jobs = []
@@ -97,7 +129,7 @@ class StandaloneScheduler(BaseScheduler):
                     continue
 
                 self.scheduler.add_job(
-                    self.execute_global_worker,
+                    self.get_job_func('execute_global_worker', job_name),
                     trigger='interval',
                     name=job_name,
                     minutes=wkr.interval,
@@ -111,6 +143,7 @@ class StandaloneScheduler(BaseScheduler):
 
         # region AWS collectors
         aws_accounts = list(filter(lambda x: x.account_type == AWSAccount.account_type, accounts))
+        active_regions = self.get_active_regions()
         for acct in aws_accounts:
             if CollectorType.AWS_ACCOUNT in self.collectors:
                 for wkr in self.collectors[CollectorType.AWS_ACCOUNT]:
@@ -121,7 +154,7 @@ class StandaloneScheduler(BaseScheduler):
                         continue
 
                     self.scheduler.add_job(
-                        self.execute_aws_account_worker,
+                        self.get_job_func('execute_aws_account_worker', job_name),
                         trigger='interval',
                         name=job_name,
                         minutes=wkr.interval,
@@ -134,16 +167,22 @@ class StandaloneScheduler(BaseScheduler):
                 for wkr in self.collectors[CollectorType.AWS_REGION]:
                     for region in AWS_REGIONS:
                         job_name = '{}_{}_{}'.format(acct.account_name, region, wkr.name)
+                        interval = self.get_region_interval(wkr, acct.account_name, region, active_regions)
                         new_jobs.append(job_name)
 
                         if job_name in current_jobs:
+                            # Reschedule the job if the region became active or empty since it was scheduled
+                            job = current_jobs[job_name]
+                            if job.trigger.interval != timedelta(minutes=interval):
+                                job.reschedule(trigger='interval', minutes=interval)
+
                             continue
 
                         self.scheduler.add_job(
-                            self.execute_aws_region_worker,
+                            self.get_job_func('execute_aws_region_worker', job_name),
                             trigger='interval',
                             name=job_name,
-                            minutes=wkr.interval,
+                            minutes=interval,
                             start_date=start,
                             args=[wkr],
                             kwargs={'account': acct.account_name, 'region': region}
@@ -167,7 +206,7 @@ class StandaloneScheduler(BaseScheduler):
                 audit_start = start + timedelta(minutes=5)
 
             self.scheduler.add_job(
-                self.execute_auditor_worker,
+                self.get_job_func('execute_auditor_worker', job_name),
                 trigger='interval',
                 name=job_name,
                 minutes=wkr.interval,
@@ -183,6 +222,62 @@ class StandaloneScheduler(BaseScheduler):
             self.log.warning('Removing job {} as it is no longer needed'.format(job))
             current_jobs[job].remove()
 
+    def get_job_func(self, method, job_name):
+        """Returns the function to schedule for a job. If the dispatcher is enabled, the function queues the job to
+        the dispatcher, otherwise the job is executed directly by the scheduler
+
+        Args:
+            method (`str`): Name of the method executing the job
+            job_name (`str`): Name of the job
+
+        Returns:
+            `callable`
+        """
+        if self.dispatcher:
+            return partial(self.dispatch_job, job_name, method)
+
+        return getattr(self, method)
+
+    def dispatch_job(self, job_name, method, data, **kwargs):
+        """Queue a job to the dispatcher
+
+        Args:
+            job_name (`str`): Name of the job
+            method (`str`): Name of the method executing the job in the worker process
+            data (:obj:`Worker`): Worker to execute
+            **kwargs (`dict`): Arguments for the worker
+
+        Returns:
+            `None`
+        """
+        self.dispatcher.dispatch(Job(job_name, method, data, kwargs))
+
+    def run_job(self, job):
+        """Execute a dispatched job. Called in the dispatcher worker processes
+
+        Args:
+            job (:obj:`Job`): Job to execute
+
+        Returns:
+            `None`
+        """
+        getattr(self, job.method)(job.data, **job.kwargs)
+
+    def init_dispatcher_worker(self):
+        """Initialize a newly forked dispatcher worker process. Connections inherited from the parent process must not
+        be shared with the parent, so the worker process opens its own connections, which are then kept for the
+        lifetime of the process
+
+        Returns:
+            `None`
+        """
+        db.engine.dispose()
+
+    def log_dispatcher_stats(self):
+        self.log.info('Dispatcher stats: {}'.format(
+            ', '.join('{}={}'.format(k, v) for k, v in sorted(self.dispatcher.stats.items()))
+        ))
+
     def execute_global_worker(self, data, **kwargs):
         try:
             cls = self.get_class_from_ep(data.entry_point)
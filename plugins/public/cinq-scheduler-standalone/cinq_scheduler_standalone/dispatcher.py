@@ -0,0 +1,286 @@
+import logging
+import multiprocessing
+import time
+import zlib
+from collections import namedtuple
+from queue import Empty
+
+Job = namedtuple('Job', ('name', 'method', 'data', 'kwargs'))
+
+# Number of semaphores account names are hashed onto. Accounts sharing a slot also share the concurrency limit
+ACCOUNT_SLOTS = 1024
+
+
+class JobDispatcher(object):
+    """Dispatches jobs to a fixed set of long-lived worker processes.
+
+    Each worker process owns a shard of the accounts, and jobs for an account are queued to the worker owning the
+    account, so the worker keeps warm credentials, boto3 clients and database connections for its accounts between
+    runs. A worker without queued jobs of its own steals jobs from the queues of the other workers. The number of jobs
+    running at the same time for a single account is limited across all workers, to avoid being throttled by the AWS
+    APIs.
+
+    Worker processes are forked when :meth:`start` is called, and must be started before any threads are created in
+    the parent process. Worker processes which exit unexpectedly are replaced when jobs are dispatched or waited for,
+    and the job they were running is no longer considered pending.
+
+    Args:
+        runner (`callable`): Function called in the worker processes with the :obj:`Job` to run
+        workers (`int`): Number of worker processes
+        account_concurrency (`int`): Maximum number of jobs running at the same time for a single account. Default: 2
+        initializer (`callable`): Function called in each worker process when it starts. Default: `None`
+        poll_interval (`float`): Seconds to wait for a job on the own queue, before trying to steal jobs. Default: 1
+    """
+    def __init__(self, runner, workers, account_concurrency=2, *, initializer=None, poll_interval=1):
+        self.log = logging.getLogger(__name__)
+        self.runner = runner
+        self.workers = max(workers, 1)
+        self.account_concurrency = max(account_concurrency, 1)
+        self.initializer = initializer
+        self.poll_interval = poll_interval
+
+        ctx = multiprocessing.get_context('fork')
+        self.__ctx = ctx
+        self.__queues = [ctx.Queue() for _ in range(self.workers)]
+        self.__events = ctx.Queue()
+        self.__slots = [ctx.BoundedSemaphore(self.account_concurrency) for _ in range(ACCOUNT_SLOTS)]
+        self.__stop = ctx.Event()
+        self.__counters = {
+            name: ctx.Value('i', 0) for name in ('dispatched', 'completed', 'stolen', 'deferred', 'restarted')
+        }
+        self.__processes = []
+        self.__pending = set()
+        self.__running = {}
+
+    @property
+    def stats(self):
+        """Returns the dispatcher counters
+
+        Returns:
+            `dict`
+        """
+        self.__collect_events()
+
+        stats = {name: counter.value for name, counter in self.__counters.items()}
+        stats['pending'] = len(self.__pending)
+        stats['running'] = len(self.__running)
+
+        return stats
+
+    def start(self):
+        """Start the worker processes
+
+        Returns:
+            `None`
+        """
+        for index in range(self.workers):
+            self.__processes.append(self.__start_worker(index))
+
+    def shutdown(self, wait=True):
+        """Stop the worker processes, once they have finished the jobs they are running. Queued jobs are discarded
+
+        Args:
+            wait (`bool`): Wait for the worker processes to exit. Default: `True`
+
+        Returns:
+            `None`
+        """
+        self.__stop.set()
+
+        if wait:
+            for process in self.__processes:
+                process.join()
+
+        self.__processes = []
+
+    def dispatch(self, job):
+        """Queue a job to the worker owning the account of the job. Jobs are skipped if a job with the same name is
+        still queued or running
+
+        Args:
+            job (:obj:`Job`): Job to dispatch
+
+        Returns:
+            `bool`: `True` if the job was queued
+        """
+        self.__collect_events()
+        self.__check_workers()
+
+        if job.name in self.__pending:
+            self.log.warning('Skipping {}, the previous run has not completed yet'.format(job.name))
+            return False
+
+        self.__pending.add(job.name)
+        self.__increment('dispatched')
+        self.__queues[self.get_shard(job)].put(job)
+
+        return True
+
+    def join(self, timeout=None):
+        """Wait until all dispatched jobs have completed
+
+        Args:
+            timeout (`float`): Maximum number of seconds to wait. Default: `None`, wait forever
+
+        Returns:
+            `bool`: `True` if all jobs completed
+        """
+        deadline = time.monotonic() + timeout if timeout is not None else None
+
+        while True:
+            self.__collect_events()
+            self.__check_workers()
+            if not self.__pending:
+                return True
+
+            wait = self.poll_interval
+            if deadline is not None:
+                wait = min(wait, deadline - time.monotonic())
+                if wait <= 0:
+                    return False
+
+            try:
+                self.__handle_event(self.__events.get(timeout=wait))
+            except Empty:
+                continue
+
+    def get_shard(self, job):
+        """Returns the index of the worker owning the account of the job, or of the job itself for jobs not bound to
+        an account
+
+        Args:
+            job (:obj:`Job`): Job
+
+        Returns:
+            `int`
+        """
+        return zlib.crc32((job.kwargs.get('account') or job.name).encode('utf-8')) % self.workers
+
+    # region Internal methods
+    def __start_worker(self, index):
+        process = self.__ctx.Process(
+            target=self.__run_worker,
+            args=(index,),
+            name='cinq-dispatcher-{}'.format(index),
+            daemon=True
+        )
+        process.start()
+
+        return process
+
+    def __check_workers(self):
+        """Replace worker processes which have exited, releasing the job and account slot of the job they were running
+
+        Returns:
+            `None`
+        """
+        if self.__stop.is_set():
+            return
+
+        for index, process in enumerate(self.__processes):
+            if process.is_alive():
+                continue
+
+            job = self.__running.pop(index, None)
+            self.log.error('Dispatcher worker {} exited with code {}{}, restarting it'.format(
+                index,
+                process.exitcode,
+                ' while running {}'.format(job.name) if job else ''
+            ))
+
+            if job:
+                self.__pending.discard(job.name)
+                slot = self.__get_account_slot(job)
+                if slot:
+                    try:
+                        slot.release()
+                    except ValueError:
+                        pass
+
+            self.__increment('restarted')
+            self.__processes[index] = self.__start_worker(index)
+
+    def __run_worker(self, index):
+        if self.initializer:
+            self.initializer()
+
+        while not self.__stop.is_set():
+            job = self.__get_job(index)
+            if not job:
+                continue
+
+            slot = self.__get_account_slot(job)
+            if slot and not slot.acquire(block=False):
+                # The account is at its concurrency limit, put the job back at the end of the queue of its owner
+                self.__increment('deferred')
+                self.__queues[self.get_shard(job)].put(job)
+                time.sleep(min(self.poll_interval, 0.1))
+                continue
+
+            self.__events.put(('started', index, job))
+            try:
+                self.runner(job)
+
+            except Exception:
+                self.log.exception('Failed running job {}'.format(job.name))
+
+            finally:
+                if slot:
+                    slot.release()
+
+                self.__increment('completed')
+                self.__events.put(('completed', index, job))
+
+    def __get_job(self, index):
+        try:
+            return self.__queues[index].get(timeout=self.poll_interval)
+
+        except Empty:
+            pass
+
+        for offset in range(1, self.workers):
+            try:
+                job = self.__queues[(index + offset) % self.workers].get_nowait()
+                self.__increment('stolen')
+                return job
+
+            except Empty:
+                continue
+
+    def __get_account_slot(self, job):
+        account = job.kwargs.get('account')
+        if not account:
+            return None
+
+        return self.__slots[zlib.crc32(account.encode('utf-8')) % ACCOUNT_SLOTS]
+
+    def __collect_events(self):
+        while True:
+            try:
+                self.__handle_event(self.__events.get_nowait())
+
+            except Empty:
+                break
+
+    def __handle_event(self, event):
+        """Track the jobs running on each worker process. Both events are sent on the same queue, so the events of a
+        worker are received in the order they were sent
+
+        Args:
+            event (`tuple`): Event type, index of the worker process and the :obj:`Job`
+
+        Returns:
+            `None`
+        """
+        event_type, index, job = event
+        if event_type == 'started':
+            self.__running[index] = job
+        else:
+            self.__pending.discard(job.name)
+            if index in self.__running and self.__running[index].name == job.name:
+                del self.__running[index]
+
+    def __increment(self, name):
+        with self.__counters[name].get_lock():
+            self.__counters[name].value += 1
+    # endregion